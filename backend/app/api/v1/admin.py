@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text, inspect
 from datetime import datetime, date
 from decimal import Decimal
+from typing import Optional
 from uuid import UUID
 import enum
 import re
@@ -862,3 +863,87 @@ def seed_nutrition(
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Errore durante il seed: {str(e)}")
+
+
+@router.get("/http-stats")
+def get_http_stats(
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Outbound HTTP connection pool statistics per host.
+    Shows pool hits vs new connections (handshakes) and latency percentiles.
+    """
+    from app.integrations.http_client import http_clients
+
+    return http_clients.get_stats()
+
+
+@router.get("/llm-client-stats")
+async def get_llm_client_stats(
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Per-house LLM client pool statistics.
+    Shows pooled clients per house with in-flight requests and idle time.
+    """
+    from app.integrations.llm_pool import llm_clients
+
+    return llm_clients.get_stats()
+
+
+@router.get("/ocr-cache-stats")
+async def get_ocr_cache_stats_endpoint(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    OCR result cache statistics.
+    Backend cache hit rate (this worker) and entry counts, plus the OCR service's own disk cache.
+    """
+    from fastapi.concurrency import run_in_threadpool
+    from app.services.ocr_cache_service import get_ocr_cache_stats
+    from app.services.receipt_ocr import get_ocr_service_cache_stats
+
+    return {
+        "backend": await run_in_threadpool(get_ocr_cache_stats, db),
+        "ocr_service": await get_ocr_service_cache_stats(),
+    }
+
+
+@router.delete("/ocr-cache")
+def purge_ocr_cache_endpoint(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Purge the backend OCR result cache."""
+    from app.services.ocr_cache_service import purge_ocr_cache
+
+    deleted = purge_ocr_cache(db)
+    return {"message": f"Rimosse {deleted} voci dalla cache OCR", "deleted": deleted}
+
+
+@router.get("/llm-cache-stats")
+def get_llm_cache_stats_endpoint(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    LLM response cache statistics.
+    Hit rate and tokens saved per purpose (this worker), plus entries and savings from the shared table.
+    """
+    from app.services.llm_cache_service import get_llm_cache_stats
+
+    return get_llm_cache_stats(db)
+
+
+@router.delete("/llm-cache")
+def purge_llm_cache_endpoint(
+    purpose: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Purge the LLM response cache (all of it, or one purpose)."""
+    from app.services.llm_cache_service import purge_llm_cache
+
+    deleted = purge_llm_cache(db, purpose)
+    return {"message": f"Rimosse {deleted} voci dalla cache LLM", "deleted": deleted}
@@ -29,8 +29,11 @@ from app.models.shopping_list import ShoppingListItem
 from app.models.barcode_source import BarcodeLookupSource
 from app.models.product_report import ProductReport, ReportStatus
 from app.services.auth_service import hash_password
-from app.services.barcode_source_service import lookup_barcode_chain
+from app.services.barcode_source_service import lookup_barcode_chain, warm_barcode_cache, get_source_health
+from app.services.barcode_cache_service import get_cache_stats, purge_cache
 from app.services.product_enrichment import parse_and_save_category_tags
+from app.services.area_service import AreaService
+from app.services.known_barcode_service import reindex_catalog_products
 
 
 router = APIRouter(prefix="/anagrafiche", tags=["Anagrafiche"])
@@ -328,6 +331,10 @@ def create_house(
         role="OWNER"
     )
     db.add(membership)
+
+    # Seed default areas
+    AreaService.seed_defaults(db, house.id)
+
     db.commit()
     db.refresh(house)
 
@@ -1658,6 +1665,7 @@ def set_product_name(
 
 class RefetchRequest(BaseModel):
     barcode: Optional[str] = None
+    force_refresh: bool = False  # Bypass the barcode lookup cache
 
 
 @router.post("/products/{product_id}/refetch", response_model=ProductListItem)
@@ -1671,6 +1679,7 @@ async def refetch_product_from_api(
     Re-fetch product data from web APIs (barcode lookup chain with fallback).
     Updates the existing ProductCatalog entry with fresh data from the sources.
     Accepts an optional barcode in the body to use instead of the DB barcode.
+    Cached source responses are used unless force_refresh is set.
     """
     product = db.query(ProductCatalog).filter(ProductCatalog.id == product_id).first()
     if not product:
@@ -1706,7 +1715,7 @@ async def refetch_product_from_api(
             ))
 
     # Call the barcode lookup chain (same used during verification)
-    result = await lookup_barcode_chain(db, lookup_barcode)
+    result = await lookup_barcode_chain(db, lookup_barcode, use_cache=not body.force_refresh)
 
     if not result.get("found"):
         raise HTTPException(status_code=404, detail="Prodotto non trovato in nessuna sorgente API")
@@ -2025,6 +2034,14 @@ def list_barcode_sources(
     )
 
 
+@router.get("/barcode-sources/health")
+def get_barcode_sources_health(
+    current_user: User = Depends(get_current_user)
+):
+    """Circuit breaker state of sources that failed recently (this worker)."""
+    return {"sources": get_source_health()}
+
+
 @router.post("/barcode-sources", response_model=BarcodeLookupSourceItem, status_code=status.HTTP_201_CREATED)
 def create_barcode_source(
     data: BarcodeLookupSourceCreate,
@@ -2094,12 +2111,20 @@ def update_barcode_source(
         raise HTTPException(status_code=404, detail="Sorgente non trovata")
 
     update_data = data.model_dump(exclude_unset=True)
+    endpoint_changed = any(
+        field in update_data and update_data[field] != getattr(source, field)
+        for field in ("base_url", "api_path")
+    )
     for field, value in update_data.items():
         setattr(source, field, value)
 
     db.commit()
     db.refresh(source)
 
+    # Cached responses came from the old endpoint
+    if endpoint_changed:
+        purge_cache(db, source_code=source.code)
+
     return BarcodeLookupSourceItem(
         id=source.id,
         name=source.name,
@@ -2183,9 +2208,67 @@ def delete_barcode_source(
     if source.is_hardcoded:
         raise HTTPException(status_code=400, detail="Non puoi eliminare una sorgente predefinita. Puoi solo annullarla.")
 
+    source_code = source.code
     db.delete(source)
     db.commit()
 
+    purge_cache(db, source_code=source_code)
+
+
+# ============================================================
+# BARCODE LOOKUP CACHE
+# ============================================================
+
+class BarcodeCacheStatsResponse(BaseModel):
+    memory_hits: int
+    db_hits: int
+    negative_hits: int
+    misses: int
+    stores: int
+    lookups: int
+    hit_rate: float
+    memory_entries: int
+    db_entries: int
+    db_positive_entries: int
+    db_negative_entries: int
+    db_expired_entries: int
+
+
+class BarcodeCacheWarmRequest(BaseModel):
+    barcodes: List[str] = Field(..., min_length=1, max_length=500)
+
+
+@router.get("/barcode-cache/stats", response_model=BarcodeCacheStatsResponse)
+def get_barcode_cache_stats(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Barcode lookup cache hit rates (this worker) and entry counts."""
+    return get_cache_stats(db)
+
+
+@router.delete("/barcode-cache")
+def purge_barcode_cache(
+    barcode: Optional[str] = Query(None, description="Only entries for this barcode"),
+    source_code: Optional[str] = Query(None, description="Only entries for this source"),
+    expired_only: bool = Query(False, description="Only expired entries"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Purge barcode lookup cache entries (all entries if no filter is given)."""
+    deleted = purge_cache(db, barcode=barcode, source_code=source_code, expired_only=expired_only)
+    return {"message": f"Rimosse {deleted} voci dalla cache", "deleted": deleted}
+
+
+@router.post("/barcode-cache/warm")
+async def warm_barcode_cache_endpoint(
+    data: BarcodeCacheWarmRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Look up a list of barcodes on all sources and store the answers in the cache."""
+    return await warm_barcode_cache(db, data.barcodes)
+
 
 # ============================================================
 # DATA MIGRATION - Link orphan data to a house
@@ -2271,10 +2354,13 @@ def link_orphan_data_to_house(
     )
 
     # Link products
-    products_count = db.query(ProductCatalog).filter(ProductCatalog.house_id.is_(None)).update(
+    product_ids = [row.id for row in db.query(ProductCatalog.id).filter(ProductCatalog.house_id.is_(None))]
+    products_count = db.query(ProductCatalog).filter(ProductCatalog.id.in_(product_ids)).update(
         {"house_id": house_id},
         synchronize_session=False
-    )
+    ) if product_ids else 0
+    # Bulk update skips mapper events: move their known barcodes explicitly
+    reindex_catalog_products(db, product_ids, old_house_id=None)
 
     db.commit()
 
@@ -26,6 +26,7 @@ from app.api.v1.deps import get_current_user
 from app.models.user import User
 from app.models.house import House
 from app.integrations.grocy import grocy_client, GrocyAPIError
+from app.integrations.http_client import http_clients
 from app.schemas.grocy import (
     GrocyStockResponse,
     GrocyAddStockRequest,
@@ -91,7 +92,7 @@ async def test_grocy_connection(
     grocy_url = request.grocy_url.rstrip("/")
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with http_clients.client_for(grocy_url) as client:
             response = await client.get(
                 f"{grocy_url}/api/system/info",
                 headers={
@@ -443,7 +444,7 @@ async def get_house_products(
     grocy_url, grocy_api_key = get_house_grocy_settings(db, house_id)
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with http_clients.client_for(grocy_url) as client:
             response = await client.get(
                 f"{grocy_url}/api/objects/products",
                 headers={
@@ -772,7 +773,7 @@ async def _house_grocy_request(
     }
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with http_clients.client_for(grocy_url) as client:
             if method == "GET":
                 response = await client.get(
                     f"{grocy_url}/api{endpoint}",
@@ -832,7 +833,7 @@ async def get_house_locations(
     grocy_url, grocy_api_key = get_house_grocy_settings(db, house_id)
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with http_clients.client_for(grocy_url) as client:
             response = await client.get(
                 f"{grocy_url}/api/objects/locations",
                 headers={
@@ -1046,7 +1047,7 @@ async def bulk_add_house_stock(
     successful = 0
     failed = 0
 
-    async with httpx.AsyncClient(timeout=10.0) as client:
+    async with http_clients.client_for(grocy_url) as client:
         for item in request.items:
             payload = {
                 "amount": item.amount,
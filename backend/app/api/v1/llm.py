@@ -16,13 +16,11 @@ from app.models.user import User
 from app.models.house import House
 from app.models.user_house import UserHouse
 from app.integrations.llm import (
-    LLMConnection,
     LLMPurpose,
     LLMType,
-    get_llm_manager,
     test_connection,
-    check_connection_health,
 )
+from app.integrations.llm_pool import llm_clients
 
 router = APIRouter(prefix="/llm", tags=["LLM"])
 
@@ -65,10 +63,7 @@ def save_llm_settings(db: Session, house: House, connections: list[dict]):
     settings["llm_connections"] = connections
     house.settings = settings
     db.commit()
-
-    # Update manager
-    manager = get_llm_manager()
-    manager.load_from_settings(settings)
+    # The client pool picks the change up on the house's next LLM call (settings hash)
 
 
 # =============================================================================
@@ -375,12 +370,12 @@ async def check_llm_health(
     if not conn:
         raise HTTPException(404, "Connection not found")
 
-    # Load into manager and check health
-    manager = get_llm_manager()
+    # Check health through the house's pooled client
     try:
-        llm_conn = LLMConnection.from_dict(conn)
-        manager.add_connection(llm_conn)
-        result = await check_connection_health(connection_id)
+        client = llm_clients.get_client_by_id(house.id, house.settings, connection_id)
+        if client is None:
+            raise ValueError("Configurazione della connessione non valida")
+        result = await client.health_check()
         return LLMHealthResponse(
             connection_id=connection_id,
             status=result.get("status", "error"),
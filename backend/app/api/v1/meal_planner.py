@@ -15,7 +15,8 @@ from app.db.session import get_db
 from app.models.user import User
 from app.models.house import House
 from app.models.user_house import UserHouse
-from app.integrations.llm import LLMConnection, LLMPurpose, get_llm_manager
+from app.integrations.llm import LLMPurpose
+from app.integrations.llm_pool import llm_clients
 from app.services.meal_planner_service import (
     GenerateRequest,
     GenerateResponse,
@@ -53,19 +54,7 @@ def _verify_house_membership(db: Session, user_id, house_id) -> House:
 
 def _get_llm_client(house: House):
     """Try to get an LLM client configured for suggestions."""
-    manager = get_llm_manager()
-
-    # Load connections from house settings
-    settings = house.settings or {}
-    llm_configs = settings.get("llm_connections", [])
-    for config in llm_configs:
-        try:
-            conn = LLMConnection.from_dict(config)
-            manager.add_connection(conn)
-        except Exception:
-            pass
-
-    return manager.get_client_for_purpose(LLMPurpose.SUGGESTIONS)
+    return llm_clients.get_client(house.id, house.settings, LLMPurpose.SUGGESTIONS)
 
 
 @router.post("/generate", response_model=GenerateResponse)
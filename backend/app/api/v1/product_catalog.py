@@ -4,12 +4,15 @@ CRUD operations for the local product catalog.
 Each house has its own product catalog. house_id=null are global templates.
 """
 
+import json
+
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 from typing import Optional, List
-from uuid import UUID
-from pydantic import BaseModel
+from uuid import UUID, uuid4
+from pydantic import BaseModel, Field
 from datetime import datetime
 
 from app.db.session import get_db
@@ -19,6 +22,7 @@ from app.models.product_catalog import ProductCatalog
 from app.models.product_barcode import ProductBarcode
 from app.models.user_house import UserHouse
 from app.services.product_enrichment import get_queue_status
+from app.services.catalog_batch_service import enrich_barcodes_batch
 
 
 def _get_product_by_barcode_in_house(db: Session, barcode: str, house_id):
@@ -77,6 +81,19 @@ class EnrichmentQueueStatus(BaseModel):
     """Response schema for enrichment queue status."""
     queue_size: int
     worker_running: bool
+    pending: int = 0
+    running: int = 0
+    done: int = 0
+    failed: int = 0
+    workers: int = 0
+    lookups_run: int = 0
+    lookups_coalesced_queued: int = 0
+    lookups_avoided: int = 0
+
+
+class EnrichBatchRequest(BaseModel):
+    """Request schema for batch enrichment."""
+    barcodes: List[str] = Field(..., min_length=1, max_length=2000)
 
 
 class ProductSuggestion(BaseModel):
@@ -279,18 +296,23 @@ def import_template_products(
         ).all()
     )
 
+    # Primary barcodes of all templates in one query
+    template_barcodes = dict(
+        db.query(ProductBarcode.product_id, ProductBarcode.barcode).filter(
+            ProductBarcode.product_id.in_([t.id for t in templates]),
+            ProductBarcode.is_primary == True
+        ).all()
+    ) if templates else {}
+
     imported = 0
     for template in templates:
-        # Get template's primary barcode
-        template_pb = db.query(ProductBarcode).filter(
-            ProductBarcode.product_id == template.id,
-            ProductBarcode.is_primary == True
-        ).first()
-        template_barcode = (template_pb.barcode if template_pb else None) or template.barcode
+        template_barcode = template_barcodes.get(template.id) or template.barcode
         if not template_barcode:
             continue
         if template_barcode not in existing_barcodes:
+            # Client-side id: products and barcodes are flushed together at commit
             new_product = ProductCatalog(
+                id=uuid4(),
                 house_id=house_id,
                 barcode=template_barcode,
                 name=template.name,
@@ -314,13 +336,13 @@ def import_template_products(
                 raw_data=template.raw_data,
             )
             db.add(new_product)
-            db.flush()
             db.add(ProductBarcode(
                 product_id=new_product.id,
                 barcode=template_barcode,
                 is_primary=True,
                 source=template.source
             ))
+            existing_barcodes.add(template_barcode)
             imported += 1
 
     db.commit()
@@ -358,12 +380,41 @@ def get_product_by_barcode(
 
 @router.get("/enrichment-status", response_model=EnrichmentQueueStatus)
 def get_enrichment_status(
+    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get the current status of the product enrichment queue.
+    Counts cover all API workers (jobs are stored in the database).
+    """
+    return get_queue_status(db)
+
+
+@router.post("/enrich-batch")
+def enrich_batch(
+    data: EnrichBatchRequest,
+    house_id: UUID = Query(..., description="House ID"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
     """
-    return get_queue_status()
+    Enrich many barcodes at once (bulk imports, dispensa backfills).
+
+    Barcodes already in the catalog are skipped, the others are looked up
+    concurrently and saved in bulk. Progress is streamed as NDJSON, one
+    event per line: start, progress (per saved chunk), done.
+    """
+    if not verify_house_access(db, current_user.id, house_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Non hai accesso a questa casa"
+        )
+
+    async def stream():
+        async for event in enrich_barcodes_batch(house_id, data.barcodes):
+            yield json.dumps(event) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 
 @router.delete("/barcode/{barcode}", status_code=status.HTTP_204_NO_CONTENT)
@@ -4,7 +4,7 @@ Products API Endpoints
 Endpoints for product lookup using Open Food Facts database.
 """
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 from typing import Optional
@@ -56,15 +56,18 @@ class ProductLookupResponse(BaseModel):
     Also checks the local product catalog for saved category.
 
     Sources are tried in order of priority until a result is found.
+    With strategy=race all sources are queried at once and the
+    highest-priority hit wins.
     """
 )
 async def lookup_barcode(
     barcode: str,
+    strategy: Optional[str] = Query(None, pattern="^(sequential|race)$", description="Lookup strategy (default from settings)"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Look up a barcode using the fallback chain and local catalog."""
-    result = await lookup_barcode_chain(db, barcode)
+    result = await lookup_barcode_chain(db, barcode, strategy=strategy)
 
     # Check local catalog for saved category_id
     local_category_id = None
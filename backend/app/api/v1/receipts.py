@@ -4,24 +4,25 @@ Receipts API Endpoints
 Upload, process, and reconcile receipt images with shopping lists.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional
 from uuid import UUID, uuid4
-from datetime import datetime, timezone
-import os
+import asyncio
 import logging
-import shutil
 
-from app.db.session import get_db
+from app.core.config import settings
+from app.db.session import get_db, SessionLocal
 from app.api.v1.deps import get_current_user
 from app.models.user import User
 from app.models.shopping_list import ShoppingList, ShoppingListItem
 from app.models.receipt import Receipt, ReceiptImage, ReceiptItem, ReceiptStatus, ReceiptItemMatchStatus
+from app.models.background_job import JobStatus
 from app.schemas.receipt import (
     ReceiptResponse,
     ReceiptImageResponse,
+    ReceiptProcessingStatus,
     ReceiptSummary,
     ReceiptsResponse,
     ReceiptItemResponse,
@@ -30,29 +31,61 @@ from app.schemas.receipt import (
     ReconciliationResult,
     ReconciliationSummary,
     AddExtraToListRequest,
+    ReceiptSynonymCreate,
+    ReceiptSynonymResponse,
+)
+from app.services.receipt_images import (
+    RENDITIONS,
+    InvalidReceiptImage,
+    ReceiptImageTooLarge,
+    ensure_receipts_dir,
+    store_upload,
+    generate_renditions,
+    delete_image_files,
+    delete_unreferenced_images,
+    ensure_stored,
+    serve_image,
+)
+from app.services.receipt_processing import (
+    enqueue_receipt_processing,
+    get_active_receipt_job,
+    enqueue_ocr_prefetch,
+    get_receipt_job,
+    ABANDONED_MESSAGE,
+)
+from app.services.receipt_synonym_service import get_synonym_engine, list_synonyms, add_synonym
+from app.services.receipt_line_memory_service import (
+    lookup_lines, find_remembered_item, record_hits, remember_line, forget_line, is_corrected
 )
-from app.services.receipt_ocr import process_receipt, get_product_lines
 from app.services.receipt_reconciliation import (
     reconcile_receipt_items,
     get_unmatched_shopping_items,
     get_reconciliation_summary,
 )
-from app.services.llm_ocr import smart_match_items, parse_receipt_with_llm
+from app.services.llm_ocr import smart_match_items
 from app.services.error_logging import error_logger
-from app.integrations.llm import get_llm_manager, LLMPurpose
+from app.integrations.llm import LLMPurpose
+from app.integrations.llm_pool import llm_clients
 from app.models.house import House
+from app.models.receipt_synonym import ReceiptSynonym
+from app.models.store import Store
+from app.models.user_house import UserHouse
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/receipts")
 
-# Base path for storing receipt images
-RECEIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "data", "receipts")
+# Processing progress stream: DB poll interval and keep-alive comment interval
+SSE_POLL_SECONDS = 1.0
+SSE_KEEPALIVE_SECONDS = 15.0
 
-
-def ensure_receipts_dir():
-    """Ensure the receipts directory exists"""
-    os.makedirs(RECEIPTS_DIR, exist_ok=True)
+def verify_house_access(db: Session, user_id: UUID, house_id: UUID) -> bool:
+    """Verify user has access to the house."""
+    membership = db.query(UserHouse).filter(
+        UserHouse.user_id == user_id,
+        UserHouse.house_id == house_id
+    ).first()
+    return membership is not None
 
 
 def build_receipt_response(receipt: Receipt) -> ReceiptResponse:
@@ -86,6 +119,80 @@ def build_receipt_response(receipt: Receipt) -> ReceiptResponse:
     )
 
 
+async def _store_uploads(files: list[UploadFile]) -> tuple[list[str], list[str]]:
+    """
+    Stream uploaded files into content-addressed storage, in order.
+
+    Files not stored before also get their thumb/preview renditions. On
+    failure the files created here are removed and an HTTPException raised.
+
+    Returns:
+        (stored filename per upload, filenames created by this call)
+    """
+    ensure_receipts_dir()
+    stored = []
+    created_files = []
+    file = None
+    try:
+        for file in files:
+            filename, created = await asyncio.to_thread(store_upload, file.file)
+            if created:
+                created_files.append(filename)
+                await asyncio.to_thread(generate_renditions, filename)
+            stored.append(filename)
+    except InvalidReceiptImage:
+        for filename in created_files:
+            delete_image_files(filename)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File non valido: {file.filename}. Usa: JPG, PNG, WEBP"
+        )
+    except ReceiptImageTooLarge:
+        for filename in created_files:
+            delete_image_files(filename)
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Immagine troppo grande: {file.filename} (max {settings.RECEIPT_MAX_IMAGE_MB} MB)"
+        )
+    except Exception as e:
+        for filename in created_files:
+            delete_image_files(filename)
+        logger.error(f"Failed to save receipt images: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Errore nel salvataggio delle immagini"
+        )
+    return stored, created_files
+
+
+async def _ensure_uploads_stored(db: Session, files: list[UploadFile], filenames: list[str]) -> None:
+    """
+    Re-check stored uploads once their ReceiptImage rows are committed.
+
+    Restores a file deleted as unreferenced while the rows were being saved,
+    and generates renditions missing for photos that were already stored.
+    """
+    seen = set()
+    for file, filename in zip(files, filenames):
+        if filename in seen:
+            continue
+        seen.add(filename)
+        try:
+            await asyncio.to_thread(ensure_stored, db, filename, file.file)
+        except Exception as e:
+            logger.error(f"Failed to check stored receipt image {filename}: {e}")
+
+
+def _start_ocr_prefetch(db: Session, receipt_id: UUID, filenames: list[str]) -> None:
+    """Queue background OCR of the uploaded images; upload succeeds regardless."""
+    try:
+        enqueue_ocr_prefetch(db, receipt_id, filenames)
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Could not queue OCR prefetch for receipt {receipt_id}: {e}")
+
+
+
 @router.post("/shopping-lists/{list_id}/upload", response_model=ReceiptResponse, status_code=status.HTTP_201_CREATED)
 async def upload_receipt(
     list_id: UUID,
@@ -123,73 +230,98 @@ async def upload_receipt(
                 detail=f"Tipo file non supportato: {file.filename}. Usa: JPG, PNG, WEBP"
             )
 
-    # Ensure directory exists
-    ensure_receipts_dir()
-
-    # Create receipt record first
-    receipt = Receipt(
-        shopping_list_id=list_id,
-        uploaded_by=current_user.id,
-        status=ReceiptStatus.UPLOADED
-    )
-    db.add(receipt)
-    db.flush()  # Get the receipt ID
+    # Store files first: duplicates of already stored photos are not written again
+    filenames, created_files = await _store_uploads(files)
 
-    # Save files and create ReceiptImage records
-    saved_files = []
     try:
-        for idx, file in enumerate(files):
-            # Generate unique filename
-            ext = file.filename.split('.')[-1] if file.filename else 'jpg'
-            filename = f"{receipt.id}_{idx}.{ext}"
-
-            # Save file
-            file_path = os.path.join(RECEIPTS_DIR, filename)
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            saved_files.append(file_path)
-
-            # Create ReceiptImage record
-            receipt_image = ReceiptImage(
+        receipt = Receipt(
+            shopping_list_id=list_id,
+            uploaded_by=current_user.id,
+            status=ReceiptStatus.UPLOADED
+        )
+        db.add(receipt)
+        db.flush()  # Get the receipt ID
+
+        for idx, filename in enumerate(filenames):
+            db.add(ReceiptImage(
                 receipt_id=receipt.id,
                 position=idx,
                 image_path=filename
-            )
-            db.add(receipt_image)
+            ))
 
         db.commit()
         db.refresh(receipt)
 
-        logger.info(f"Receipt uploaded: {receipt.id} for list {list_id}, {len(files)} images")
+        logger.info(
+            f"Receipt uploaded: {receipt.id} for list {list_id}, {len(files)} images "
+            f"({len(files) - len(created_files)} already stored)"
+        )
 
     except Exception as e:
-        # Cleanup saved files on error
-        for fp in saved_files:
-            if os.path.exists(fp):
-                os.remove(fp)
         db.rollback()
+        delete_unreferenced_images(db, created_files)
         logger.error(f"Failed to save receipt images: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Errore nel salvataggio delle immagini"
         )
 
+    await _ensure_uploads_stored(db, files, filenames)
+    _start_ocr_prefetch(db, receipt.id, filenames)
     return build_receipt_response(receipt)
 
 
-@router.post("/{receipt_id}/process", response_model=ReceiptResponse)
-async def process_receipt_ocr(
+def _processing_status(db: Session, receipt_id: UUID) -> Optional[ReceiptProcessingStatus]:
+    """Receipt status plus its latest processing job, or None if the receipt doesn't exist."""
+    receipt_status = db.query(Receipt.status).filter(Receipt.id == receipt_id).scalar()
+    if receipt_status is None:
+        return None
+
+    job = get_receipt_job(db, receipt_id)
+    job_status = job.status.value if job else None
+    finished = job_status not in (JobStatus.PENDING.value, JobStatus.RUNNING.value)
+
+    error = None
+    if receipt_status == ReceiptStatus.ERROR:
+        error = job.last_error if job else None
+    elif receipt_status == ReceiptStatus.PROCESSING and finished:
+        # The run died without releasing the receipt
+        receipt_status = ReceiptStatus.ERROR
+        error = ABANDONED_MESSAGE
+
+    return ReceiptProcessingStatus(
+        receipt_id=receipt_id,
+        receipt_status=receipt_status,
+        job_id=job.id if job else None,
+        job_status=job_status,
+        progress=job.progress if job else None,
+        error=error,
+        finished=finished,
+    )
+
+
+def _poll_processing_status(receipt_id: UUID) -> Optional[ReceiptProcessingStatus]:
+    """_processing_status with a short-lived session (used by the SSE stream)."""
+    db = SessionLocal()
+    try:
+        return _processing_status(db, receipt_id)
+    finally:
+        db.close()
+
+
+@router.post("/{receipt_id}/process", response_model=ReceiptProcessingStatus, status_code=status.HTTP_202_ACCEPTED)
+def process_receipt_ocr(
     receipt_id: UUID,
-    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Process receipt images with OCR.
+    Queue OCR processing of the receipt images.
 
-    Uses EasyOCR for text extraction, then LLM to interpret and structure products.
-    Processes all images in order and concatenates the text.
-    Updates receipt status to 'processed' or 'error'.
+    Returns immediately with the job id. A background worker runs EasyOCR on
+    all images, then the LLM to structure products, and moves the receipt
+    to 'processed' or 'error'. Follow progress with GET /{receipt_id}/processing
+    (polling) or GET /{receipt_id}/processing/stream (Server-Sent Events).
     """
     receipt = db.query(Receipt).filter(Receipt.id == receipt_id).first()
     if not receipt:
@@ -198,140 +330,85 @@ async def process_receipt_ocr(
             detail="Scontrino non trovato"
         )
 
-    # Check if already processed
-    if receipt.status in [ReceiptStatus.PROCESSED, ReceiptStatus.RECONCILED]:
-        return build_receipt_response(receipt)
-
-    # Check if has images
-    if not receipt.images:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Nessuna immagine caricata per questo scontrino"
-        )
-
-    # Update status to processing
-    receipt.status = ReceiptStatus.PROCESSING
-    db.commit()
-
-    # Try to get LLM client for product parsing
-    llm_client = None
-    shopping_list = db.query(ShoppingList).filter(
-        ShoppingList.id == receipt.shopping_list_id
-    ).first()
-
-    if shopping_list and shopping_list.house_id:
-        house = db.query(House).filter(House.id == shopping_list.house_id).first()
-        if house and house.settings:
-            manager = get_llm_manager()
-            manager.load_from_settings(house.settings)
-            llm_client = manager.get_client_for_purpose(LLMPurpose.OCR)
-            if llm_client:
-                logger.info(f"Using LLM for product parsing: {llm_client.connection.name}")
-
-    try:
-        # Step 1: Use EasyOCR for raw text extraction
-        all_raw_text = []
-        all_confidences = []
-        store_name = None
-        total_amount = None
-
-        for receipt_image in sorted(receipt.images, key=lambda x: x.position):
-            image_path = os.path.join(RECEIPTS_DIR, receipt_image.image_path)
-
-            # Use EasyOCR service for text extraction
-            ocr_result = process_receipt(image_path)
-
-            receipt_image.raw_ocr_text = ocr_result.raw_text
-            receipt_image.ocr_confidence = ocr_result.average_confidence
-
-            all_raw_text.append(ocr_result.raw_text)
-            all_confidences.append(ocr_result.average_confidence)
-
-            if not store_name and ocr_result.store_name:
-                store_name = ocr_result.store_name
-            if ocr_result.total_amount:
-                total_amount = ocr_result.total_amount
-
-        # Combine all OCR text
-        combined_raw_text = "\n".join(all_raw_text)
-
-        # Save OCR results
-        receipt.raw_ocr_text = combined_raw_text
-        receipt.ocr_confidence = sum(all_confidences) / len(all_confidences) if all_confidences else 0.0
-        receipt.store_name_detected = store_name
-        receipt.total_amount_detected = total_amount
-        receipt.processed_at = datetime.now(timezone.utc)
-
-        # Step 2: Use LLM to parse products from raw text
-        all_product_lines = []
-
-        if llm_client and combined_raw_text.strip():
-            try:
-                logger.info("Sending OCR text to LLM for product parsing...")
-                llm_products = await parse_receipt_with_llm(combined_raw_text, llm_client)
-
-                if llm_products:
-                    logger.info(f"LLM parsed {len(llm_products)} products")
-                    all_product_lines = llm_products
-                else:
-                    logger.warning("LLM returned no products, using EasyOCR fallback")
-
-            except Exception as e:
-                logger.warning(f"LLM parsing failed: {e}, using EasyOCR fallback")
-
-        # Fallback: use EasyOCR's product parsing if LLM didn't work
-        if not all_product_lines:
-            logger.info("Using EasyOCR product parsing as fallback")
-            for receipt_image in sorted(receipt.images, key=lambda x: x.position):
-                image_path = os.path.join(RECEIPTS_DIR, receipt_image.image_path)
-                ocr_result = process_receipt(image_path)
-                product_lines = get_product_lines(ocr_result)
-                all_product_lines.extend(product_lines)
-
-        receipt.status = ReceiptStatus.PROCESSED
-
-        # Create receipt items from product lines
-        for idx, line in enumerate(all_product_lines):
-            item = ReceiptItem(
-                receipt_id=receipt.id,
-                position=idx,
-                raw_text=getattr(line, 'raw_text', ''),
-                parsed_name=getattr(line, 'parsed_name', None),
-                parsed_quantity=getattr(line, 'parsed_quantity', None),
-                parsed_unit_price=getattr(line, 'parsed_unit_price', None),
-                parsed_total_price=getattr(line, 'parsed_total_price', None),
-                match_status=ReceiptItemMatchStatus.UNMATCHED
+    # Already processed: nothing to queue
+    if receipt.status not in [ReceiptStatus.PROCESSED, ReceiptStatus.RECONCILED]:
+        if not receipt.images:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Nessuna immagine caricata per questo scontrino"
             )
-            db.add(item)
+        if receipt.status == ReceiptStatus.PROCESSING and not get_active_receipt_job(db, receipt_id):
+            # Left PROCESSING by a run that died: release it so the new job can claim it
+            receipt.status = ReceiptStatus.ERROR
+            receipt.error_message = ABANDONED_MESSAGE
+            db.commit()
+        job = enqueue_receipt_processing(db, receipt_id)
+        logger.info(f"Receipt {receipt_id} queued for processing (job {job.id if job else '-'})")
 
-        db.commit()
-        db.refresh(receipt)
+    return _processing_status(db, receipt_id)
 
-        logger.info(f"Receipt processed: {receipt.id}, {len(all_product_lines)} items from {len(receipt.images)} images")
 
-    except Exception as e:
-        logger.error(f"OCR processing failed for receipt {receipt_id}: {e}")
-        receipt.status = ReceiptStatus.ERROR
-        receipt.error_message = str(e)
-        db.commit()
-
-        error_logger.log_error(
-            e,
-            request=request,
-            user=current_user,
-            severity="error",
-            context={
-                "operation": "process_receipt_ocr",
-                "receipt_id": str(receipt_id)
-            }
+@router.get("/{receipt_id}/processing", response_model=ReceiptProcessingStatus)
+def get_receipt_processing(
+    receipt_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Current processing state of a receipt (for polling)."""
+    processing = _processing_status(db, receipt_id)
+    if not processing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Scontrino non trovato"
         )
+    return processing
 
+
+@router.get("/{receipt_id}/processing/stream")
+async def stream_receipt_processing(
+    receipt_id: UUID,
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Processing state as Server-Sent Events.
+
+    An event is sent whenever the state changes; the stream ends when
+    processing is finished. Uses its own sessions: the stream outlives the
+    request session.
+    """
+    first = await asyncio.to_thread(_poll_processing_status, receipt_id)
+    if not first:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Errore nell'elaborazione OCR: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Scontrino non trovato"
         )
 
-    return build_receipt_response(receipt)
+    async def events():
+        current, last_sent, idle = first, None, 0.0
+        while True:
+            payload = current.model_dump_json()
+            if payload != last_sent:
+                yield f"data: {payload}\n\n"
+                last_sent, idle = payload, 0.0
+            elif idle >= SSE_KEEPALIVE_SECONDS:
+                yield ": keep-alive\n\n"
+                idle = 0.0
+
+            if current.finished or await request.is_disconnected():
+                return
+
+            await asyncio.sleep(SSE_POLL_SECONDS)
+            idle += SSE_POLL_SECONDS
+            current = await asyncio.to_thread(_poll_processing_status, receipt_id)
+            if current is None:  # Receipt deleted meanwhile
+                return
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.post("/{receipt_id}/reconcile", response_model=ReconciliationResponse)
@@ -344,8 +421,10 @@ async def reconcile_receipt(
     """
     Reconcile receipt items with shopping list items.
 
-    Matches extracted items against the shopping list using fuzzy matching.
-    When LLM is configured, uses AI to interpret abbreviated item names.
+    Lines already confirmed on earlier receipts of the same store are
+    resolved from memory first. The other lines are matched against the
+    shopping list using fuzzy matching; when LLM is configured, uses AI to
+    interpret abbreviated item names.
     Returns match results and summary.
     """
     receipt = db.query(Receipt).filter(Receipt.id == receipt_id).first()
@@ -383,22 +462,36 @@ async def reconcile_receipt(
         )
 
     try:
+        # Lines confirmed on earlier receipts resolve without fuzzy matching or LLM
+        remembered = {}
+        known_matches = {}
+        known_names = {}
+        if shopping_list and shopping_list.house_id:
+            remembered = lookup_lines(db, shopping_list.house_id, shopping_list.store_id, receipt_items)
+            for receipt_item_id, entry in remembered.items():
+                column = find_remembered_item(entry, shopping_list_items)
+                if column is None:
+                    known_names[receipt_item_id] = entry.product_name
+                else:
+                    known_matches[receipt_item_id] = column
+            record_hits(db, [entry.id for entry in remembered.values()])
+            if remembered:
+                logger.info(f"Line memory: {len(remembered)}/{len(receipt_items)} lines known, {len(known_matches)} on the list")
+
+        unknown_items = [item for item in receipt_items if str(item.id) not in remembered]
+
         # Try to get LLM hints for better matching
         llm_hints = {}
-        if shopping_list and shopping_list.house_id:
+        if shopping_list and shopping_list.house_id and unknown_items:
             house = db.query(House).filter(House.id == shopping_list.house_id).first()
             if house and house.settings:
-                # Load LLM connections from house settings
-                manager = get_llm_manager()
-                manager.load_from_settings(house.settings)
-
-                # Get OCR client
-                ocr_client = manager.get_client_for_purpose(LLMPurpose.OCR)
+                # Get the house's OCR client
+                ocr_client = llm_clients.get_client(house.id, house.settings, LLMPurpose.OCR)
                 if ocr_client:
-                    # Prepare item names for LLM
+                    # Prepare item names for LLM (unknown lines only)
                     receipt_names = [
                         item.parsed_name or item.raw_text
-                        for item in receipt_items
+                        for item in unknown_items
                     ]
                     shopping_names = [item.name for item in shopping_list_items]
 
@@ -421,8 +514,16 @@ async def reconcile_receipt(
                     except Exception as e:
                         logger.warning(f"LLM matching failed, falling back to fuzzy: {e}")
 
-        # Run reconciliation with optional LLM hints
-        match_results = reconcile_receipt_items(receipt_items, shopping_list_items, llm_hints)
+        # Run reconciliation with optional LLM hints and the house/store synonyms
+        synonyms = get_synonym_engine(
+            db,
+            shopping_list.house_id if shopping_list else None,
+            shopping_list.store_id if shopping_list else None
+        )
+        match_results = reconcile_receipt_items(
+            receipt_items, shopping_list_items, llm_hints, synonyms,
+            known_matches=known_matches, known_names=known_names
+        )
 
         # Update receipt items with match results
         for result in match_results:
@@ -503,6 +604,84 @@ async def reconcile_receipt(
         )
 
 
+@router.get("/synonyms", response_model=list[ReceiptSynonymResponse])
+def get_receipt_synonyms(
+    house_id: UUID = Query(..., description="House ID"),
+    store_id: Optional[UUID] = Query(None, description="Include this store's entries"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Synonyms used to match receipt lines: global, house and (optionally) store entries.
+    """
+    if not verify_house_access(db, current_user.id, house_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Non hai accesso a questa casa"
+        )
+    return list_synonyms(db, house_id, store_id)
+
+
+@router.post("/synonyms", response_model=ReceiptSynonymResponse, status_code=status.HTTP_201_CREATED)
+def create_receipt_synonym(
+    data: ReceiptSynonymCreate,
+    house_id: UUID = Query(..., description="House ID"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Add a synonym for the house, or only for one of its stores (store_id).
+    """
+    if not verify_house_access(db, current_user.id, house_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Non hai accesso a questa casa"
+        )
+    if data.store_id:
+        store = db.query(Store.id).filter(Store.id == data.store_id, Store.house_id == house_id).first()
+        if not store:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Negozio non trovato"
+            )
+
+    entry = add_synonym(db, house_id, data.store_id, data.base, data.synonym)
+    if not entry:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Sinonimo non valido o già presente"
+        )
+    return entry
+
+
+@router.delete("/synonyms/{synonym_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_receipt_synonym(
+    synonym_id: UUID,
+    house_id: UUID = Query(..., description="House ID"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Delete a house or store synonym (global entries can't be deleted here).
+    """
+    if not verify_house_access(db, current_user.id, house_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Non hai accesso a questa casa"
+        )
+    entry = db.query(ReceiptSynonym).filter(
+        ReceiptSynonym.id == synonym_id,
+        ReceiptSynonym.house_id == house_id
+    ).first()
+    if not entry:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sinonimo non trovato"
+        )
+    db.delete(entry)
+    db.commit()
+
+
 @router.get("/{receipt_id}", response_model=ReceiptResponse)
 async def get_receipt(
     receipt_id: UUID,
@@ -590,6 +769,31 @@ async def update_receipt_item(
     for field, value in update_data.items():
         setattr(item, field, value)
 
+    # Remember lines the user confirmed or renamed for the next receipts of this
+    # house/store, forget lines the user un-matched. The review step saves every
+    # line's own text as user_corrected_name: that alone is not a confirmation.
+    if update_data.keys() & {"user_confirmed", "match_status", "shopping_list_item_id", "user_corrected_name"}:
+        matched = item.match_status == ReceiptItemMatchStatus.MATCHED and item.shopping_list_item_id
+        unmatched = bool(update_data.keys() & {"match_status", "shopping_list_item_id"}) and not matched
+        corrected = is_corrected(item)
+
+        shopping_item = None
+        if matched and (item.user_confirmed or corrected):
+            shopping_item = db.query(ShoppingListItem).filter(
+                ShoppingListItem.id == item.shopping_list_item_id
+            ).first()
+
+        if shopping_item or corrected or unmatched:
+            shopping_list = db.query(ShoppingList.house_id, ShoppingList.store_id).join(
+                Receipt, Receipt.shopping_list_id == ShoppingList.id
+            ).filter(Receipt.id == item.receipt_id).first()
+            if shopping_list and shopping_list.house_id:
+                if shopping_item or corrected:
+                    # Un-matched but renamed: overwrite with the name only
+                    remember_line(db, shopping_list.house_id, shopping_list.store_id, item, shopping_item)
+                else:
+                    forget_line(db, shopping_list.house_id, shopping_list.store_id, item)
+
     db.commit()
     db.refresh(item)
 
@@ -707,26 +911,15 @@ async def add_receipt_images(
     current_max_position = max([img.position for img in receipt.images], default=-1)
 
     # Save new files
-    ensure_receipts_dir()
-    saved_files = []
+    filenames, created_files = await _store_uploads(files)
 
     try:
-        for idx, file in enumerate(files):
-            position = current_max_position + 1 + idx
-            ext = file.filename.split('.')[-1] if file.filename else 'jpg'
-            filename = f"{receipt.id}_{position}.{ext}"
-
-            file_path = os.path.join(RECEIPTS_DIR, filename)
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            saved_files.append(file_path)
-
-            receipt_image = ReceiptImage(
+        for idx, filename in enumerate(filenames):
+            db.add(ReceiptImage(
                 receipt_id=receipt.id,
-                position=position,
+                position=current_max_position + 1 + idx,
                 image_path=filename
-            )
-            db.add(receipt_image)
+            ))
 
         db.commit()
         db.refresh(receipt)
@@ -734,16 +927,16 @@ async def add_receipt_images(
         logger.info(f"Added {len(files)} images to receipt {receipt_id}")
 
     except Exception as e:
-        for fp in saved_files:
-            if os.path.exists(fp):
-                os.remove(fp)
         db.rollback()
+        delete_unreferenced_images(db, created_files)
         logger.error(f"Failed to add receipt images: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Errore nel salvataggio delle immagini"
         )
 
+    await _ensure_uploads_stored(db, files, filenames)
+    _start_ocr_prefetch(db, receipt.id, filenames)
     return build_receipt_response(receipt)
 
 
@@ -763,34 +956,36 @@ async def delete_receipt_image(
             detail="Immagine non trovata"
         )
 
-    # Delete file
-    file_path = os.path.join(RECEIPTS_DIR, image.image_path)
-    if os.path.exists(file_path):
-        try:
-            os.remove(file_path)
-        except Exception as e:
-            logger.warning(f"Failed to delete image file: {e}")
-
+    image_path = image.image_path
     db.delete(image)
     db.commit()
 
+    # Files are shared by identical photos: keep them while still in use
+    delete_unreferenced_images(db, [image_path])
+
     logger.info(f"Receipt image deleted: {image_id}")
 
 
 @router.get("/images/file/{filename}")
-async def serve_receipt_image(filename: str):
+async def serve_receipt_image(request: Request, filename: str, variant: Optional[str] = None):
     """
     Serve a receipt image file.
+
+    variant: "thumb" or "preview" for the downscaled renditions, omitted for
+    the original. Supports ETag/Last-Modified revalidation and byte ranges.
     """
-    # Sanitize filename to prevent path traversal
-    safe_filename = os.path.basename(filename)
-    file_path = os.path.join(RECEIPTS_DIR, safe_filename)
-    if not os.path.exists(file_path):
+    if variant and variant not in RENDITIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Variante non valida: {variant}. Usa: {', '.join(RENDITIONS)}"
+        )
+    response = serve_image(request, filename, variant)
+    if response is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Immagine non trovata"
         )
-    return FileResponse(file_path, media_type="image/jpeg")
+    return response
 
 
 @router.delete("/{receipt_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -809,16 +1004,11 @@ async def delete_receipt(
             detail="Scontrino non trovato"
         )
 
-    # Delete all image files
-    for receipt_image in receipt.images:
-        image_path = os.path.join(RECEIPTS_DIR, receipt_image.image_path)
-        if os.path.exists(image_path):
-            try:
-                os.remove(image_path)
-            except Exception as e:
-                logger.warning(f"Failed to delete receipt image: {e}")
-
+    image_paths = [receipt_image.image_path for receipt_image in receipt.images]
     db.delete(receipt)
     db.commit()
 
+    # Files are shared by identical photos: keep them while still in use
+    delete_unreferenced_images(db, image_paths)
+
     logger.info(f"Receipt deleted: {receipt_id}")
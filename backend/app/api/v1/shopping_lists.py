@@ -7,10 +7,11 @@ CRUD operations for shopping lists with Grocy integration.
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from sqlalchemy import func, cast, Date, or_
+from sqlalchemy import func, cast, Date, or_, tuple_
 from typing import Optional
 from uuid import UUID
 from datetime import datetime, timezone
+import base64
 import re
 import logging
 
@@ -27,6 +28,8 @@ from app.models.store import Store
 from app.models.product_catalog import ProductCatalog
 from app.models.product_barcode import ProductBarcode
 from app.services.product_enrichment import enrich_product_background
+from app.services.store_order_service import get_store_order_map, item_order_keys, record_completed_list
+from app.services.known_barcode_service import get_known_barcodes_map
 
 
 def _get_product_by_barcode(db, barcode: str):
@@ -148,12 +151,30 @@ def create_shopping_list(
     return build_list_response(shopping_list)
 
 
+def _encode_list_cursor(created_at: datetime, list_id: UUID) -> str:
+    """Opaque keyset cursor for shopping list pagination."""
+    raw = f"{created_at.isoformat()}|{list_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_list_cursor(cursor: str) -> tuple:
+    try:
+        created_at, list_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), UUID(list_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursore di paginazione non valido"
+        )
+
+
 @router.get("", response_model=ShoppingListsResponse)
 def get_shopping_lists(
     house_id: UUID = Query(..., description="House ID"),
     status_filter: Optional[ShoppingListStatus] = Query(None, alias="status", description="Filter by status"),
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (replaces offset)"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -161,32 +182,49 @@ def get_shopping_lists(
     Get all shopping lists for a house.
 
     Returns a paginated list of shopping lists with item counts.
+    Counts, store name and total come from a single aggregate query.
+    Pass next_cursor back as cursor to get the following page (keyset
+    pagination on created_at, stable while lists are added).
     """
-    # Base query
-    query = db.query(ShoppingList).filter(ShoppingList.house_id == house_id)
-
-    # Apply status filter
+    filters = [ShoppingList.house_id == house_id]
     if status_filter:
-        query = query.filter(ShoppingList.status == status_filter)
-
-    # Get total count
-    total = query.count()
-
-    # Get lists with pagination
-    lists = query.order_by(ShoppingList.created_at.desc()).offset(offset).limit(limit).all()
-
-    # Build summaries with item counts
-    summaries = []
-    for lst in lists:
-        item_count = len(lst.items)
-        checked_count = sum(1 for item in lst.items if item.checked)
-        verified_count = sum(1 for item in lst.items if item.verified_at is not None)
-        not_purchased_count = sum(1 for item in lst.items if item.not_purchased)
-        summaries.append(ShoppingListSummary(
+        filters.append(ShoppingList.status == status_filter)
+
+    total_subq = db.query(func.count(ShoppingList.id)).filter(*filters).correlate(None).scalar_subquery()
+
+    query = db.query(
+        ShoppingList,
+        Store.name.label("store_name"),
+        func.count(ShoppingListItem.id).label("item_count"),
+        func.count(ShoppingListItem.id).filter(ShoppingListItem.checked == True).label("checked_count"),
+        func.count(ShoppingListItem.id).filter(ShoppingListItem.verified_at.isnot(None)).label("verified_count"),
+        func.count(ShoppingListItem.id).filter(ShoppingListItem.not_purchased == True).label("not_purchased_count"),
+        total_subq.label("total"),
+    ).outerjoin(
+        Store, Store.id == ShoppingList.store_id
+    ).outerjoin(
+        ShoppingListItem, ShoppingListItem.shopping_list_id == ShoppingList.id
+    ).filter(*filters)
+
+    if cursor:
+        cursor_created_at, cursor_id = _decode_list_cursor(cursor)
+        query = query.filter(
+            tuple_(ShoppingList.created_at, ShoppingList.id) < tuple_(cursor_created_at, cursor_id)
+        )
+
+    query = query.group_by(ShoppingList.id, Store.name).order_by(
+        ShoppingList.created_at.desc(), ShoppingList.id.desc()
+    )
+    if not cursor:
+        query = query.offset(offset)
+    rows = query.limit(limit).all()
+
+    summaries = [
+        ShoppingListSummary(
             id=lst.id,
             house_id=lst.house_id,
             store_id=lst.store_id,
-            store_name=lst.store.name if lst.store else None,
+            store_name=store_name,
             name=lst.name,
             status=lst.status,
             verification_status=lst.verification_status,
@@ -196,99 +234,29 @@ def get_shopping_lists(
             not_purchased_count=not_purchased_count,
             created_at=lst.created_at,
             updated_at=lst.updated_at
-        ))
+        )
+        for lst, store_name, item_count, checked_count, verified_count, not_purchased_count, _ in rows
+    ]
+
+    if rows:
+        total = rows[0].total
+    else:
+        total = db.query(func.count(ShoppingList.id)).filter(*filters).scalar() or 0
+
+    next_cursor = None
+    if len(rows) == limit:
+        last = rows[-1][0]
+        next_cursor = _encode_list_cursor(last.created_at, last.id)
 
     return ShoppingListsResponse(
         lists=summaries,
         total=total,
         limit=limit,
-        offset=offset
+        offset=offset,
+        next_cursor=next_cursor
     )
 
 
-def get_store_order_map(db: Session, store_id: Optional[UUID], exclude_list_id: UUID) -> dict:
-    """
-    Build a map of item name -> order index based on check order from previous completed lists.
-    Uses the most recent completed list's check order for a specific store.
-    Store ordering is shared across ALL houses that shop at the same store.
-    """
-    if not store_id:
-        return {}
-
-    # Find the most recent completed list for this store (across all houses)
-    last_completed = db.query(ShoppingList).filter(
-        ShoppingList.store_id == store_id,
-        ShoppingList.status == ShoppingListStatus.COMPLETED,
-        ShoppingList.id != exclude_list_id
-    ).order_by(ShoppingList.updated_at.desc()).first()
-
-    if not last_completed:
-        return {}
-
-    # Get items sorted by checked_at (the order they were checked in store)
-    items = db.query(ShoppingListItem).filter(
-        ShoppingListItem.shopping_list_id == last_completed.id,
-        ShoppingListItem.checked == True,
-        ShoppingListItem.checked_at.isnot(None)
-    ).order_by(ShoppingListItem.checked_at).all()
-
-    # Build order map: item name (lowercase) -> order index
-    order_map = {}
-    for idx, item in enumerate(items):
-        name_key = item.name.lower().strip()
-        if name_key not in order_map:
-            order_map[name_key] = idx
-        # Also map by grocy_product_id if available
-        if item.grocy_product_id:
-            order_map[f"grocy:{item.grocy_product_id}"] = idx
-
-    return order_map
-
-
-def get_known_barcodes_map(db: Session, house_id: UUID, exclude_list_id: UUID) -> dict:
-    """Trova i barcode noti dagli item verificati in liste completate precedenti e dal catalogo prodotti."""
-    # 1. Barcode da liste completate della stessa casa
-    items = db.query(ShoppingListItem).join(ShoppingList).filter(
-        ShoppingList.house_id == house_id,
-        ShoppingList.status == ShoppingListStatus.COMPLETED,
-        ShoppingList.id != exclude_list_id,
-        ShoppingListItem.scanned_barcode.isnot(None),
-        ShoppingListItem.scanned_barcode != '',
-    ).order_by(ShoppingListItem.checked_at.desc()).all()
-
-    barcode_map = {}
-    for item in items:
-        name_key = item.name.lower().strip()
-        if name_key not in barcode_map:
-            barcode_map[name_key] = item.scanned_barcode
-        if item.grocy_product_id:
-            gkey = f"grocy:{item.grocy_product_id}"
-            if gkey not in barcode_map:
-                barcode_map[gkey] = item.scanned_barcode
-
-    # 2. Fallback: barcode dal catalogo prodotti (della casa + template globali)
-    catalog_results = db.query(ProductCatalog, ProductBarcode.barcode).outerjoin(
-        ProductBarcode,
-        (ProductCatalog.id == ProductBarcode.product_id) & (ProductBarcode.is_primary == True)
-    ).filter(
-        or_(
-            ProductCatalog.house_id == house_id,
-            ProductCatalog.house_id.is_(None),
-        ),
-        ProductCatalog.cancelled == False,
-        ProductCatalog.name.isnot(None),
-        ProductCatalog.name != '',
-    ).all()
-    for p, pb_barcode in catalog_results:
-        bc = pb_barcode or p.barcode  # prefer product_barcodes, fall back to legacy
-        if bc:
-            name_key = p.name.lower().strip()
-            if name_key not in barcode_map:
-                barcode_map[name_key] = bc
-
-    return barcode_map
-
-
 @router.get("/{list_id}", response_model=ShoppingListResponse)
 def get_shopping_list(
     list_id: UUID,
@@ -307,23 +275,27 @@ def get_shopping_list(
             detail="Lista della spesa non trovata"
         )
 
-    # Get store order from previous lists (uses store_id for shared ordering across houses)
-    order_map = get_store_order_map(db, shopping_list.store_id, list_id)
+    # Get learned store order for the items on this list (shared across houses)
+    item_keys = {
+        item.id: item_order_keys(item.name, item.grocy_product_id)
+        for item in shopping_list.items
+    }
+    order_map = get_store_order_map(
+        db, shopping_list.store_id, (key for keys in item_keys.values() for key in keys)
+    )
+
+    def get_store_position(item):
+        # Grocy product id first, then name match
+        for key in item_keys[item.id]:
+            if key in order_map:
+                return order_map[key]
+        return None
 
     if order_map:
-        # Sort items based on store order
+        # Sort items based on store order; unknown items go to the end, sorted by position
         def get_sort_key(item):
-            # First try grocy product id
-            if item.grocy_product_id:
-                key = f"grocy:{item.grocy_product_id}"
-                if key in order_map:
-                    return (0, order_map[key])
-            # Then try name match
-            name_key = item.name.lower().strip()
-            if name_key in order_map:
-                return (0, order_map[name_key])
-            # Unknown items go to the end, sorted by position
-            return (1, item.position)
+            pos = get_store_position(item)
+            return (0, pos, item.position) if pos is not None else (1, 0, item.position)
 
         shopping_list.items = sorted(shopping_list.items, key=get_sort_key)
 
@@ -331,16 +303,7 @@ def get_shopping_list(
     picking_num = 1
     item_picking_positions = {}
     for item in shopping_list.items:
-        pos = None
-        if item.grocy_product_id:
-            key = f"grocy:{item.grocy_product_id}"
-            if key in order_map:
-                pos = order_map[key]
-        if pos is None:
-            name_key = item.name.lower().strip()
-            if name_key in order_map:
-                pos = order_map[name_key]
-        if pos is not None:
+        if get_store_position(item) is not None:
             item_picking_positions[item.id] = picking_num
             picking_num += 1
         else:
@@ -353,16 +316,17 @@ def get_shopping_list(
         item_resp.store_picking_position = item_picking_positions.get(item.id)
         item_responses.append(item_resp)
 
-    # Auto-fill catalog_barcode from previous completed lists
-    barcode_map = get_known_barcodes_map(db, shopping_list.house_id, list_id)
-    for item_resp in item_responses:
-        if not item_resp.scanned_barcode:  # solo se non ha già un barcode
-            bc = None
-            if item_resp.grocy_product_id:
-                bc = barcode_map.get(f"grocy:{item_resp.grocy_product_id}")
-            if not bc:
-                bc = barcode_map.get(item_resp.name.lower().strip())
-            item_resp.catalog_barcode = bc
+    # Auto-fill catalog_barcode from barcodes verified before and from the catalog
+    items_without_barcode = [r for r in item_responses if not r.scanned_barcode]  # solo se non ha già un barcode
+    barcode_map = get_known_barcodes_map(
+        db, shopping_list.house_id,
+        (key for r in items_without_barcode for key in item_order_keys(r.name, r.grocy_product_id))
+    )
+    for item_resp in items_without_barcode:
+        item_resp.catalog_barcode = next(
+            (barcode_map[key] for key in item_order_keys(item_resp.name, item_resp.grocy_product_id) if key in barcode_map),
+            None
+        )
 
     # Populate product_notes from product_catalog
     # Step 1: Match by barcode
@@ -450,6 +414,7 @@ def update_shopping_list(
 
     # Log verification status changes
     old_verification_status = shopping_list.verification_status
+    old_status = shopping_list.status
 
     if data.name is not None:
         shopping_list.name = data.name
@@ -461,6 +426,10 @@ def update_shopping_list(
         shopping_list.verification_status = data.verification_status
 
     try:
+        # Learn the store's picking order from the completed trip
+        if shopping_list.status == ShoppingListStatus.COMPLETED and old_status != ShoppingListStatus.COMPLETED:
+            record_completed_list(db, shopping_list)
+
         db.commit()
         db.refresh(shopping_list)
 
@@ -32,6 +32,47 @@ class Settings(BaseSettings):
     GROCY_URL: str = ""  # Grocy instance URL (optional, for inventory integration)
     GROCY_API_KEY: str = ""  # Grocy API key (optional)
 
+    # Outbound HTTP client pool (Grocy, Open*Facts, OCR service)
+    HTTP_TIMEOUT: float = 10.0  # Default request timeout in seconds
+    HTTP_MAX_CONNECTIONS: int = 20  # Max open connections per host
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10  # Idle connections kept per host
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0  # Seconds before an idle connection is closed
+    HTTP2_ENABLED: bool = True  # Use HTTP/2 when the h2 package is installed
+
+    # Barcode lookup cache
+    BARCODE_CACHE_TTL_DAYS: int = 30  # How long a found product is served from cache
+    BARCODE_CACHE_NEGATIVE_TTL_HOURS: int = 24  # How long "not found" is remembered
+    BARCODE_CACHE_LRU_SIZE: int = 5000  # In-process entries kept on top of the DB table
+    BARCODE_CACHE_SYNC_SECONDS: float = 5.0  # How often a worker checks for purges made by other workers
+
+    # Barcode lookup chain
+    BARCODE_LOOKUP_STRATEGY: str = "sequential"  # "sequential" or "race" (query all sources at once)
+    BARCODE_SOURCE_TIMEOUT: float = 8.0  # Time budget per source in seconds
+    BARCODE_BREAKER_FAILURE_THRESHOLD: int = 3  # Consecutive failures before a source is skipped
+    BARCODE_BREAKER_COOLDOWN_SECONDS: int = 120  # How long a failing source is skipped
+    BARCODE_BATCH_CONCURRENCY: int = 8  # Parallel lookups in batch enrichment
+
+    # Background job engine (product enrichment, ...)
+    JOB_WORKER_CONCURRENCY: int = 4  # Jobs processed at the same time per API process
+    JOB_POLL_INTERVAL_SECONDS: float = 2.0  # How often idle workers look for new jobs
+    JOB_LEASE_SECONDS: int = 600  # A running job without a heartbeat for this long is considered abandoned
+
+    # LLM client pool
+    LLM_MAX_CONCURRENT_REQUESTS: int = 4  # Requests in flight per LLM connection, the rest wait
+    LLM_CLIENT_IDLE_SECONDS: float = 300.0  # Unused LLM clients are closed after this long
+
+    # LLM response cache
+    LLM_CACHE_ENABLED: bool = True  # Reuse responses to identical prompts
+    LLM_CACHE_PURPOSES: str = "ocr,suggestions,general"  # Comma-separated purposes that are cached
+    LLM_CACHE_MAX_TEMPERATURE: float = 0.3  # Calls sampled above this are never cached
+    LLM_CACHE_TTL_HOURS: int = 168  # How long a response is reused
+    LLM_CACHE_MAX_ENTRIES: int = 5000  # DB rows kept, least recently used are pruned
+    LLM_CACHE_LRU_SIZE: int = 500  # In-process entries kept on top of the DB table
+
+    # Receipt uploads
+    RECEIPT_MAX_IMAGE_MB: int = 15  # Max size of a single receipt photo
+    RECEIPT_OCR_PREFETCH: bool = True  # Start OCR in the background as soon as photos are uploaded
+
     # MQTT Configuration (Future Phase 2)
     MQTT_BROKER: str = ""  # MQTT broker host (optional)
     MQTT_PORT: int = 1883  # MQTT broker port (default: 1883)
@@ -0,0 +1,222 @@
+"""
+Versioned Schema Migrations
+Ordered, run-once migrations tracked in a `schema_migrations` ledger table.
+
+Every module in `app.db.migrations.versions` is a migration. Modules are
+applied in filename order (`0001_...`, `0002_...`) and each one must define:
+
+    def upgrade(engine: Engine) -> None
+
+The runner records every applied version in the ledger, so a migration runs
+exactly once per database. Data backfills that used to run on every boot
+live here and never run again after they finish.
+
+Concurrency:
+    Several uvicorn workers start at the same time. On PostgreSQL the runner
+    takes a session-level advisory lock before applying anything, so only one
+    process migrates while the others wait and then find nothing left to do.
+
+Fast path:
+    An up-to-date database costs a single `SELECT version FROM schema_migrations`
+    and no lock, no inspection and no backfill queries.
+
+Adding a migration:
+    Create `versions/NNNN_short_name.py` with the next free number.
+    New tables: `Model.__table__.create(engine, checkfirst=True)`.
+    New columns: `add_missing_columns(engine, ["table_name"])`.
+"""
+
+import importlib
+import pkgutil
+from contextlib import contextmanager
+from typing import Callable, Iterable, List, NamedTuple, Optional, Set
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.db.base import Base
+
+
+# Arbitrary but fixed key for pg_advisory_lock (shared by all workers)
+MIGRATION_LOCK_KEY = 7271830
+
+# Ledger table lives outside Base.metadata: it is managed by the runner only
+_ledger_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _ledger_metadata,
+    Column("version", String(32), primary_key=True),
+    Column("name", String(255), nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now(), nullable=False),
+)
+
+
+class Migration(NamedTuple):
+    """A single migration discovered in the versions package."""
+    version: str
+    name: str
+    upgrade: Callable[[Engine], None]
+
+
+def discover_migrations() -> List[Migration]:
+    """
+    Load all migration modules from app.db.migrations.versions.
+
+    Module names are `NNNN_description`; the numeric prefix is the version.
+
+    Returns:
+        Migrations sorted by version
+    """
+    from app.db.migrations import versions
+
+    migrations = []
+    for module_info in pkgutil.iter_modules(versions.__path__):
+        version, _, name = module_info.name.partition("_")
+        if not version.isdigit():
+            continue
+        module = importlib.import_module(f"{versions.__name__}.{module_info.name}")
+        migrations.append(Migration(version=version, name=name, upgrade=module.upgrade))
+
+    migrations.sort(key=lambda m: m.version)
+    return migrations
+
+
+def _applied_versions(engine: Engine) -> Optional[Set[str]]:
+    """
+    Read applied versions from the ledger.
+
+    Returns:
+        Set of applied versions, or None if the ledger table does not exist yet
+    """
+    try:
+        with engine.connect() as conn:
+            return {row[0] for row in conn.execute(select(schema_migrations.c.version))}
+    except SQLAlchemyError:
+        return None
+
+
+@contextmanager
+def _migration_lock(engine: Engine):
+    """
+    Hold a PostgreSQL advisory lock for the duration of the block.
+
+    Other dialects (e.g. SQLite in local experiments) have no advisory locks
+    and run without one.
+    """
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        conn.commit()
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            conn.commit()
+
+
+def run_migrations(engine: Engine) -> List[str]:
+    """
+    Apply all pending migrations.
+
+    Args:
+        engine: SQLAlchemy engine
+
+    Returns:
+        List of versions applied by this process (empty if already up to date)
+    """
+    migrations = discover_migrations()
+    known = {m.version for m in migrations}
+
+    # Fast path: one query, no lock
+    applied = _applied_versions(engine)
+    if applied is not None and known <= applied:
+        return []
+
+    newly_applied = []
+    with _migration_lock(engine):
+        _ledger_metadata.create_all(bind=engine)
+
+        # Another worker may have finished while we waited for the lock
+        applied = _applied_versions(engine) or set()
+
+        for migration in migrations:
+            if migration.version in applied:
+                continue
+
+            print(f"  → Applying migration {migration.version}_{migration.name}")
+            migration.upgrade(engine)
+
+            with engine.begin() as conn:
+                conn.execute(schema_migrations.insert().values(
+                    version=migration.version,
+                    name=migration.name,
+                ))
+            newly_applied.append(migration.version)
+
+    return newly_applied
+
+
+def add_missing_columns(engine: Engine, table_names: Optional[Iterable[str]] = None) -> int:
+    """
+    Add columns declared on models but missing from existing tables.
+
+    Used by migrations that add columns to existing models. NOT NULL columns
+    with a default are added nullable, backfilled, then set NOT NULL.
+
+    Args:
+        engine: SQLAlchemy engine
+        table_names: Tables to check (default: every table in Base.metadata)
+
+    Returns:
+        Number of columns added
+    """
+    inspector = inspect(engine)
+    if table_names is None:
+        tables = list(Base.metadata.tables.values())
+    else:
+        tables = [Base.metadata.tables[name] for name in table_names]
+
+    added = 0
+    for table in tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing_columns = {col['name'] for col in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+
+            col_type = column.type.compile(engine.dialect)
+            # Determine default value
+            default_val = None
+            if column.server_default is not None:
+                default_val = column.server_default.arg
+            elif column.default is not None and column.default.is_scalar:
+                # Use Python-level default
+                val = column.default.arg
+                if isinstance(val, bool):
+                    default_val = "TRUE" if val else "FALSE"
+                elif isinstance(val, (int, float)):
+                    default_val = str(val)
+                elif isinstance(val, str):
+                    default_val = f"'{val}'"
+
+            with engine.begin() as conn:
+                if not column.nullable and default_val is not None:
+                    # For NOT NULL columns, add as NULL first then alter
+                    conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {col_type} NULL DEFAULT {default_val}'))
+                    conn.execute(text(f'UPDATE "{table.name}" SET "{column.name}" = {default_val} WHERE "{column.name}" IS NULL'))
+                    conn.execute(text(f'ALTER TABLE "{table.name}" ALTER COLUMN "{column.name}" SET NOT NULL'))
+                else:
+                    # Nullable, or NOT NULL without any default - add as NULL to avoid crash
+                    conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {col_type} NULL'))
+
+            print(f"  + Added column {table.name}.{column.name}")
+            added += 1
+
+    return added
@@ -0,0 +1,108 @@
+"""
+Baseline schema.
+
+Creates all model tables, renames the legacy environments table to areas,
+adds columns introduced before versioned migrations existed and applies
+the one-off schema fixes that used to run on every startup.
+"""
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from app.db.base import Base
+from app.db.migrations import add_missing_columns
+
+
+def _rename_environments_to_areas(engine: Engine) -> None:
+    """Rename environments → areas (table, type column and enum type)."""
+    inspector = inspect(engine)
+    try:
+        if inspector.has_table("environments") and not inspector.has_table("areas"):
+            existing_cols = {c['name'] for c in inspector.get_columns("environments")}
+            with engine.begin() as conn:
+                conn.execute(text('ALTER TABLE environments RENAME TO areas'))
+                # Rename env_type → area_type
+                if 'env_type' in existing_cols:
+                    conn.execute(text('ALTER TABLE areas RENAME COLUMN env_type TO area_type'))
+                # Rename enum type
+                conn.execute(text("DO $$ BEGIN IF EXISTS (SELECT 1 FROM pg_type WHERE typname = 'environmenttype') THEN ALTER TYPE environmenttype RENAME TO areatype; END IF; END $$"))
+            print("✓ Renamed table environments → areas")
+        elif inspector.has_table("areas"):
+            # Table already renamed, check column
+            area_cols = {c['name'] for c in inspector.get_columns("areas")}
+            if 'env_type' in area_cols:
+                with engine.begin() as conn:
+                    conn.execute(text('ALTER TABLE areas RENAME COLUMN env_type TO area_type'))
+                print("✓ Renamed column areas.env_type → area_type")
+    except Exception as e:
+        print(f"  ⚠ environments→areas rename skipped: {e}")
+
+    # Rename environment_id → area_id in referencing tables
+    for tbl, old_col, new_col in [
+        ("dispensa_items", "environment_id", "area_id"),
+        ("categories", "default_environment_id", "default_area_id"),
+        ("product_category_tags", "default_environment_id", "default_area_id"),
+    ]:
+        try:
+            if inspector.has_table(tbl):
+                cols = {c['name'] for c in inspector.get_columns(tbl)}
+                if old_col in cols and new_col not in cols:
+                    with engine.begin() as conn:
+                        conn.execute(text(f'ALTER TABLE {tbl} RENAME COLUMN {old_col} TO {new_col}'))
+                    print(f"✓ Renamed {tbl}.{old_col} → {new_col}")
+        except Exception as e:
+            print(f"  ⚠ {tbl} column rename skipped: {e}")
+
+
+def _point_area_foreign_keys_to_areas(engine: Engine) -> None:
+    """Update FK constraints that still reference the old environments table."""
+    inspector = inspect(engine)
+    for tbl, col in [
+        ("dispensa_items", "area_id"),
+        ("categories", "default_area_id"),
+        ("product_category_tags", "default_area_id"),
+    ]:
+        try:
+            if inspector.has_table(tbl):
+                cols = {c['name'] for c in inspector.get_columns(tbl)}
+                if col in cols:
+                    for fk in inspector.get_foreign_keys(tbl):
+                        if col in fk.get('constrained_columns', []) and fk.get('referred_table') == 'environments':
+                            fk_name = fk.get('name')
+                            if fk_name:
+                                with engine.begin() as conn:
+                                    conn.execute(text(f'ALTER TABLE {tbl} DROP CONSTRAINT {fk_name}'))
+                                    conn.execute(text(f'ALTER TABLE {tbl} ADD CONSTRAINT {fk_name} FOREIGN KEY ({col}) REFERENCES areas(id) ON DELETE SET NULL'))
+                                print(f"✓ Updated FK {tbl}.{col} → areas")
+        except Exception as e:
+            print(f"  ⚠ FK update for {tbl}.{col} skipped: {e}")
+
+
+def _make_catalog_barcode_nullable(engine: Engine) -> None:
+    """product_catalog.barcode is legacy: barcodes now live in product_barcodes."""
+    try:
+        col_info = inspect(engine).get_columns("product_catalog")
+        bc_col = next((c for c in col_info if c['name'] == 'barcode'), None)
+        if bc_col and not bc_col.get('nullable', True):
+            with engine.begin() as conn:
+                conn.execute(text('ALTER TABLE product_catalog ALTER COLUMN barcode DROP NOT NULL'))
+            print("✓ product_catalog.barcode made nullable")
+    except Exception as e:
+        print(f"  ⚠ barcode nullable migration skipped: {e}")
+
+
+def upgrade(engine: Engine) -> None:
+    import app.models  # noqa: F401 - register all models on Base.metadata
+
+    _rename_environments_to_areas(engine)
+
+    # Only creates tables that don't already exist
+    Base.metadata.create_all(bind=engine)
+    print("✓ Database tables created/verified")
+
+    added = add_missing_columns(engine)
+    if added:
+        print(f"✓ Auto-migration: {added} columns added")
+
+    _make_catalog_barcode_nullable(engine)
+    _point_area_foreign_keys_to_areas(engine)
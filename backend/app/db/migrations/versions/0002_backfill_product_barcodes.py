@@ -0,0 +1,38 @@
+"""
+Copy legacy product_catalog.barcode values into product_barcodes.
+"""
+
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models.product_catalog import ProductCatalog
+from app.models.product_barcode import ProductBarcode
+
+
+def upgrade(engine: Engine) -> None:
+    with Session(bind=engine) as db:
+        existing = set(db.scalars(select(ProductBarcode.barcode)))
+
+        products = db.query(ProductCatalog).filter(
+            ProductCatalog.barcode.isnot(None),
+            ProductCatalog.barcode != ''
+        ).all()
+
+        migrated = 0
+        for p in products:
+            if p.barcode in existing:
+                continue
+            db.add(ProductBarcode(
+                product_id=p.id,
+                barcode=p.barcode,
+                is_primary=True,
+                source=p.source
+            ))
+            existing.add(p.barcode)
+            migrated += 1
+
+        db.commit()
+
+    if migrated:
+        print(f"✓ Migrated {migrated} barcodes to product_barcodes")
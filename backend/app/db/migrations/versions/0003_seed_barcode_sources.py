@@ -0,0 +1,14 @@
+"""
+Seed the hardcoded barcode lookup sources (Open Food/Products/Beauty Facts).
+"""
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.services.barcode_source_service import seed_hardcoded_sources
+
+
+def upgrade(engine: Engine) -> None:
+    with Session(bind=engine) as db:
+        seed_hardcoded_sources(db)
+    print("✓ Barcode lookup sources seeded")
@@ -0,0 +1,40 @@
+"""
+Backfill default areas.
+
+- Enable expiry extension on default Congelatore areas
+- Seed default areas for houses created before areas existed and assign
+  their orphaned pantry items to the default Dispensa area
+
+New houses get their default areas in HouseService.create_house.
+"""
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models.area import Area
+from app.models.house import House
+from app.services.area_service import AreaService
+
+
+def upgrade(engine: Engine) -> None:
+    with Session(bind=engine) as db:
+        updated = db.query(Area).filter(
+            Area.name == "Congelatore",
+            Area.is_default == True,
+            Area.expiry_extension_enabled == False,
+        ).update({"expiry_extension_enabled": True})
+        if updated:
+            print(f"✓ Backfill: {updated} Congelatore area(s) updated with expiry_extension_enabled=True")
+
+        houses_without_areas = db.query(House).filter(
+            ~House.id.in_(
+                db.query(Area.house_id).distinct()
+            )
+        ).all()
+        for house in houses_without_areas:
+            area_count = AreaService.seed_defaults(db, house.id)
+            orphan_count = AreaService.assign_orphaned_items(db, house.id)
+            if area_count or orphan_count:
+                print(f"  + House '{house.name}': {area_count} areas seeded, {orphan_count} orphaned items assigned")
+
+        db.commit()
@@ -0,0 +1,49 @@
+"""
+Extract product_catalog.brand text into Brand entities and link products.
+"""
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models.brand import Brand
+from app.models.product_catalog import ProductCatalog
+
+
+def upgrade(engine: Engine) -> None:
+    with Session(bind=engine) as db:
+        brand_map = {name.lower(): brand_id for brand_id, name in db.query(Brand.id, Brand.name)}
+
+        # Create a Brand for every distinct brand text not yet known
+        brand_rows = db.query(ProductCatalog.brand).filter(
+            ProductCatalog.brand.isnot(None),
+            ProductCatalog.brand != '',
+        ).distinct().all()
+
+        created = 0
+        for (brand_name,) in brand_rows:
+            normalized = brand_name.strip()
+            if not normalized or normalized.lower() in brand_map:
+                continue
+            brand = Brand(name=normalized)
+            db.add(brand)
+            db.flush()
+            brand_map[normalized.lower()] = brand.id
+            created += 1
+
+        # Link products: set brand_id where brand text exists but brand_id is NULL
+        linked = 0
+        products_to_link = db.query(ProductCatalog).filter(
+            ProductCatalog.brand.isnot(None),
+            ProductCatalog.brand != '',
+            ProductCatalog.brand_id.is_(None),
+        ).all()
+        for p in products_to_link:
+            bid = brand_map.get(p.brand.strip().lower())
+            if bid:
+                p.brand_id = bid
+                linked += 1
+
+        db.commit()
+
+    if created or linked:
+        print(f"✓ Brand migration: {created} brands created, {linked} products linked")
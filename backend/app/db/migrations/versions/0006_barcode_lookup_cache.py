@@ -0,0 +1,11 @@
+"""
+Create the barcode_lookup_cache table.
+"""
+
+from sqlalchemy.engine import Engine
+
+from app.models.barcode_lookup_cache import BarcodeLookupCache
+
+
+def upgrade(engine: Engine) -> None:
+    BarcodeLookupCache.__table__.create(engine, checkfirst=True)
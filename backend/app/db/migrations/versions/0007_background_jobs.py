@@ -0,0 +1,11 @@
+"""
+Create the background_jobs table (durable job queue).
+"""
+
+from sqlalchemy.engine import Engine
+
+from app.models.background_job import BackgroundJob
+
+
+def upgrade(engine: Engine) -> None:
+    BackgroundJob.__table__.create(engine, checkfirst=True)
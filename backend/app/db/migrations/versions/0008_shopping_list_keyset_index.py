@@ -0,0 +1,13 @@
+"""
+Add the (house_id, created_at, id) index used by shopping list pagination.
+"""
+
+from sqlalchemy.engine import Engine
+
+from app.models.shopping_list import ShoppingList
+
+
+def upgrade(engine: Engine) -> None:
+    for index in ShoppingList.__table__.indexes:
+        if index.name == "idx_shopping_lists_house_created":
+            index.create(engine, checkfirst=True)
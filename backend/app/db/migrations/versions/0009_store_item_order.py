@@ -0,0 +1,34 @@
+"""
+Create store_item_order and backfill it from completed shopping lists.
+
+Lists are merged oldest first, the same way they are merged when completed.
+"""
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models.shopping_list import ShoppingList, ShoppingListStatus
+from app.models.store_item_order import StoreItemOrder
+from app.models.store_order_merged_list import StoreOrderMergedList
+from app.services.store_order_service import record_completed_list
+
+
+def upgrade(engine: Engine) -> None:
+    StoreItemOrder.__table__.create(engine, checkfirst=True)
+    # Written by record_completed_list (otherwise created by 0020)
+    StoreOrderMergedList.__table__.create(engine, checkfirst=True)
+
+    with Session(bind=engine) as db:
+        completed = db.query(ShoppingList).filter(
+            ShoppingList.store_id.isnot(None),
+            ShoppingList.status == ShoppingListStatus.COMPLETED
+        ).order_by(ShoppingList.updated_at).all()
+
+        merged = 0
+        for shopping_list in completed:
+            if record_completed_list(db, shopping_list):
+                merged += 1
+        db.commit()
+
+        if merged:
+            print(f"✓ Backfill: store order learned from {merged} completed lists")
@@ -0,0 +1,74 @@
+"""
+Create the known_barcodes index and backfill it.
+
+- "scan" rows from verified shopping list items (latest verification wins)
+- "catalog" rows from the primary barcode of every active catalog product
+
+From here on the index is maintained by known_barcode_service.
+"""
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models.known_barcode import KnownBarcode
+from app.models.product_barcode import ProductBarcode
+from app.models.product_catalog import ProductCatalog
+from app.models.shopping_list import ShoppingList, ShoppingListItem
+from app.services.known_barcode_service import (
+    SOURCE_SCAN,
+    index_catalog_products,
+    upsert_known_barcodes,
+)
+from app.services.store_order_service import item_order_keys
+
+CHUNK = 1000
+
+
+def upgrade(engine: Engine) -> None:
+    KnownBarcode.__table__.create(engine, checkfirst=True)
+
+    with Session(bind=engine) as db:
+        scanned = db.query(
+            ShoppingList.house_id,
+            ShoppingListItem.name,
+            ShoppingListItem.grocy_product_id,
+            ShoppingListItem.scanned_barcode,
+        ).join(
+            ShoppingList, ShoppingList.id == ShoppingListItem.shopping_list_id
+        ).filter(
+            ShoppingListItem.scanned_barcode.isnot(None),
+            ShoppingListItem.scanned_barcode != '',
+            ShoppingListItem.verified_at.isnot(None),
+        ).order_by(ShoppingListItem.verified_at).all()
+
+        scan_rows = [
+            {"house_id": house_id, "item_key": key, "source": SOURCE_SCAN, "barcode": barcode}
+            for house_id, name, grocy_product_id, barcode in scanned
+            for key in item_order_keys(name, grocy_product_id)
+        ]
+        # Oldest first in the list: later verifications overwrite earlier ones
+        for start in range(0, len(scan_rows), CHUNK):
+            upsert_known_barcodes(db.connection(), scan_rows[start:start + CHUNK])
+
+        products = db.query(
+            ProductCatalog.house_id, ProductCatalog.name, ProductBarcode.barcode, ProductCatalog.barcode
+        ).outerjoin(
+            ProductBarcode,
+            (ProductCatalog.id == ProductBarcode.product_id) & (ProductBarcode.is_primary == True)
+        ).filter(
+            ProductCatalog.cancelled == False,
+            ProductCatalog.name.isnot(None),
+            ProductCatalog.name != '',
+        ).all()
+
+        catalog_rows = [
+            {"house_id": house_id, "name": name, "barcode": pb_barcode or legacy_barcode}
+            for house_id, name, pb_barcode, legacy_barcode in products
+        ]
+        for start in range(0, len(catalog_rows), CHUNK):
+            index_catalog_products(db.connection(), catalog_rows[start:start + CHUNK])
+
+        db.commit()
+
+        if scan_rows or catalog_rows:
+            print(f"✓ Backfill: known barcodes indexed from {len(scanned)} scans and {len(catalog_rows)} products")
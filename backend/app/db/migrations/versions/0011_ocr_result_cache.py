@@ -0,0 +1,11 @@
+"""
+Create the ocr_result_cache table.
+"""
+
+from sqlalchemy.engine import Engine
+
+from app.models.ocr_result_cache import OCRResultCache
+
+
+def upgrade(engine: Engine) -> None:
+    OCRResultCache.__table__.create(engine, checkfirst=True)
@@ -0,0 +1,19 @@
+"""
+Create receipt_synonyms and seed the global dictionary with the built-in
+Italian synonyms.
+"""
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models.receipt_synonym import ReceiptSynonym
+from app.services.receipt_synonym_service import seed_builtin_synonyms
+
+
+def upgrade(engine: Engine) -> None:
+    ReceiptSynonym.__table__.create(engine, checkfirst=True)
+
+    with Session(bind=engine) as db:
+        seeded = seed_builtin_synonyms(db)
+    if seeded:
+        print(f"✓ Receipt synonyms seeded: {seeded} entries")
@@ -0,0 +1,11 @@
+"""
+Create the receipt_line_memory table.
+"""
+
+from sqlalchemy.engine import Engine
+
+from app.models.receipt_line_memory import ReceiptLineMemory
+
+
+def upgrade(engine: Engine) -> None:
+    ReceiptLineMemory.__table__.create(engine, checkfirst=True)
@@ -0,0 +1,11 @@
+"""
+Create the llm_response_cache table.
+"""
+
+from sqlalchemy.engine import Engine
+
+from app.models.llm_response_cache import LLMResponseCache
+
+
+def upgrade(engine: Engine) -> None:
+    LLMResponseCache.__table__.create(engine, checkfirst=True)
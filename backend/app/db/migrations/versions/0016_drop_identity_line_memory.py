@@ -0,0 +1,31 @@
+"""
+Drop receipt line memory entries that map a line to its own text.
+
+The receipt review step saves every line's text as user_corrected_name, and
+those saves were stored as memories. They marked every line as known, so
+the lines never got LLM hints again.
+"""
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models.receipt_line_memory import ReceiptLineMemory
+from app.services.receipt_reconciliation import normalize_text
+
+
+def upgrade(engine: Engine) -> None:
+    with Session(bind=engine) as db:
+        identity_ids = [
+            entry_id
+            for entry_id, key, product_name in db.query(
+                ReceiptLineMemory.id, ReceiptLineMemory.line_key, ReceiptLineMemory.product_name
+            ).filter(ReceiptLineMemory.grocy_product_id.is_(None))
+            if normalize_text(product_name) == key
+        ]
+        if identity_ids:
+            db.query(ReceiptLineMemory).filter(
+                ReceiptLineMemory.id.in_(identity_ids)
+            ).delete(synchronize_session=False)
+            db.commit()
+    if identity_ids:
+        print(f"✓ Receipt line memory: dropped {len(identity_ids)} identity entries")
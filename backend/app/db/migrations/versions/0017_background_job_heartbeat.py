@@ -0,0 +1,11 @@
+"""
+Add background_jobs.heartbeat_at (lease renewed while a handler runs).
+"""
+
+from sqlalchemy.engine import Engine
+
+from app.db.migrations import add_missing_columns
+
+
+def upgrade(engine: Engine) -> None:
+    add_missing_columns(engine, ["background_jobs"])
@@ -0,0 +1,11 @@
+"""
+Create the cache_generations table.
+"""
+
+from sqlalchemy.engine import Engine
+
+from app.models.cache_generation import CacheGeneration
+
+
+def upgrade(engine: Engine) -> None:
+    CacheGeneration.__table__.create(engine, checkfirst=True)
@@ -0,0 +1,14 @@
+"""
+Add the (house_id, normalized name) index used to rebuild known barcode
+catalog entries.
+"""
+
+from sqlalchemy.engine import Engine
+
+from app.models.product_catalog import ProductCatalog
+
+
+def upgrade(engine: Engine) -> None:
+    for index in ProductCatalog.__table__.indexes:
+        if index.name == "idx_product_catalog_house_name_key":
+            index.create(engine, checkfirst=True)
@@ -0,0 +1,39 @@
+"""
+Create store_order_merged_lists and record the lists already merged.
+
+Completed lists with a store were merged when completed (or by the 0009
+backfill); so was the last list of every store_item_order row.
+"""
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Engine
+
+from app.models.shopping_list import ShoppingList, ShoppingListStatus
+from app.models.store_item_order import StoreItemOrder
+from app.models.store_order_merged_list import StoreOrderMergedList
+
+
+def upgrade(engine: Engine) -> None:
+    StoreOrderMergedList.__table__.create(engine, checkfirst=True)
+
+    completed = select(ShoppingList.store_id, ShoppingList.id).where(
+        ShoppingList.store_id.isnot(None),
+        ShoppingList.status == ShoppingListStatus.COMPLETED,
+    )
+    last_merged = select(StoreItemOrder.store_id, StoreItemOrder.last_list_id).where(
+        StoreItemOrder.last_list_id.isnot(None),
+        # The list may have been deleted since
+        StoreItemOrder.last_list_id.in_(select(ShoppingList.id)),
+    ).distinct()
+
+    with engine.begin() as conn:
+        pairs = {tuple(row) for query in (completed, last_merged) for row in conn.execute(query)}
+        if pairs:
+            conn.execute(
+                insert(StoreOrderMergedList).on_conflict_do_nothing(
+                    constraint="uq_store_order_merged_lists_store_list"
+                ),
+                [{"store_id": store_id, "list_id": list_id} for store_id, list_id in pairs],
+            )
+            print(f"✓ Backfill: {len(pairs)} lists recorded as merged into store order")
@@ -0,0 +1,4 @@
+"""
+Migration Versions
+One module per migration, named NNNN_description.py and applied in order.
+"""
@@ -2,11 +2,14 @@
 External Service Integrations
 
 This package contains HTTP clients and adapters for external services:
+- Shared pooled HTTP client registry (http_client)
 - Grocy API (inventory management)
 - LLM services (mlx-lm-server, LM Studio, Ollama, etc.)
+- Per-house LLM client pool (llm_pool)
 - MQTT (Home Assistant - future)
 """
 
+from app.integrations.http_client import http_clients
 from app.integrations.grocy import grocy_client
 from app.integrations.llm import (
     LLMConnection,
@@ -17,8 +20,10 @@ from app.integrations.llm import (
     get_ocr_client,
     get_chat_client,
 )
+from app.integrations.llm_pool import llm_clients
 
 __all__ = [
+    "http_clients",
     "grocy_client",
     "LLMConnection",
     "LLMPurpose",
@@ -27,4 +32,5 @@ __all__ = [
     "get_llm_manager",
     "get_ocr_client",
     "get_chat_client",
+    "llm_clients",
 ]
@@ -8,6 +8,8 @@ Works with any source that uses the same response format as OpenFoodFacts.
 import httpx
 from typing import Dict, Any
 
+from app.integrations.http_client import http_clients
+
 
 def parse_off_response(data: dict, barcode: str) -> Dict[str, Any]:
     """
@@ -74,27 +76,37 @@ class GenericBarcodeClient:
     """
 
     @staticmethod
-    async def lookup(base_url: str, api_path: str, barcode: str) -> Dict[str, Any]:
+    async def lookup(base_url: str, api_path: str, barcode: str, timeout: float = 10.0) -> Dict[str, Any]:
         """
         Lookup barcode using a generic Open*Facts-compatible API.
         api_path must contain {barcode} as placeholder.
         Returns dict with found, barcode, product_name, brand, etc.
+        Server errors (5xx) are reported in "error": they say nothing about the barcode.
         """
         try:
             url = base_url.rstrip("/") + api_path.format(barcode=barcode)
 
             fields = "product_name,product_name_it,product_name_en,brands,image_url,image_small_url,quantity,categories,categories_tags,nutriscore_grade,ecoscore_grade,nova_group,nutriments"
 
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with http_clients.client_for(url) as client:
                 response = await client.get(
                     url,
                     params={"fields": fields},
-                    headers={"User-Agent": "MealPlanner/1.0"}
+                    headers={"User-Agent": "MealPlanner/1.0"},
+                    timeout=timeout
                 )
 
                 if response.status_code == 200:
                     data = response.json()
                     return parse_off_response(data, barcode)
+                elif response.status_code == 429:
+                    result = parse_off_response({}, barcode)
+                    result["error"] = "Troppe richieste (429)"
+                    return result
+                elif response.status_code >= 500:
+                    result = parse_off_response({}, barcode)
+                    result["error"] = f"Errore server ({response.status_code})"
+                    return result
                 else:
                     return parse_off_response({}, barcode)
 
@@ -8,7 +8,7 @@ stock levels, and expiration dates.
 API Documentation: https://demo.grocy.info/api
 
 Features:
-- Async HTTP requests using httpx
+- Async HTTP requests using the shared pooled httpx clients
 - Automatic authentication via API key header
 - Timeout protection (10 seconds)
 - Graceful degradation if Grocy is not configured
@@ -19,6 +19,7 @@ import httpx
 from typing import List, Dict, Any, Optional
 from datetime import date
 from app.core.config import settings
+from app.integrations.http_client import http_clients
 
 
 class GrocyAPIError(Exception):
@@ -114,7 +115,7 @@ class GrocyClient:
             return []
 
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with http_clients.client_for(self.base_url) as client:
                 response = await client.get(
                     f"{self.base_url}/api/stock",
                     headers=self.headers
@@ -168,7 +169,7 @@ class GrocyClient:
             return []
 
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with http_clients.client_for(self.base_url) as client:
                 response = await client.get(
                     f"{self.base_url}/api/objects/products",
                     headers=self.headers
@@ -217,7 +218,7 @@ class GrocyClient:
             return None
 
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with http_clients.client_for(self.base_url) as client:
                 response = await client.get(
                     f"{self.base_url}/api/objects/products/{product_id}",
                     headers=self.headers
@@ -248,7 +249,7 @@ class GrocyClient:
             return []
 
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with http_clients.client_for(self.base_url) as client:
                 response = await client.get(
                     f"{self.base_url}/api/objects/locations",
                     headers=self.headers
@@ -304,7 +305,7 @@ class GrocyClient:
             payload["note"] = note
 
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with http_clients.client_for(self.base_url) as client:
                 response = await client.post(
                     f"{self.base_url}/api/stock/products/{product_id}/add",
                     headers=self.headers,
@@ -363,7 +364,7 @@ class GrocyClient:
             payload["location_id"] = location_id
 
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with http_clients.client_for(self.base_url) as client:
                 response = await client.post(
                     f"{self.base_url}/api/stock/products/{product_id}/consume",
                     headers=self.headers,
@@ -414,7 +415,7 @@ class GrocyClient:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with http_clients.client_for(self.base_url) as client:
                 response = await client.post(
                     f"{self.base_url}/api/stock/products/{product_id}/open",
                     headers=self.headers,
@@ -471,7 +472,7 @@ class GrocyClient:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with http_clients.client_for(self.base_url) as client:
                 response = await client.post(
                     f"{self.base_url}/api/stock/products/{product_id}/transfer",
                     headers=self.headers,
@@ -532,7 +533,7 @@ class GrocyClient:
             payload["location_id"] = location_id
 
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with http_clients.client_for(self.base_url) as client:
                 response = await client.post(
                     f"{self.base_url}/api/stock/products/{product_id}/inventory",
                     headers=self.headers,
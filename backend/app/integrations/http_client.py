@@ -0,0 +1,228 @@
+"""
+Shared HTTP Client Registry
+
+Application-scoped, pooled httpx.AsyncClient instances for all outbound
+integrations (Grocy, Open*Facts, OCR service).
+
+One client is kept per origin (scheme://host:port), so repeated calls to the
+same host reuse keep-alive connections instead of paying a TCP+TLS handshake
+on every request. HTTP/2 is enabled when the optional `h2` package is
+installed.
+
+Lifecycle:
+    The registry is started in the FastAPI startup event and closed in the
+    shutdown event. Code running outside the application event loop (e.g.
+    scripts, background threads with their own loop) transparently gets a
+    short-lived client instead, so callers never have to care.
+
+Usage:
+    from app.integrations.http_client import http_clients
+
+    async with http_clients.client_for(url) as client:
+        response = await client.get(url, timeout=15.0)
+
+Stats:
+    http_clients.get_stats() reports, per host: requests, pool hits, new
+    connections (handshakes), errors and latency percentiles.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Number of latency samples kept per host for percentile calculation
+LATENCY_WINDOW = 500
+
+
+def _origin(url: str) -> str:
+    """Return scheme://host:port for a URL (the pool key)."""
+    parsed = httpx.URL(url)
+    port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    return f"{parsed.scheme}://{parsed.host}:{port}"
+
+
+def _percentile(sorted_values: list, pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class HostStats:
+    """Counters and latency samples for one origin."""
+
+    def __init__(self):
+        self.requests = 0
+        self.pool_hits = 0
+        self.handshakes = 0
+        self.errors = 0
+        self.latencies_ms: deque = deque(maxlen=LATENCY_WINDOW)
+
+    def to_dict(self) -> dict:
+        samples = sorted(self.latencies_ms)
+        return {
+            "requests": self.requests,
+            "pool_hits": self.pool_hits,
+            "handshakes": self.handshakes,
+            "errors": self.errors,
+            "latency_ms": {
+                "p50": _percentile(samples, 50),
+                "p95": _percentile(samples, 95),
+                "p99": _percentile(samples, 99),
+            },
+        }
+
+
+class HTTPClientRegistry:
+    """
+    Registry of pooled AsyncClients keyed by origin.
+
+    Connection reuse is measured with httpcore trace events: a request that
+    triggers `connection.connect_tcp` opened a new connection (handshake),
+    any other request was served from the pool.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._stats: Dict[str, HostStats] = {}
+        self._stats_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def started(self) -> bool:
+        return self._loop is not None
+
+    def start(self) -> None:
+        """Bind the registry to the running application event loop."""
+        self._loop = asyncio.get_running_loop()
+        logger.info(f"[HTTP] Client registry started (http2={settings.HTTP2_ENABLED and HTTP2_AVAILABLE})")
+
+    async def aclose(self) -> None:
+        """Close all pooled clients. Called on application shutdown."""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        self._loop = None
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"[HTTP] Error closing client: {e}")
+
+    def _host_stats(self, origin: str) -> HostStats:
+        with self._stats_lock:
+            if origin not in self._stats:
+                self._stats[origin] = HostStats()
+            return self._stats[origin]
+
+    def _record_error(self, origin: str) -> None:
+        stats = self._host_stats(origin)
+        with self._stats_lock:
+            stats.errors += 1
+
+    def _build_client(self, origin: str) -> httpx.AsyncClient:
+        stats = self._host_stats(origin)
+
+        async def on_request(request: httpx.Request):
+            state = {"start": time.perf_counter(), "connected": False}
+
+            async def trace(event_name: str, info: dict):
+                if event_name == "connection.connect_tcp.complete":
+                    state["connected"] = True
+
+            request.extensions["trace"] = trace
+            request.extensions["hms_state"] = state
+
+        async def on_response(response: httpx.Response):
+            state = response.request.extensions.get("hms_state")
+            if state is None:
+                return
+            with self._stats_lock:
+                stats.requests += 1
+                if state["connected"]:
+                    stats.handshakes += 1
+                else:
+                    stats.pool_hits += 1
+                if response.status_code >= 500:
+                    stats.errors += 1
+                stats.latencies_ms.append((time.perf_counter() - state["start"]) * 1000)
+
+        return httpx.AsyncClient(
+            timeout=settings.HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+            ),
+            http2=settings.HTTP2_ENABLED and HTTP2_AVAILABLE,
+            event_hooks={"request": [on_request], "response": [on_response]},
+        )
+
+    @asynccontextmanager
+    async def client_for(self, url: str) -> AsyncIterator[httpx.AsyncClient]:
+        """
+        Get a client for the origin of `url`.
+
+        Inside the application event loop this yields the shared pooled client
+        (not closed on exit). Elsewhere it yields a short-lived client that is
+        closed on exit.
+        """
+        origin = _origin(url)
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if self._loop is None or running_loop is not self._loop:
+            client = self._build_client(origin)
+            try:
+                yield client
+            except httpx.TransportError:
+                self._record_error(origin)
+                raise
+            finally:
+                await client.aclose()
+            return
+
+        client = self._clients.get(origin)
+        if client is None or client.is_closed:
+            client = self._build_client(origin)
+            self._clients[origin] = client
+
+        try:
+            yield client
+        except httpx.TransportError:
+            self._record_error(origin)
+            raise
+
+    def get_stats(self) -> dict:
+        """Per-host pool statistics."""
+        with self._stats_lock:
+            hosts = {origin: stats.to_dict() for origin, stats in self._stats.items()}
+        return {
+            "started": self.started,
+            "http2": settings.HTTP2_ENABLED and HTTP2_AVAILABLE,
+            "pooled_clients": len(self._clients),
+            "hosts": hosts,
+        }
+
+
+# Application-wide singleton
+http_clients = HTTPClientRegistry()
@@ -9,13 +9,19 @@ Supports multiple LLM configurations for different use cases:
 Compatible with OpenAI-compatible APIs (mlx-lm-server, LM Studio, Ollama, etc.)
 """
 
+import asyncio
 import logging
-from typing import Optional, Literal
+import time
+from contextlib import asynccontextmanager, nullcontext
+from typing import AsyncIterator, Optional, Literal
 from dataclasses import dataclass, field, asdict
 from enum import Enum
 
 import httpx
 
+from app.core.config import settings as app_settings
+from app.integrations.http_client import HTTP2_AVAILABLE
+
 logger = logging.getLogger(__name__)
 
 
@@ -117,6 +123,87 @@ def _strip_v1_suffix(url: str) -> str:
     return url
 
 
+def _http_client_options() -> dict:
+    """Connection pooling options shared by the chat clients (keep-alive, HTTP/2 when available)."""
+    return {
+        "limits": httpx.Limits(
+            max_connections=app_settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=app_settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=app_settings.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "http2": app_settings.HTTP2_ENABLED and HTTP2_AVAILABLE,
+    }
+
+
+class RequestLimiter:
+    """
+    Caps concurrent requests on one connection (local servers usually
+    serve one or two generations at a time) and tracks its last use, so
+    the client pool can close idle clients.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self.last_used = time.monotonic()
+        self._semaphore = asyncio.Semaphore(limit)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        self.in_flight += 1
+        try:
+            async with self._semaphore:
+                yield
+        finally:
+            self.in_flight -= 1
+            self.last_used = time.monotonic()
+
+
+async def _cached_chat_completion(client, messages, temperature, max_tokens, purpose) -> Optional[str]:
+    """
+    Run client._send_chat through the LLM response cache.
+
+    Calls are looked up by connection, model, purpose, messages and the
+    effective sampling parameters; only deterministic enough ones are cached
+    (see llm_cache_service.is_cacheable).
+    """
+    from app.services import llm_cache_service
+
+    connection = client.connection
+    purpose = (purpose or connection.purpose).value
+    max_tokens = max_tokens or connection.max_tokens
+    # Thinking models sample at the provider default: never cacheable
+    effective_temperature = None if connection.is_thinking_model else (temperature or connection.temperature)
+
+    key = None
+    if llm_cache_service.is_cacheable(purpose, effective_temperature):
+        key = llm_cache_service.cache_key(
+            connection.id, connection.url, connection.model, purpose,
+            messages, effective_temperature, max_tokens,
+        )
+        cached = await asyncio.to_thread(llm_cache_service.get_cached_response, key, purpose)
+        if cached is not None:
+            logger.debug(f"[LLMCache] Hit for '{connection.name}' ({purpose})")
+            return cached
+
+    async with client.limiter.slot() if client.limiter else nullcontext():
+        result = await client._send_chat(messages, temperature, max_tokens)
+    if result is None:
+        return None
+    text, usage = result
+
+    if key is not None and text:
+        prompt_tokens = usage.get("prompt_tokens") or llm_cache_service.estimate_tokens(
+            "".join(m["content"] for m in messages if isinstance(m.get("content"), str))
+        )
+        completion_tokens = usage.get("completion_tokens") or llm_cache_service.estimate_tokens(text)
+        await asyncio.to_thread(
+            llm_cache_service.store_response, key, connection.id, connection.model, purpose,
+            text, prompt_tokens, completion_tokens,
+        )
+    return text
+
+
 class LLMClient:
     """
     Client for OpenAI-compatible LLM APIs.
@@ -127,6 +214,7 @@ class LLMClient:
     def __init__(self, connection: LLMConnection):
         self.connection = connection
         self._client: Optional[httpx.AsyncClient] = None
+        self.limiter: Optional[RequestLimiter] = None  # Set by the client pool
 
     @property
     def base_url(self) -> str:
@@ -139,7 +227,8 @@ class LLMClient:
                 headers["Authorization"] = f"Bearer {self.connection.api_key}"
             self._client = httpx.AsyncClient(
                 timeout=self.connection.timeout,
-                headers=headers
+                headers=headers,
+                **_http_client_options()
             )
         return self._client
 
@@ -176,7 +265,8 @@ class LLMClient:
         self,
         messages: list[dict],
         temperature: Optional[float] = None,
-        max_tokens: Optional[int] = None
+        max_tokens: Optional[int] = None,
+        purpose: Optional[LLMPurpose] = None,
     ) -> Optional[str]:
         """
         Send a chat completion request to the LLM.
@@ -185,6 +275,7 @@ class LLMClient:
             messages: List of {"role": "user/assistant/system", "content": "..."}
             temperature: Sampling temperature (uses connection default if not specified)
             max_tokens: Maximum response tokens (uses connection default if not specified)
+            purpose: What the call is for, selects the cache policy (defaults to the connection's purpose)
 
         Returns:
             The assistant's response text, or None on error
@@ -192,7 +283,15 @@ class LLMClient:
         if not self.connection.enabled:
             logger.info(f"LLM connection '{self.connection.name}' is disabled")
             return None
+        return await _cached_chat_completion(self, messages, temperature, max_tokens, purpose)
 
+    async def _send_chat(
+        self,
+        messages: list[dict],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+    ) -> Optional[tuple[str, dict]]:
+        """POST /v1/chat/completions. Returns (text, usage) or None on error."""
         try:
             client = await self._get_client()
 
@@ -218,7 +317,11 @@ class LLMClient:
             data = response.json()
             choices = data.get("choices", [])
             if choices:
-                return choices[0].get("message", {}).get("content")
+                usage = data.get("usage") or {}
+                return choices[0].get("message", {}).get("content"), {
+                    "prompt_tokens": usage.get("prompt_tokens"),
+                    "completion_tokens": usage.get("completion_tokens"),
+                }
             return None
 
         except httpx.TimeoutException:
@@ -241,6 +344,7 @@ class DocExtClient:
         self.connection = connection
         self._client: Optional[httpx.AsyncClient] = None
         self._session_hash: Optional[str] = None
+        self.limiter: Optional[RequestLimiter] = None  # Set by the client pool
 
     @property
     def base_url(self) -> str:
@@ -421,6 +525,7 @@ class AnthropicClient:
     def __init__(self, connection: LLMConnection):
         self.connection = connection
         self._client: Optional[httpx.AsyncClient] = None
+        self.limiter: Optional[RequestLimiter] = None  # Set by the client pool
 
     @property
     def base_url(self) -> str:
@@ -436,6 +541,7 @@ class AnthropicClient:
             self._client = httpx.AsyncClient(
                 timeout=self.connection.timeout,
                 headers=headers,
+                **_http_client_options(),
             )
         return self._client
 
@@ -481,17 +587,27 @@ class AnthropicClient:
         messages: list[dict],
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
+        purpose: Optional[LLMPurpose] = None,
     ) -> Optional[str]:
         """
         Send a chat completion request to Anthropic Messages API.
 
         Extracts system message from messages array into top-level field.
-        Supports extended thinking mode.
+        Supports extended thinking mode. purpose selects the cache policy
+        (defaults to the connection's purpose).
         """
         if not self.connection.enabled:
             logger.info(f"LLM connection '{self.connection.name}' is disabled")
             return None
+        return await _cached_chat_completion(self, messages, temperature, max_tokens, purpose)
 
+    async def _send_chat(
+        self,
+        messages: list[dict],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+    ) -> Optional[tuple[str, dict]]:
+        """POST /v1/messages. Returns (text, usage) or None on error."""
         try:
             client = await self._get_client()
 
@@ -535,7 +651,13 @@ class AnthropicClient:
             # Filter content blocks for type == "text" (ignore thinking blocks)
             content_blocks = data.get("content", [])
             text_parts = [b["text"] for b in content_blocks if b.get("type") == "text"]
-            return "\n".join(text_parts) if text_parts else None
+            if not text_parts:
+                return None
+            usage = data.get("usage") or {}
+            return "\n".join(text_parts), {
+                "prompt_tokens": usage.get("input_tokens"),
+                "completion_tokens": usage.get("output_tokens"),
+            }
 
         except httpx.TimeoutException:
             logger.error(f"Anthropic request timeout after {self.connection.timeout}s")
@@ -556,6 +678,7 @@ class ComfyUIClient:
     def __init__(self, connection: LLMConnection):
         self.connection = connection
         self._client: Optional[httpx.AsyncClient] = None
+        self.limiter: Optional[RequestLimiter] = None  # Set by the client pool
 
     @property
     def base_url(self) -> str:
@@ -610,6 +733,27 @@ class ComfyUIClient:
 # LLM Manager - Handles multiple connections
 # =============================================================================
 
+def create_client(conn: LLMConnection) -> LLMClient | DocExtClient | AnthropicClient | ComfyUIClient:
+    """Create the appropriate client for a connection type"""
+    if conn.connection_type == LLMType.DOCEXT:
+        return DocExtClient(conn)
+    elif conn.connection_type == LLMType.ANTHROPIC:
+        return AnthropicClient(conn)
+    elif conn.connection_type == LLMType.COMFYUI:
+        return ComfyUIClient(conn)
+    # OPENAI and OSSGPT use OpenAI-compatible protocol
+    return LLMClient(conn)
+
+
+def select_connection(connections: list[LLMConnection], purpose: LLMPurpose) -> Optional[LLMConnection]:
+    """First enabled connection for a purpose, falling back to GENERAL"""
+    for wanted in (purpose, LLMPurpose.GENERAL):
+        for conn in connections:
+            if conn.purpose == wanted and conn.enabled:
+                return conn
+    return None
+
+
 class LLMManager:
     """
     Manages multiple LLM connections and routes requests to the appropriate one.
@@ -653,15 +797,7 @@ class LLMManager:
             return None
 
         if connection_id not in self._clients:
-            # Create appropriate client based on connection type
-            if conn.connection_type == LLMType.DOCEXT:
-                self._clients[connection_id] = DocExtClient(conn)
-            elif conn.connection_type == LLMType.ANTHROPIC:
-                self._clients[connection_id] = AnthropicClient(conn)
-            elif conn.connection_type == LLMType.COMFYUI:
-                self._clients[connection_id] = ComfyUIClient(conn)
-            else:  # OPENAI and OSSGPT use OpenAI-compatible protocol
-                self._clients[connection_id] = LLMClient(conn)
+            self._clients[connection_id] = create_client(conn)
 
         return self._clients[connection_id]
 
@@ -674,13 +810,9 @@ class LLMManager:
 
     def get_client_for_purpose(self, purpose: LLMPurpose) -> Optional[LLMClient]:
         """Get the first enabled client for a specific purpose"""
-        connections = self.get_connections_by_purpose(purpose)
-        if not connections:
-            # Fallback to GENERAL purpose
-            connections = self.get_connections_by_purpose(LLMPurpose.GENERAL)
-
-        if connections:
-            return self.get_client(connections[0].id)
+        conn = select_connection(list(self._connections.values()), purpose)
+        if conn:
+            return self.get_client(conn.id)
         return None
 
     def load_from_settings(self, settings: dict):
@@ -797,11 +929,11 @@ async def test_connection(
         try:
             health = await client.health_check()
             if health.get("status") == "ok":
-                response = await client.chat_completion(
-                    messages=[{"role": "user", "content": "Rispondi solo: OK"}],
-                    max_tokens=10
+                # Straight to the server: a cached answer would prove nothing
+                result = await client._send_chat(
+                    [{"role": "user", "content": "Rispondi solo: OK"}], None, 10
                 )
-                health["test_response"] = response
+                health["test_response"] = result[0] if result else None
             return health
         finally:
             await client.close()
@@ -0,0 +1,242 @@
+"""
+Per-house LLM Client Pool
+
+Application-scoped registry of LLM clients, keyed by house and connection
+id and tagged with a hash of the connection config. Replaces loading house
+settings into the process-global LLMManager on every request, which
+dropped the clients (and their keep-alive connections) each time and mixed
+the connections of different houses in one dict.
+
+- A house's llm_connections are parsed again only when their hash changes;
+  clients of connections whose config is unchanged are kept
+- Clients keep their httpx connections (HTTP/2 when available) across
+  requests, until they have been idle for LLM_CLIENT_IDLE_SECONDS
+- Each pooled client gets a RequestLimiter: at most
+  LLM_MAX_CONCURRENT_REQUESTS requests in flight per connection
+- Clients whose config changed or that went idle are closed once their
+  in-flight requests are done
+
+Lifecycle:
+    Started in the FastAPI startup event and closed in the shutdown event,
+    like http_clients. Outside the application event loop callers get a
+    fresh, unpooled client.
+
+Usage:
+    from app.integrations.llm_pool import llm_clients
+
+    client = llm_clients.get_client(house.id, house.settings, LLMPurpose.OCR)
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+from uuid import UUID
+
+from app.core.config import settings
+from app.integrations.llm import (
+    LLMConnection,
+    LLMPurpose,
+    RequestLimiter,
+    create_client,
+    select_connection,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(value) -> str:
+    encoded = json.dumps(value, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _parse_connections(house_settings: Optional[dict]) -> list[LLMConnection]:
+    connections = []
+    for config in (house_settings or {}).get("llm_connections", []):
+        try:
+            connections.append(LLMConnection.from_dict(config))
+        except Exception as e:
+            logger.warning(f"Failed to load LLM connection: {e}")
+    return connections
+
+
+@dataclass
+class _HouseClients:
+    """Parsed connections of one house and the clients created for them."""
+    settings_hash: str
+    connections: list[LLMConnection]
+    # connection id -> (config hash, client)
+    clients: dict = field(default_factory=dict)
+
+
+class LLMClientPool:
+    """Registry of LLM clients per house."""
+
+    def __init__(self):
+        self._houses: dict[UUID, _HouseClients] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reaper: Optional[asyncio.Task] = None
+        self._closing: set[asyncio.Task] = set()
+
+    @property
+    def started(self) -> bool:
+        return self._loop is not None
+
+    def start(self) -> None:
+        """Bind the pool to the running application event loop and start closing idle clients."""
+        self._loop = asyncio.get_running_loop()
+        self._reaper = asyncio.create_task(self._reap_loop(), name="llm-client-reaper")
+        logger.info(
+            f"[LLMPool] Started (max {settings.LLM_MAX_CONCURRENT_REQUESTS} requests per connection, "
+            f"idle timeout {settings.LLM_CLIENT_IDLE_SECONDS}s)"
+        )
+
+    async def aclose(self) -> None:
+        """Close all clients. Called on application shutdown."""
+        if self._reaper:
+            self._reaper.cancel()
+            self._reaper = None
+        houses = list(self._houses.values())
+        self._houses.clear()
+        self._loop = None
+        for house in houses:
+            for _, client in house.clients.values():
+                try:
+                    await client.close()
+                except Exception as e:
+                    logger.warning(f"[LLMPool] Error closing client: {e}")
+
+    def _pooled(self) -> bool:
+        try:
+            return self._loop is not None and asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def apply_settings(self, house_id: UUID, house_settings: Optional[dict]) -> list[LLMConnection]:
+        """
+        Bring the house's clients in line with its settings.
+
+        A no-op while the llm_connections hash is unchanged. Otherwise clients
+        of removed or reconfigured connections are closed; the others are kept.
+        """
+        settings_hash = _hash((house_settings or {}).get("llm_connections", []))
+        if not self._pooled():
+            return _parse_connections(house_settings)
+
+        house = self._houses.get(house_id)
+        if house and house.settings_hash == settings_hash:
+            return house.connections
+
+        connections = _parse_connections(house_settings)
+        config_hashes = {conn.id: _hash(conn.to_dict()) for conn in connections}
+        kept = {}
+        if house:
+            for connection_id, (config_hash, client) in house.clients.items():
+                if config_hashes.get(connection_id) == config_hash:
+                    kept[connection_id] = (config_hash, client)
+                else:
+                    self._close_when_idle(client)
+            logger.info(f"[LLMPool] House {house_id}: settings changed, kept {len(kept)}/{len(house.clients)} clients")
+
+        self._houses[house_id] = _HouseClients(settings_hash, connections, kept)
+        return connections
+
+    def _checkout(self, house_id: UUID, conn: LLMConnection):
+        if not self._pooled():
+            return create_client(conn)
+
+        house = self._houses[house_id]
+        config_hash = _hash(conn.to_dict())
+        entry = house.clients.get(conn.id)
+        if entry is None or entry[0] != config_hash:
+            client = create_client(conn)
+            client.limiter = RequestLimiter(settings.LLM_MAX_CONCURRENT_REQUESTS)
+            house.clients[conn.id] = (config_hash, client)
+        else:
+            client = entry[1]
+        # Not reaped before its first request
+        client.limiter.last_used = time.monotonic()
+        return client
+
+    def get_client(self, house_id: UUID, house_settings: Optional[dict], purpose: LLMPurpose):
+        """Client of the house's first enabled connection for a purpose (GENERAL as fallback), or None."""
+        conn = select_connection(self.apply_settings(house_id, house_settings), purpose)
+        if conn is None:
+            return None
+        return self._checkout(house_id, conn)
+
+    def get_client_by_id(self, house_id: UUID, house_settings: Optional[dict], connection_id: str):
+        """Client of a specific connection of the house, or None."""
+        connections = self.apply_settings(house_id, house_settings)
+        conn = next((c for c in connections if c.id == connection_id), None)
+        if conn is None:
+            return None
+        return self._checkout(house_id, conn)
+
+    def _close_when_idle(self, client) -> None:
+        async def close():
+            while client.limiter and client.limiter.in_flight:
+                await asyncio.sleep(1)
+            try:
+                await client.close()
+            except Exception as e:
+                logger.warning(f"[LLMPool] Error closing client: {e}")
+
+        task = asyncio.create_task(close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def _reap(self) -> int:
+        """Close clients idle for longer than LLM_CLIENT_IDLE_SECONDS. Returns clients closed."""
+        now = time.monotonic()
+        closed = 0
+        for house_id in list(self._houses):
+            house = self._houses[house_id]
+            for connection_id, (_, client) in list(house.clients.items()):
+                limiter = client.limiter
+                if limiter.in_flight == 0 and now - limiter.last_used > settings.LLM_CLIENT_IDLE_SECONDS:
+                    del house.clients[connection_id]
+                    self._close_when_idle(client)
+                    closed += 1
+            if not house.clients:
+                # Parsed again on the house's next request
+                del self._houses[house_id]
+        return closed
+
+    async def _reap_loop(self) -> None:
+        interval = max(1.0, min(60.0, settings.LLM_CLIENT_IDLE_SECONDS / 2))
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                closed = self._reap()
+                if closed:
+                    logger.info(f"[LLMPool] Closed {closed} idle clients")
+            except Exception as e:
+                logger.error(f"[LLMPool] Reaper error: {e}")
+
+    def get_stats(self) -> dict:
+        """Pooled clients per house with their in-flight requests and idle time."""
+        now = time.monotonic()
+        return {
+            "started": self.started,
+            "max_concurrent_requests": settings.LLM_MAX_CONCURRENT_REQUESTS,
+            "idle_timeout_seconds": settings.LLM_CLIENT_IDLE_SECONDS,
+            "houses": {
+                str(house_id): {
+                    connection_id: {
+                        "name": client.connection.name,
+                        "in_flight": client.limiter.in_flight,
+                        "idle_seconds": round(now - client.limiter.last_used, 1),
+                    }
+                    for connection_id, (_, client) in house.clients.items()
+                }
+                for house_id, house in self._houses.items()
+            },
+        }
+
+
+# Application-wide singleton
+llm_clients = LLMClientPool()
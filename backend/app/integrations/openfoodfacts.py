@@ -10,6 +10,8 @@ API Documentation: https://wiki.openfoodfacts.org/API
 import httpx
 from typing import Dict, Any, Optional
 
+from app.integrations.http_client import http_clients
+
 
 class OpenFoodFactsClient:
     """
@@ -42,7 +44,7 @@ class OpenFoodFactsClient:
             if include_nutrients:
                 fields += ",nutriments"
 
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with http_clients.client_for(OpenFoodFactsClient.BASE_URL) as client:
                 response = await client.get(
                     f"{OpenFoodFactsClient.BASE_URL}/product/{barcode}",
                     params={"fields": fields},
@@ -88,7 +90,7 @@ class OpenFoodFactsClient:
                     else:
                         return OpenFoodFactsClient._not_found_response(barcode)
                 else:
-                    return OpenFoodFactsClient._not_found_response(barcode)
+                    return OpenFoodFactsClient._status_response(OpenFoodFactsClient._not_found_response(barcode), response.status_code)
 
         except httpx.ConnectError:
             result = OpenFoodFactsClient._not_found_response(barcode)
@@ -118,10 +120,11 @@ class OpenFoodFactsClient:
             dict with complete product data or not found response
         """
         try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
+            async with http_clients.client_for(OpenFoodFactsClient.BASE_URL) as client:
                 response = await client.get(
                     f"{OpenFoodFactsClient.BASE_URL}/product/{barcode}.json",
-                    headers={"User-Agent": "MealPlanner/1.0"}
+                    headers={"User-Agent": "MealPlanner/1.0"},
+                    timeout=15.0
                 )
 
                 if response.status_code == 200:
@@ -211,7 +214,7 @@ class OpenFoodFactsClient:
                     else:
                         return OpenFoodFactsClient._not_found_response_full(barcode)
                 else:
-                    return OpenFoodFactsClient._not_found_response_full(barcode)
+                    return OpenFoodFactsClient._status_response(OpenFoodFactsClient._not_found_response_full(barcode), response.status_code)
 
         except httpx.ConnectError:
             result = OpenFoodFactsClient._not_found_response_full(barcode)
@@ -226,6 +229,19 @@ class OpenFoodFactsClient:
             result["error"] = str(e)
             return result
 
+    @staticmethod
+    def _status_response(result: Dict[str, Any], status_code: int) -> Dict[str, Any]:
+        """
+        Not-found response for a non-200 answer. Rate limiting and server
+        errors carry an "error": they say nothing about the barcode and
+        must not be cached as "not found".
+        """
+        if status_code == 429:
+            result["error"] = "Troppe richieste (429)"
+        elif status_code >= 500:
+            result["error"] = f"Errore server ({status_code})"
+        return result
+
     @staticmethod
     def _not_found_response(barcode: str) -> Dict[str, Any]:
         """Helper to create a not-found response."""
@@ -13,10 +13,12 @@ import os
 from app.core.config import settings
 from app.middleware.cors import setup_cors
 from app.middleware.error_handler import ErrorHandlerMiddleware
-from sqlalchemy import inspect, text
 from app.db.session import engine, SessionLocal
-from app.models import Base
+from app.db.migrations import run_migrations
+from app.integrations.http_client import http_clients
+from app.integrations.llm_pool import llm_clients
 from app.services.error_logging import configure_error_logging, error_logger
+from app.services.job_engine import job_engine
 
 
 # Create FastAPI application instance
@@ -67,272 +69,36 @@ async def startup_event():
     Executed once when the FastAPI application starts.
 
     Tasks performed:
-    - Create all database tables if they don't exist
-    - Initialize database schema based on SQLAlchemy models
+    - Apply pending versioned migrations (see app.db.migrations)
+    - Start the shared outbound HTTP client pool
+    - Start the background job workers (product enrichment, ...)
     - Configure error logging system
 
-    Note: In production, use Alembic migrations instead of
-    Base.metadata.create_all() for better schema management.
+    An already-migrated database costs a single ledger query here.
+    Schema changes and data backfills go in app/db/migrations/versions.
     """
-    # Create all database tables
-    # This reads all models that inherit from Base and creates their tables
-    # Only creates tables that don't already exist (safe to run multiple times)
-    Base.metadata.create_all(bind=engine)
-    print(f"✓ Database tables created/verified")
-
-    # Auto-migrate: add missing columns to existing tables
-    inspector = inspect(engine)
-    migration_count = 0
-    for table in Base.metadata.tables.values():
-        if inspector.has_table(table.name):
-            existing_columns = {col['name'] for col in inspector.get_columns(table.name)}
-            for column in table.columns:
-                if column.name not in existing_columns:
-                    col_type = column.type.compile(engine.dialect)
-                    # Determine default value
-                    default_val = None
-                    if column.server_default is not None:
-                        default_val = column.server_default.arg
-                    elif column.default is not None and column.default.is_scalar:
-                        # Use Python-level default
-                        val = column.default.arg
-                        if isinstance(val, bool):
-                            default_val = "TRUE" if val else "FALSE"
-                        elif isinstance(val, (int, float)):
-                            default_val = str(val)
-                        elif isinstance(val, str):
-                            default_val = f"'{val}'"
-                    # For NOT NULL columns, always add as NULL first then alter
-                    if not column.nullable and default_val is not None:
-                        stmt = f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {col_type} NULL DEFAULT {default_val}'
-                        with engine.begin() as conn:
-                            conn.execute(text(stmt))
-                            conn.execute(text(f'UPDATE "{table.name}" SET "{column.name}" = {default_val} WHERE "{column.name}" IS NULL'))
-                            conn.execute(text(f'ALTER TABLE "{table.name}" ALTER COLUMN "{column.name}" SET NOT NULL'))
-                    elif not column.nullable:
-                        # NOT NULL without any default - add as NULL to avoid crash
-                        stmt = f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {col_type} NULL'
-                        with engine.begin() as conn:
-                            conn.execute(text(stmt))
-                    else:
-                        stmt = f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {col_type} NULL'
-                        with engine.begin() as conn:
-                            conn.execute(text(stmt))
-                    print(f"  + Added column {table.name}.{column.name}")
-                    migration_count += 1
-    if migration_count:
-        print(f"✓ Auto-migration: {migration_count} columns added")
+    applied = run_migrations(engine)
+    if applied:
+        print(f"✓ Applied {len(applied)} migration(s): {', '.join(applied)}")
     else:
         print(f"✓ Database schema up to date")
 
-    # Migrate: make product_catalog.barcode nullable
-    try:
-        col_info = inspector.get_columns("product_catalog")
-        bc_col = next((c for c in col_info if c['name'] == 'barcode'), None)
-        if bc_col and not bc_col.get('nullable', True):
-            with engine.begin() as conn:
-                conn.execute(text('ALTER TABLE product_catalog ALTER COLUMN barcode DROP NOT NULL'))
-            print("✓ product_catalog.barcode made nullable")
-    except Exception as e:
-        print(f"  ⚠ barcode nullable migration skipped: {e}")
-
-    # Migrate: copy existing barcodes to product_barcodes
-    from app.models.product_catalog import ProductCatalog
-    from app.models.product_barcode import ProductBarcode
-    db = SessionLocal()
-    try:
-        products = db.query(ProductCatalog).filter(
-            ProductCatalog.barcode.isnot(None),
-            ProductCatalog.barcode != ''
-        ).all()
-        migrated = 0
-        for p in products:
-            exists = db.query(ProductBarcode).filter(ProductBarcode.barcode == p.barcode).first()
-            if not exists:
-                db.add(ProductBarcode(
-                    product_id=p.id,
-                    barcode=p.barcode,
-                    is_primary=True,
-                    source=p.source
-                ))
-                migrated += 1
-        db.commit()
-        if migrated:
-            print(f"✓ Migrated {migrated} barcodes to product_barcodes")
-        else:
-            print(f"✓ product_barcodes already up to date")
-    except Exception as e:
-        db.rollback()
-        print(f"  ⚠ barcode migration error: {e}")
-    finally:
-        db.close()
-
-    # Seed hardcoded barcode lookup sources
-    from app.services.barcode_source_service import seed_hardcoded_sources
-    db = SessionLocal()
-    try:
-        seed_hardcoded_sources(db)
-        print(f"✓ Barcode lookup sources seeded")
-    finally:
-        db.close()
-
-    # Migrate: rename environments → areas
-    try:
-        if inspector.has_table("environments") and not inspector.has_table("areas"):
-            with engine.begin() as conn:
-                conn.execute(text('ALTER TABLE environments RENAME TO areas'))
-                # Rename env_type → area_type
-                existing_cols = {c['name'] for c in inspector.get_columns("environments")}
-                if 'env_type' in existing_cols:
-                    conn.execute(text('ALTER TABLE areas RENAME COLUMN env_type TO area_type'))
-                # Rename enum type
-                conn.execute(text("DO $$ BEGIN IF EXISTS (SELECT 1 FROM pg_type WHERE typname = 'environmenttype') THEN ALTER TYPE environmenttype RENAME TO areatype; END IF; END $$"))
-            print("✓ Renamed table environments → areas")
-        elif inspector.has_table("areas"):
-            # Table already renamed, check column
-            area_cols = {c['name'] for c in inspector.get_columns("areas")}
-            if 'env_type' in area_cols:
-                with engine.begin() as conn:
-                    conn.execute(text('ALTER TABLE areas RENAME COLUMN env_type TO area_type'))
-                print("✓ Renamed column areas.env_type → area_type")
-    except Exception as e:
-        print(f"  ⚠ environments→areas rename skipped: {e}")
-
-    # Migrate: rename environment_id → area_id in referencing tables
-    for tbl, old_col, new_col in [
-        ("dispensa_items", "environment_id", "area_id"),
-        ("categories", "default_environment_id", "default_area_id"),
-        ("product_category_tags", "default_environment_id", "default_area_id"),
-    ]:
-        try:
-            if inspector.has_table(tbl):
-                cols = {c['name'] for c in inspector.get_columns(tbl)}
-                if old_col in cols and new_col not in cols:
-                    with engine.begin() as conn:
-                        conn.execute(text(f'ALTER TABLE {tbl} RENAME COLUMN {old_col} TO {new_col}'))
-                    print(f"✓ Renamed {tbl}.{old_col} → {new_col}")
-        except Exception as e:
-            print(f"  ⚠ {tbl} column rename skipped: {e}")
-
-    # Update FK constraints to point to areas table
-    for tbl, col in [
-        ("dispensa_items", "area_id"),
-        ("categories", "default_area_id"),
-        ("product_category_tags", "default_area_id"),
-    ]:
-        try:
-            if inspector.has_table(tbl):
-                cols = {c['name'] for c in inspector.get_columns(tbl)}
-                if col in cols:
-                    fks = inspector.get_foreign_keys(tbl)
-                    for fk in fks:
-                        if col in fk.get('constrained_columns', []) and fk.get('referred_table') == 'environments':
-                            fk_name = fk.get('name')
-                            if fk_name:
-                                with engine.begin() as conn:
-                                    conn.execute(text(f'ALTER TABLE {tbl} DROP CONSTRAINT {fk_name}'))
-                                    conn.execute(text(f'ALTER TABLE {tbl} ADD CONSTRAINT {fk_name} FOREIGN KEY ({col}) REFERENCES areas(id) ON DELETE SET NULL'))
-                                print(f"✓ Updated FK {tbl}.{col} → areas")
-        except Exception as e:
-            print(f"  ⚠ FK update for {tbl}.{col} skipped: {e}")
-
-    # Backfill: set expiry_extension_enabled=True on default Congelatore areas
-    from app.models.area import Area
-    db = SessionLocal()
-    try:
-        updated = db.query(Area).filter(
-            Area.name == "Congelatore",
-            Area.is_default == True,
-            Area.expiry_extension_enabled == False,
-        ).update({"expiry_extension_enabled": True})
-        if updated:
-            db.commit()
-            print(f"✓ Backfill: {updated} Congelatore area(s) updated with expiry_extension_enabled=True")
-        else:
-            print(f"✓ Congelatore areas already have expiry_extension_enabled")
-    except Exception as e:
-        db.rollback()
-        print(f"  ⚠ Congelatore backfill skipped: {e}")
-    finally:
-        db.close()
-
-    # Seed default areas for houses that don't have any
-    from app.models.house import House
-    from app.services.area_service import AreaService
-    db = SessionLocal()
-    try:
-        houses_without_areas = db.query(House).filter(
-            ~House.id.in_(
-                db.query(Area.house_id).distinct()
-            )
-        ).all()
-        for house in houses_without_areas:
-            area_count = AreaService.seed_defaults(db, house.id)
-            orphan_count = AreaService.assign_orphaned_items(db, house.id)
-            if area_count or orphan_count:
-                print(f"  + House '{house.name}': {area_count} areas seeded, {orphan_count} orphaned items assigned")
-        db.commit()
-        print(f"✓ Default areas seeded")
-    finally:
-        db.close()
-
-    # Migrate: extract brand text into Brand entities and link products
-    from app.models.brand import Brand
-    from sqlalchemy import func as sa_func
-    db = SessionLocal()
-    try:
-        # Get distinct brand names from products that have brand text but no brand_id
-        brand_rows = db.query(ProductCatalog.brand).filter(
-            ProductCatalog.brand.isnot(None),
-            ProductCatalog.brand != '',
-        ).distinct().all()
-
-        created = 0
-        for (brand_name,) in brand_rows:
-            normalized = brand_name.strip()
-            if not normalized:
-                continue
-            existing = db.query(Brand).filter(
-                sa_func.lower(Brand.name) == normalized.lower()
-            ).first()
-            if not existing:
-                db.add(Brand(name=normalized))
-                created += 1
-        if created:
-            db.commit()
-
-        # Link products: set brand_id where brand text exists but brand_id is NULL
-        linked = 0
-        products_to_link = db.query(ProductCatalog).filter(
-            ProductCatalog.brand.isnot(None),
-            ProductCatalog.brand != '',
-            ProductCatalog.brand_id.is_(None),
-        ).all()
-        # Build lookup map
-        all_brands = db.query(Brand).all()
-        brand_map = {b.name.lower(): b.id for b in all_brands}
-        for p in products_to_link:
-            bid = brand_map.get(p.brand.strip().lower())
-            if bid:
-                p.brand_id = bid
-                linked += 1
-        if linked:
-            db.commit()
-
-        if created or linked:
-            print(f"✓ Brand migration: {created} brands created, {linked} products linked")
-        else:
-            print(f"✓ Brand data already up to date")
-    except Exception as e:
-        db.rollback()
-        print(f"  ⚠ Brand migration error: {e}")
-    finally:
-        db.close()
+    # Start shared HTTP client pool (Grocy, Open*Facts, OCR service)
+    http_clients.start()
+    print(f"✓ HTTP client pool started")
+
+    # Start per-house LLM client pool
+    llm_clients.start()
+    print(f"✓ LLM client pool started")
 
     # Configure error logging system
     configure_error_logging(SessionLocal)
     print(f"✓ Error logging system configured")
 
+    # Start background job workers (handlers are registered at import time)
+    await job_engine.start()
+    print(f"✓ Background job workers started ({settings.JOB_WORKER_CONCURRENCY})")
+
     # Check receipts directory persistence
     receipts_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "receipts")
     os.makedirs(receipts_dir, exist_ok=True)
@@ -354,8 +120,11 @@ async def shutdown_event():
     Application shutdown handler.
 
     Executed once when the FastAPI application shuts down.
-    Can be used for cleanup tasks like closing connections.
+    Stops background job workers and closes pooled outbound HTTP and LLM connections.
     """
+    await job_engine.stop()
+    await llm_clients.aclose()
+    await http_clients.aclose()
     print("✓ Application shutdown complete")
 
 
@@ -31,9 +31,19 @@ from app.models.dispensa import DispensaItem
 from app.models.product_nutrition import ProductNutrition
 from app.models.product_category_tag import ProductCategoryTag, product_category_association
 from app.models.barcode_source import BarcodeLookupSource
+from app.models.barcode_lookup_cache import BarcodeLookupCache
 from app.models.product_report import ProductReport, ReportStatus
 from app.models.product_barcode import ProductBarcode
 from app.models.brand import Brand
+from app.models.background_job import BackgroundJob, JobStatus
+from app.models.store_item_order import StoreItemOrder
+from app.models.known_barcode import KnownBarcode
+from app.models.ocr_result_cache import OCRResultCache
+from app.models.receipt_synonym import ReceiptSynonym
+from app.models.receipt_line_memory import ReceiptLineMemory
+from app.models.llm_response_cache import LLMResponseCache
+from app.models.cache_generation import CacheGeneration
+from app.models.store_order_merged_list import StoreOrderMergedList
 
 # Export all models so they can be imported from app.models
 # This also ensures they are registered with SQLAlchemy Base
@@ -70,8 +80,19 @@ __all__ = [
     "ProductCategoryTag",
     "product_category_association",
     "BarcodeLookupSource",
+    "BarcodeLookupCache",
     "ProductReport",
     "ReportStatus",
     "ProductBarcode",
     "Brand",
+    "BackgroundJob",
+    "JobStatus",
+    "StoreItemOrder",
+    "KnownBarcode",
+    "OCRResultCache",
+    "ReceiptSynonym",
+    "ReceiptLineMemory",
+    "LLMResponseCache",
+    "CacheGeneration",
+    "StoreOrderMergedList",
 ]
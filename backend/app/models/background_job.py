@@ -0,0 +1,79 @@
+"""
+Background Job Model
+Durable job queue shared by all API workers.
+
+Jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so several
+processes can work the same table without handing out a job twice.
+A partial unique index on (kind, dedup_key) keeps at most one active
+(pending/running) job per key, e.g. one enrichment per barcode.
+"""
+
+import enum
+
+from sqlalchemy import Column, String, Integer, Text, DateTime, JSON, Enum as SQLEnum, Index, func, text
+
+from app.models.base import BaseModel
+
+
+class JobStatus(str, enum.Enum):
+    """Background job lifecycle"""
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class BackgroundJob(BaseModel):
+    """
+    Background Job Model
+
+    kind selects the handler registered in the job engine, payload is
+    passed to it as-is. Retries are scheduled by moving run_after forward,
+    so a failing job never blocks the rest of the queue.
+    """
+    __tablename__ = "background_jobs"
+
+    kind = Column(String(50), nullable=False, index=True)
+    dedup_key = Column(String(255), nullable=True)
+    payload = Column(JSON, nullable=False, default=dict)
+
+    status = Column(
+        SQLEnum(JobStatus, name="jobstatus", values_callable=lambda x: [e.value for e in x]),
+        default=JobStatus.PENDING,
+        nullable=False,
+        index=True
+    )
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+
+    # Not picked up before this time (retry backoff)
+    run_after = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # Worker bookkeeping
+    locked_by = Column(String(100), nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    # Renewed while the handler runs: the lease expires JOB_LEASE_SECONDS after it
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Outcome
+    last_error = Column(Text, nullable=True)
+    result = Column(JSON, nullable=True)
+    # Latest progress reported by the handler while running
+    progress = Column(JSON, nullable=True)
+
+    __table_args__ = (
+        # Claim query: next runnable job
+        Index('idx_background_jobs_claim', 'status', 'run_after'),
+        # At most one active job per (kind, dedup_key)
+        Index(
+            'uq_background_jobs_active_dedup',
+            'kind',
+            'dedup_key',
+            unique=True,
+            postgresql_where=text("status IN ('pending', 'running') AND dedup_key IS NOT NULL"),
+        ),
+    )
+
+    def __repr__(self):
+        return f"<BackgroundJob(id={self.id}, kind={self.kind}, status={self.status})>"
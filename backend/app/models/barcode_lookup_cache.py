@@ -0,0 +1,27 @@
+"""
+Barcode Lookup Cache Model
+
+Persistent cache of raw barcode source responses, keyed by (source_code, barcode).
+Negative entries ("not found") are cached too, with a shorter TTL.
+"""
+
+from sqlalchemy import Column, String, Boolean, DateTime, JSON, UniqueConstraint
+
+from app.models.base import BaseModel
+
+
+class BarcodeLookupCache(BaseModel):
+    __tablename__ = "barcode_lookup_cache"
+
+    source_code = Column(String(50), nullable=False, index=True)
+    barcode = Column(String(100), nullable=False, index=True)
+    found = Column(Boolean, nullable=False, default=False)
+    response = Column(JSON, nullable=True)  # Parsed source response (None for negative entries)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("source_code", "barcode", name="uq_barcode_lookup_cache_source_barcode"),
+    )
+
+    def __repr__(self):
+        return f"<BarcodeLookupCache(source={self.source_code}, barcode={self.barcode}, found={self.found})>"
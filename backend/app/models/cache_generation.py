@@ -0,0 +1,21 @@
+"""
+Cache Generation Model
+
+One counter per in-process cache. Purging a cache bumps its generation;
+every API worker compares it with the generation its own LRU was filled
+under and drops the LRU when it moved, so purges reach all workers.
+"""
+
+from sqlalchemy import Column, String, Integer
+
+from app.models.base import BaseModel
+
+
+class CacheGeneration(BaseModel):
+    __tablename__ = "cache_generations"
+
+    name = Column(String(50), nullable=False, unique=True)
+    generation = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<CacheGeneration(name={self.name}, generation={self.generation})>"
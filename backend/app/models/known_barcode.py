@@ -0,0 +1,46 @@
+"""
+Known Barcode Model
+
+Index of item name -> barcode per house, used to pre-fill catalog_barcode on
+shopping list items. Maintained incrementally by known_barcode_service.
+
+- source "scan": barcode verified on a shopping list item of the house
+  (the most recent verification wins)
+- source "catalog": primary barcode of a catalog product; house_id=null
+  for global template products
+
+item_key is the lowercased item name, or "grocy:<product_id>".
+"""
+
+from sqlalchemy import Column, String, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.models.base import BaseModel
+
+
+class KnownBarcode(BaseModel):
+    __tablename__ = "known_barcodes"
+
+    house_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("houses.id", ondelete="CASCADE"),
+        nullable=True
+    )
+    item_key = Column(String(255), nullable=False)
+    source = Column(String(20), nullable=False)  # scan, catalog
+    barcode = Column(String(100), nullable=False, index=True)
+
+    __table_args__ = (
+        # NULL house_ids are distinct in a plain unique index: one index per case
+        Index(
+            'uq_known_barcodes_house_key', 'house_id', 'item_key', 'source',
+            unique=True, postgresql_where=text("house_id IS NOT NULL")
+        ),
+        Index(
+            'uq_known_barcodes_global_key', 'item_key', 'source',
+            unique=True, postgresql_where=text("house_id IS NULL")
+        ),
+    )
+
+    def __repr__(self):
+        return f"<KnownBarcode(house_id={self.house_id}, item_key='{self.item_key}', barcode={self.barcode})>"
@@ -0,0 +1,33 @@
+"""
+LLM Response Cache Model
+
+Chat completion responses keyed by a hash of (connection, model, purpose,
+normalized messages, sampling parameters). Only low-temperature calls are
+cached, see llm_cache_service.
+
+Token counts come from the provider's usage report (estimated when the
+server doesn't send one) and are used to report tokens saved by hits.
+"""
+
+from sqlalchemy import Column, String, Integer, DateTime, Text
+
+from app.models.base import BaseModel
+
+
+class LLMResponseCache(BaseModel):
+    __tablename__ = "llm_response_cache"
+
+    cache_key = Column(String(64), nullable=False, unique=True)
+    connection_id = Column(String(100), nullable=False)
+    model = Column(String(255), nullable=False)
+    purpose = Column(String(50), nullable=False, index=True)
+    response = Column(Text, nullable=False)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    hits = Column(Integer, nullable=False, default=0)
+    # Last store or hit: the least recently used entries are pruned first
+    last_used_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<LLMResponseCache(key={self.cache_key[:12]}, purpose={self.purpose}, model={self.model}, hits={self.hits})>"
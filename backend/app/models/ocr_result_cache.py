@@ -0,0 +1,28 @@
+"""
+OCR Result Cache Model
+
+OCR service responses keyed by the SHA-256 of the image bytes and the OCR
+service's parameter hash. Identical images (re-uploads, re-processing)
+skip the OCR round trip entirely.
+"""
+
+from sqlalchemy import Column, String, Integer, DateTime, JSON, UniqueConstraint
+
+from app.models.base import BaseModel
+
+
+class OCRResultCache(BaseModel):
+    __tablename__ = "ocr_result_cache"
+
+    image_sha256 = Column(String(64), nullable=False)
+    params_hash = Column(String(64), nullable=False)
+    response = Column(JSON, nullable=False)  # OCR service /process response
+    hits = Column(Integer, nullable=False, default=0)
+    last_hit_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("image_sha256", "params_hash", name="uq_ocr_result_cache_image_params"),
+    )
+
+    def __repr__(self):
+        return f"<OCRResultCache(image_sha256={self.image_sha256[:12]}, params_hash={self.params_hash}, hits={self.hits})>"
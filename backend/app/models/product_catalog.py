@@ -6,7 +6,7 @@ Each house has its own product catalog. Products with house_id=null are global t
 Stores product information for faster lookups and offline access.
 """
 
-from sqlalchemy import Column, String, Text, Float, JSON, ForeignKey, Boolean
+from sqlalchemy import Column, String, Text, Float, JSON, ForeignKey, Boolean, Index, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
@@ -120,5 +120,15 @@ class ProductCatalog(BaseModel):
         back_populates="products"
     )
 
+    __table_args__ = (
+        # Products of a house by normalized name (known barcode index
+        # maintenance); same expression as known_barcode_service
+        Index(
+            'idx_product_catalog_house_name_key',
+            'house_id',
+            func.substr(func.lower(func.trim(name)), 1, 255),
+        ),
+    )
+
     def __repr__(self):
         return f"<ProductCatalog(barcode={self.barcode}, name='{self.name}')>"
@@ -0,0 +1,55 @@
+"""
+Receipt Line Memory Model
+
+Receipt lines already confirmed by the user, per house and store:
+"LAT PS" at this store is "Latte parzialmente scremato". Filled in when a
+match is confirmed on a receipt item, read first by reconciliation so
+known lines skip fuzzy matching and the LLM.
+
+line_key is the normalized receipt line (parsed name, or raw text).
+store_id=null is used for lists without a store.
+"""
+
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.models.base import BaseModel
+
+
+class ReceiptLineMemory(BaseModel):
+    __tablename__ = "receipt_line_memory"
+
+    house_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("houses.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    store_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("stores.id", ondelete="CASCADE"),
+        nullable=True
+    )
+    line_key = Column(String(255), nullable=False)
+
+    # Confirmed product: shopping list item name (and Grocy product, if linked)
+    product_name = Column(String(255), nullable=False)
+    grocy_product_id = Column(Integer, nullable=True)
+
+    # Reconciliations resolved by this entry
+    hits = Column(Integer, nullable=False, default=0)
+    last_hit_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # NULL store_ids are distinct in a plain unique index: one index per case
+        Index(
+            'uq_receipt_line_memory_store_key', 'house_id', 'store_id', 'line_key',
+            unique=True, postgresql_where=text("store_id IS NOT NULL")
+        ),
+        Index(
+            'uq_receipt_line_memory_nostore_key', 'house_id', 'line_key',
+            unique=True, postgresql_where=text("store_id IS NULL")
+        ),
+    )
+
+    def __repr__(self):
+        return f"<ReceiptLineMemory(store_id={self.store_id}, line_key='{self.line_key}', product_name='{self.product_name}')>"
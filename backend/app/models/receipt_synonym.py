@@ -0,0 +1,43 @@
+"""
+Receipt Synonym Model
+
+Product name synonyms used when matching receipt lines to shopping list
+items ("mozz" -> "mozzarella"). Dictionaries are layered:
+
+- house_id=null, store_id=null: global dictionary (seeded with the
+  built-in Italian synonyms)
+- house_id set, store_id=null: additions for one house
+- house_id and store_id set: abbreviations printed by one store
+
+base is the canonical word, synonym one of its variants. Both are stored
+normalized (lowercase, no accents).
+"""
+
+from sqlalchemy import Column, String, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.models.base import BaseModel
+
+
+class ReceiptSynonym(BaseModel):
+    __tablename__ = "receipt_synonyms"
+
+    house_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("houses.id", ondelete="CASCADE"),
+        nullable=True
+    )
+    store_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("stores.id", ondelete="CASCADE"),
+        nullable=True
+    )
+    base = Column(String(100), nullable=False)
+    synonym = Column(String(100), nullable=False)
+
+    __table_args__ = (
+        Index('idx_receipt_synonyms_scope', 'house_id', 'store_id'),
+    )
+
+    def __repr__(self):
+        return f"<ReceiptSynonym(house_id={self.house_id}, store_id={self.store_id}, '{self.base}' <- '{self.synonym}')>"
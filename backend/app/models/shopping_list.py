@@ -9,7 +9,7 @@ Features:
 - Barcode scanning support for load verification
 """
 
-from sqlalchemy import Column, String, ForeignKey, Integer, Boolean, Enum as SQLEnum, DateTime, Float, Date
+from sqlalchemy import Column, String, ForeignKey, Integer, Boolean, Enum as SQLEnum, DateTime, Float, Date, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import enum
@@ -109,6 +109,11 @@ class ShoppingList(BaseModel):
         order_by="Receipt.created_at"
     )
 
+    __table_args__ = (
+        # Keyset pagination of a house's lists (newest first)
+        Index('idx_shopping_lists_house_created', 'house_id', 'created_at', 'id'),
+    )
+
     def __repr__(self):
         return f"<ShoppingList(id={self.id}, name='{self.name}', status={self.status})>"
 
@@ -0,0 +1,39 @@
+"""
+Store Item Order Model
+
+Learned picking order of items in a store, merged across all completed
+shopping trips. Updated when a list is completed, read when a list is shown.
+
+item_key is the lowercased item name, or "grocy:<product_id>" for items
+linked to a Grocy product.
+"""
+
+from sqlalchemy import Column, String, Integer, Float, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.models.base import BaseModel
+
+
+class StoreItemOrder(BaseModel):
+    __tablename__ = "store_item_order"
+
+    store_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("stores.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    item_key = Column(String(255), nullable=False)
+
+    # Average normalized check position (0 = first checked, 1 = last)
+    avg_position = Column(Float, nullable=False)
+    # Number of trips that contributed to avg_position
+    trips = Column(Integer, nullable=False, default=1)
+    # Last list merged in (every merged list is in store_order_merged_lists)
+    last_list_id = Column(UUID(as_uuid=True), nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("store_id", "item_key", name="uq_store_item_order_store_key"),
+    )
+
+    def __repr__(self):
+        return f"<StoreItemOrder(store_id={self.store_id}, item_key='{self.item_key}', avg_position={self.avg_position:.3f})>"
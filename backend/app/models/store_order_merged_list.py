@@ -0,0 +1,33 @@
+"""
+Store Order Merged List Model
+
+Shopping lists already merged into a store's learned picking order.
+Completing a list again (after reopening it) doesn't count its trip twice.
+"""
+
+from sqlalchemy import Column, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.models.base import BaseModel
+
+
+class StoreOrderMergedList(BaseModel):
+    __tablename__ = "store_order_merged_lists"
+
+    store_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("stores.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    list_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("shopping_lists.id", ondelete="CASCADE"),
+        nullable=False
+    )
+
+    __table_args__ = (
+        UniqueConstraint("store_id", "list_id", name="uq_store_order_merged_lists_store_list"),
+    )
+
+    def __repr__(self):
+        return f"<StoreOrderMergedList(store_id={self.store_id}, list_id={self.list_id})>"
@@ -104,6 +104,17 @@ class ReceiptResponse(BaseModel):
         from_attributes = True
 
 
+class ReceiptProcessingStatus(BaseModel):
+    """Schema for the state of a receipt processing job"""
+    receipt_id: UUID
+    receipt_status: ReceiptStatusEnum
+    job_id: Optional[UUID] = None
+    job_status: Optional[str] = Field(None, description="pending, running, done, failed")
+    progress: Optional[dict] = Field(None, description="Current stage (ocr, llm_parse, items) and per-image progress")
+    error: Optional[str] = None
+    finished: bool = Field(False, description="True when there is nothing left to wait for")
+
+
 class ReceiptSummary(BaseModel):
     """Schema for receipt summary (without items)"""
     id: UUID
@@ -157,6 +168,28 @@ class ReconciliationResponse(BaseModel):
     missing_items: List[dict] = Field(default=[], description="Shopping list items not found on receipt")
 
 
+# Synonym Schemas
+
+class ReceiptSynonymCreate(BaseModel):
+    """Schema for adding a synonym to a house (or store) dictionary"""
+    base: str = Field(..., min_length=1, max_length=100, description="Canonical word (e.g., mozzarella)")
+    synonym: str = Field(..., min_length=1, max_length=100, description="Variant printed on receipts (e.g., mozz)")
+    store_id: Optional[UUID] = Field(None, description="Only for receipts of this store")
+
+
+class ReceiptSynonymResponse(BaseModel):
+    """Schema for a synonym dictionary entry"""
+    id: UUID
+    house_id: Optional[UUID] = None
+    store_id: Optional[UUID] = None
+    base: str
+    synonym: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 # Shopping List Item Status
 
 class ShoppingListItemMatch(BaseModel):
@@ -164,6 +164,7 @@ class ShoppingListsResponse(BaseModel):
     total: int
     limit: int
     offset: int
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page (None on the last page)")
 
 
 # Barcode Scan Schemas
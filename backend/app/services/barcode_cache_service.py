@@ -0,0 +1,284 @@
+"""
+Barcode Cache Service
+
+Two-level cache in front of the barcode lookup sources:
+- In-process LRU (per worker) for repeat scans within minutes
+- barcode_lookup_cache table shared by all workers and restarts
+
+Entries are keyed by (source_code, barcode). A found product is kept for
+BARCODE_CACHE_TTL_DAYS, a "not found" answer for BARCODE_CACHE_NEGATIVE_TTL_HOURS.
+Transient failures (timeouts, connection errors, rate limiting, server
+errors) are never cached.
+
+Purges reach every worker through a shared generation counter
+(cache_generations): purge_cache bumps it, and each worker drops its LRU
+when it sees a new generation, checked at most every
+BARCODE_CACHE_SYNC_SECONDS.
+"""
+
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.barcode_lookup_cache import BarcodeLookupCache
+from app.models.cache_generation import CacheGeneration
+
+logger = logging.getLogger(__name__)
+
+# Cache key for full Open Food Facts responses (used by ProductNutrition)
+OFF_FULL_SOURCE_CODE = "openfoodfacts:full"
+
+# (source_code, barcode) -> (expires_at, found, response)
+_lru: "OrderedDict[Tuple[str, str], Tuple[datetime, bool, Optional[dict]]]" = OrderedDict()
+_lru_lock = threading.Lock()
+
+# Shared generation the LRU was filled under, and when it was last checked
+CACHE_GENERATION_NAME = "barcode_lookup_cache"
+_generation: Optional[int] = None
+_generation_checked_at = 0.0
+
+_stats = {
+    "memory_hits": 0,
+    "db_hits": 0,
+    "negative_hits": 0,
+    "misses": 0,
+    "stores": 0,
+}
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _not_found_response(barcode: str) -> dict:
+    return {"found": False, "barcode": barcode}
+
+
+def _lru_get(key: Tuple[str, str]):
+    with _lru_lock:
+        entry = _lru.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= _now():
+            del _lru[key]
+            return None
+        _lru.move_to_end(key)
+        return entry
+
+
+def _lru_put(key: Tuple[str, str], entry) -> None:
+    with _lru_lock:
+        _lru[key] = entry
+        _lru.move_to_end(key)
+        while len(_lru) > settings.BARCODE_CACHE_LRU_SIZE:
+            _lru.popitem(last=False)
+
+
+def _sync_generation() -> None:
+    """Drop the LRU if another worker purged the cache since the last check."""
+    global _generation, _generation_checked_at
+
+    now = time.monotonic()
+    with _lru_lock:
+        if now - _generation_checked_at < settings.BARCODE_CACHE_SYNC_SECONDS:
+            return
+        _generation_checked_at = now
+
+    db = SessionLocal()
+    try:
+        generation = db.query(CacheGeneration.generation).filter(
+            CacheGeneration.name == CACHE_GENERATION_NAME
+        ).scalar() or 0
+    except Exception as e:
+        logger.warning(f"[BarcodeCache] Generation check failed: {e}")
+        return
+    finally:
+        db.close()
+
+    with _lru_lock:
+        if _generation is not None and generation != _generation:
+            _lru.clear()
+            logger.info(f"[BarcodeCache] Generation {_generation} -> {generation}: in-process cache dropped")
+        _generation = generation
+
+
+def _bump_generation(db: Session) -> None:
+    """Tell every worker to drop its LRU. Does not commit."""
+    stmt = insert(CacheGeneration).values(name=CACHE_GENERATION_NAME, generation=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={"generation": CacheGeneration.generation + 1, "updated_at": func.now()},
+    )
+    db.execute(stmt)
+
+
+def _count(stat: str) -> None:
+    with _lru_lock:
+        _stats[stat] += 1
+
+
+def get_cached_lookup(db: Session, source_code: str, barcode: str) -> Optional[dict]:
+    """
+    Return the cached response for (source_code, barcode), or None on a miss.
+
+    Negative entries return a {"found": False} response, so callers can tell
+    "known not found" (dict) apart from "not cached" (None).
+    """
+    key = (source_code, barcode)
+
+    _sync_generation()
+    entry = _lru_get(key)
+    if entry is not None:
+        _count("memory_hits")
+    else:
+        row = db.query(BarcodeLookupCache).filter(
+            BarcodeLookupCache.source_code == source_code,
+            BarcodeLookupCache.barcode == barcode,
+            BarcodeLookupCache.expires_at > _now(),
+        ).first()
+        if row is None:
+            _count("misses")
+            return None
+        entry = (row.expires_at, row.found, row.response)
+        _lru_put(key, entry)
+        _count("db_hits")
+
+    _, found, response = entry
+    if not found:
+        _count("negative_hits")
+        return _not_found_response(barcode)
+
+    return copy.deepcopy(response)
+
+
+def store_lookup(source_code: str, barcode: str, result: dict) -> None:
+    """
+    Cache a source response.
+
+    Uses its own session so the caller's transaction is never committed as a
+    side effect. Responses carrying an "error" (timeout, unreachable server)
+    are skipped: they say nothing about the barcode.
+    """
+    if result.get("error"):
+        return
+
+    found = bool(result.get("found"))
+    if found:
+        expires_at = _now() + timedelta(days=settings.BARCODE_CACHE_TTL_DAYS)
+        response = result
+    else:
+        expires_at = _now() + timedelta(hours=settings.BARCODE_CACHE_NEGATIVE_TTL_HOURS)
+        response = None
+
+    _lru_put((source_code, barcode), (expires_at, found, copy.deepcopy(response)))
+    _count("stores")
+
+    db = SessionLocal()
+    try:
+        stmt = insert(BarcodeLookupCache).values(
+            source_code=source_code,
+            barcode=barcode,
+            found=found,
+            response=response,
+            expires_at=expires_at,
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_barcode_lookup_cache_source_barcode",
+            set_={
+                "found": stmt.excluded.found,
+                "response": stmt.excluded.response,
+                "expires_at": stmt.excluded.expires_at,
+                "updated_at": func.now(),
+            },
+        )
+        db.execute(stmt)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"[BarcodeCache] Failed to store {source_code}/{barcode}: {e}")
+    finally:
+        db.close()
+
+
+def purge_cache(
+    db: Session,
+    barcode: Optional[str] = None,
+    source_code: Optional[str] = None,
+    expired_only: bool = False,
+) -> int:
+    """
+    Delete cache entries matching the filters (all entries if none given).
+
+    Returns:
+        Number of DB rows deleted
+    """
+    query = db.query(BarcodeLookupCache)
+    if barcode:
+        query = query.filter(BarcodeLookupCache.barcode == barcode)
+    if source_code:
+        query = query.filter(BarcodeLookupCache.source_code == source_code)
+    if expired_only:
+        query = query.filter(BarcodeLookupCache.expires_at <= _now())
+
+    deleted = query.delete(synchronize_session=False)
+    if not expired_only:
+        # Expired entries are dropped by every LRU on its own
+        _bump_generation(db)
+    db.commit()
+
+    with _lru_lock:
+        if expired_only:
+            now = _now()
+            stale = [k for k, v in _lru.items() if v[0] <= now]
+        else:
+            stale = [
+                k for k in _lru
+                if (not source_code or k[0] == source_code) and (not barcode or k[1] == barcode)
+            ]
+        for key in stale:
+            del _lru[key]
+
+    logger.info(f"[BarcodeCache] Purged {deleted} entries (barcode={barcode}, source={source_code}, expired_only={expired_only})")
+    return deleted
+
+
+def get_cache_stats(db: Session) -> dict:
+    """Hit rates for this worker plus entry counts from the shared table."""
+    with _lru_lock:
+        counters = dict(_stats)
+        memory_entries = len(_lru)
+
+    hits = counters["memory_hits"] + counters["db_hits"]
+    lookups = hits + counters["misses"]
+
+    now = _now()
+    total = db.query(func.count(BarcodeLookupCache.id)).scalar() or 0
+    positive = db.query(func.count(BarcodeLookupCache.id)).filter(
+        BarcodeLookupCache.found == True,
+        BarcodeLookupCache.expires_at > now,
+    ).scalar() or 0
+    negative = db.query(func.count(BarcodeLookupCache.id)).filter(
+        BarcodeLookupCache.found == False,
+        BarcodeLookupCache.expires_at > now,
+    ).scalar() or 0
+
+    return {
+        **counters,
+        "lookups": lookups,
+        "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        "memory_entries": memory_entries,
+        "db_entries": total,
+        "db_positive_entries": positive,
+        "db_negative_entries": negative,
+        "db_expired_entries": total - positive - negative,
+    }
@@ -3,14 +3,34 @@ Barcode Source Service
 
 Manages barcode lookup sources and the fallback chain.
 Seeds hardcoded sources at startup, provides chain lookup across all active sources.
+Source responses are cached per (source, barcode), see barcode_cache_service.
+
+Lookup strategies:
+- sequential: try sources one at a time in sort_order (default)
+- race: query all sources at once, keep the highest-priority hit and cancel
+  the rest as soon as it is known
+
+Every source gets its own timeout budget and a circuit breaker: after
+repeated failures (timeouts, unreachable server, 5xx) the source is skipped
+for a cool-down period, then retried once to probe recovery.
+
+A miss on which every source failed or was skipped carries an "error": the
+barcode is unknown only for now, and callers should not record it as
+not found.
 """
 
+import asyncio
 import logging
+import threading
+import time
+from typing import Dict, List, Optional
 
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.models.barcode_source import BarcodeLookupSource
-from app.integrations.barcode_client import GenericBarcodeClient
+from app.integrations.barcode_client import GenericBarcodeClient, parse_off_response
+from app.services.barcode_cache_service import get_cached_lookup, store_lookup
 
 logger = logging.getLogger(__name__)
 
@@ -75,26 +95,273 @@ def seed_hardcoded_sources(db: Session):
         logger.info("[BarcodeSource] All hardcoded sources already present")
 
 
-async def lookup_barcode_chain(db: Session, barcode: str) -> dict:
+class SourceCircuitBreaker:
+    """
+    Per-source circuit breaker (in-process).
+
+    closed:    requests flow, consecutive failures are counted
+    open:      source skipped until the cool-down expires
+    half-open: after cool-down one request is let through; success closes
+               the breaker, failure opens it again
+    """
+
+    def __init__(self, failure_threshold: int, cooldown_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._probing: set = set()
+        self._lock = threading.Lock()
+
+    def allow(self, source_code: str) -> bool:
+        """Return True if the source may be queried now."""
+        with self._lock:
+            opened_at = self._opened_at.get(source_code)
+            if opened_at is None:
+                return True
+            if time.monotonic() - opened_at < self.cooldown_seconds:
+                return False
+            # Half-open: let a single probe through
+            if source_code in self._probing:
+                return False
+            self._probing.add(source_code)
+            return True
+
+    def record_success(self, source_code: str) -> None:
+        with self._lock:
+            self._failures.pop(source_code, None)
+            self._opened_at.pop(source_code, None)
+            self._probing.discard(source_code)
+
+    def record_failure(self, source_code: str) -> None:
+        with self._lock:
+            self._probing.discard(source_code)
+            failures = self._failures.get(source_code, 0) + 1
+            self._failures[source_code] = failures
+            if failures >= self.failure_threshold:
+                if source_code not in self._opened_at:
+                    logger.warning(f"[BarcodeChain] Circuit opened for {source_code} after {failures} failures")
+                self._opened_at[source_code] = time.monotonic()
+
+    def release(self, source_code: str) -> None:
+        """Forget an in-flight probe that was cancelled before completing."""
+        with self._lock:
+            self._probing.discard(source_code)
+
+    def get_state(self) -> Dict[str, dict]:
+        with self._lock:
+            now = time.monotonic()
+            state = {}
+            for code in set(self._failures) | set(self._opened_at):
+                opened_at = self._opened_at.get(code)
+                if opened_at is None:
+                    status = "closed"
+                    retry_in = None
+                elif now - opened_at < self.cooldown_seconds:
+                    status = "open"
+                    retry_in = round(self.cooldown_seconds - (now - opened_at), 1)
+                else:
+                    status = "half_open"
+                    retry_in = 0
+                state[code] = {
+                    "status": status,
+                    "consecutive_failures": self._failures.get(code, 0),
+                    "retry_in_seconds": retry_in,
+                }
+            return state
+
+
+source_breaker = SourceCircuitBreaker(
+    failure_threshold=settings.BARCODE_BREAKER_FAILURE_THRESHOLD,
+    cooldown_seconds=settings.BARCODE_BREAKER_COOLDOWN_SECONDS,
+)
+
+
+async def _query_source(source: BarcodeLookupSource, barcode: str) -> dict:
+    """
+    Query a single source within its time budget and update its breaker.
+    The response is written to the lookup cache.
+    """
+    timeout = settings.BARCODE_SOURCE_TIMEOUT
+    try:
+        result = await asyncio.wait_for(
+            GenericBarcodeClient.lookup(source.base_url, source.api_path, barcode, timeout=timeout),
+            timeout=timeout,
+        )
+    except asyncio.TimeoutError:
+        result = parse_off_response({}, barcode)
+        result["error"] = "Timeout connessione"
+    except asyncio.CancelledError:
+        source_breaker.release(source.code)
+        raise
+
+    if result.get("error"):
+        source_breaker.record_failure(source.code)
+    else:
+        source_breaker.record_success(source.code)
+
+    store_lookup(source.code, barcode, result)
+    return result
+
+
+def _with_source(result: dict, source: BarcodeLookupSource) -> dict:
+    result["source_code"] = source.code
+    result["source_name"] = source.name
+    return result
+
+
+def _not_found(barcode: str, error: Optional[str] = None) -> dict:
+    result = {"found": False, "barcode": barcode, "source_code": None, "source_name": None}
+    if error:
+        result["error"] = error
+    return result
+
+
+def _chain_error(sources: List[BarcodeLookupSource], errors: Dict[str, str]) -> Optional[str]:
+    """Error for a miss on which no source gave a definite answer, else None."""
+    if not sources or len(errors) < len(sources):
+        return None
+    return "; ".join(f"{source.name}: {errors[source.code]}" for source in sources)
+
+
+async def _lookup_sequential(db: Session, sources: List[BarcodeLookupSource], barcode: str, use_cache: bool) -> dict:
+    errors: Dict[str, str] = {}
+    for source in sources:
+        result = get_cached_lookup(db, source.code, barcode) if use_cache else None
+        if result is None:
+            if not source_breaker.allow(source.code):
+                logger.info(f"[BarcodeChain] Skipping {source.name} (circuit open)")
+                errors[source.code] = "circuito aperto"
+                continue
+            logger.info(f"[BarcodeChain] Trying {source.name} for barcode {barcode}")
+            result = await _query_source(source, barcode)
+
+        if result.get("found"):
+            logger.info(f"[BarcodeChain] Found on {source.name}")
+            return _with_source(result, source)
+        if result.get("error"):
+            errors[source.code] = result["error"]
+
+    logger.info(f"[BarcodeChain] Barcode {barcode} not found on any source")
+    return _not_found(barcode, _chain_error(sources, errors))
+
+
+async def _lookup_race(db: Session, sources: List[BarcodeLookupSource], barcode: str, use_cache: bool) -> dict:
+    """
+    Query all sources concurrently.
+
+    The winner is the first source in sort_order whose answer is "found",
+    provided every higher-priority source already answered "not found".
+    Remaining requests are cancelled as soon as the winner is known.
+    """
+    # Resolve cached answers first; only misses go to the network
+    results: Dict[str, Optional[dict]] = {}
+    errors: Dict[str, str] = {}
+    tasks: Dict[asyncio.Task, BarcodeLookupSource] = {}
+    for source in sources:
+        cached = get_cached_lookup(db, source.code, barcode) if use_cache else None
+        if cached is not None:
+            results[source.code] = cached
+        elif not source_breaker.allow(source.code):
+            logger.info(f"[BarcodeChain] Skipping {source.name} (circuit open)")
+            results[source.code] = None
+            errors[source.code] = "circuito aperto"
+        else:
+            tasks[asyncio.create_task(_query_source(source, barcode))] = source
+
+    def decide() -> Optional[BarcodeLookupSource]:
+        """Return the winning source, or None if still undecided / no hit."""
+        for source in sources:
+            if source.code not in results:
+                return None
+            result = results[source.code]
+            if result and result.get("found"):
+                return source
+        return None
+
+    if tasks:
+        logger.info(f"[BarcodeChain] Racing {len(tasks)} sources for barcode {barcode}")
+
+    pending = set(tasks)
+    try:
+        while True:
+            winner = decide()
+            if winner is not None or not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                source = tasks[task]
+                try:
+                    results[source.code] = task.result()
+                except Exception as e:
+                    logger.warning(f"[BarcodeChain] {source.name} failed: {e}")
+                    results[source.code] = None
+                    errors[source.code] = str(e) or type(e).__name__
+                    continue
+                if results[source.code].get("error"):
+                    errors[source.code] = results[source.code]["error"]
+    finally:
+        for task in pending:
+            task.cancel()
+
+    if winner is not None:
+        logger.info(f"[BarcodeChain] Found on {winner.name} (race)")
+        return _with_source(results[winner.code], winner)
+
+    logger.info(f"[BarcodeChain] Barcode {barcode} not found on any source")
+    return _not_found(barcode, _chain_error(sources, errors))
+
+
+async def lookup_barcode_chain(
+    db: Session,
+    barcode: str,
+    use_cache: bool = True,
+    strategy: Optional[str] = None,
+) -> dict:
     """
     Search barcode trying all active sources in sort_order.
     Stops at the first result found.
     Returns dict with source_code and source_name indicating which source found it.
+
+    Each source is checked in the lookup cache first; cached "not found"
+    answers skip the network call too. Pass use_cache=False to force fresh
+    requests (responses are still written back to the cache).
+
+    strategy: "sequential" or "race" (default: BARCODE_LOOKUP_STRATEGY setting)
+
+    A miss carries "error" when no source gave a definite answer (all of them
+    failed, timed out or were skipped by their circuit breaker).
     """
     sources = db.query(BarcodeLookupSource).filter(
         BarcodeLookupSource.cancelled == False
     ).order_by(BarcodeLookupSource.sort_order).all()
 
-    for source in sources:
-        logger.info(f"[BarcodeChain] Trying {source.name} for barcode {barcode}")
-        result = await GenericBarcodeClient.lookup(
-            source.base_url, source.api_path, barcode
-        )
-        if result.get("found"):
-            result["source_code"] = source.code
-            result["source_name"] = source.name
-            logger.info(f"[BarcodeChain] Found on {source.name}")
-            return result
+    if (strategy or settings.BARCODE_LOOKUP_STRATEGY) == "race":
+        return await _lookup_race(db, sources, barcode, use_cache)
+    return await _lookup_sequential(db, sources, barcode, use_cache)
 
-    logger.info(f"[BarcodeChain] Barcode {barcode} not found on any source")
-    return {"found": False, "barcode": barcode, "source_code": None, "source_name": None}
+
+def get_source_health() -> Dict[str, dict]:
+    """Circuit breaker state of every source that has failed recently."""
+    return source_breaker.get_state()
+
+
+async def warm_barcode_cache(db: Session, barcodes: List[str], concurrency: int = 4) -> dict:
+    """
+    Pre-populate the lookup cache for a list of barcodes.
+
+    Returns:
+        dict with counts of found / not found barcodes
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def warm_one(barcode: str) -> bool:
+        async with semaphore:
+            result = await lookup_barcode_chain(db, barcode)
+            return bool(result.get("found"))
+
+    unique_barcodes = list(dict.fromkeys(b.strip() for b in barcodes if b and b.strip()))
+    results = await asyncio.gather(*(warm_one(b) for b in unique_barcodes))
+    found = sum(1 for r in results if r)
+
+    return {"total": len(unique_barcodes), "found": found, "not_found": len(unique_barcodes) - found}
@@ -0,0 +1,212 @@
+"""
+Catalog Batch Enrichment Service
+
+Bulk version of product enrichment for imports and pantry backfills.
+
+- Barcodes already in the catalog are resolved with one IN query
+- Unknown barcodes are looked up concurrently (bounded by a semaphore)
+- Products, barcodes and brands are written in bulk, one chunk at a time
+- Progress is reported as a stream of events (dicts)
+
+Detailed nutrition (ProductNutrition) and category tags are not fetched
+here: they need one extra request per product. The single-product
+enrichment still adds them when the barcode is scanned.
+"""
+
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.brand import Brand
+from app.models.product_barcode import ProductBarcode
+from app.models.product_catalog import ProductCatalog
+from app.services.barcode_source_service import lookup_barcode_chain
+from app.services.product_enrichment import catalog_values_from_lookup
+from app.services.known_barcode_service import index_catalog_products
+
+logger = logging.getLogger(__name__)
+
+# Lookup results written to the DB per round trip
+BATCH_WRITE_CHUNK = 50
+
+
+def _find_known_barcodes(db: Session, barcodes: List[str]) -> Dict[str, UUID]:
+    """barcode -> product_id for every barcode already in the catalog."""
+    rows = db.query(ProductBarcode.barcode, ProductBarcode.product_id).filter(
+        ProductBarcode.barcode.in_(barcodes)
+    ).all()
+    return {barcode: product_id for barcode, product_id in rows}
+
+
+def _resolve_brands(db: Session, names: List[str]) -> Dict[str, UUID]:
+    """
+    Find-or-create brands by name (case-insensitive) with two queries.
+
+    Returns:
+        lowercased name -> brand id
+    """
+    by_lower = {}
+    for name in names:
+        by_lower.setdefault(name.lower(), name)
+    if not by_lower:
+        return {}
+
+    existing = {
+        name.lower(): brand_id
+        for brand_id, name in db.query(Brand.id, Brand.name).filter(
+            func.lower(Brand.name).in_(list(by_lower))
+        ).all()
+    }
+
+    missing = [name for lower, name in by_lower.items() if lower not in existing]
+    if missing:
+        stmt = insert(Brand).values([{"name": name} for name in missing])
+        stmt = stmt.on_conflict_do_nothing(index_elements=["name"]).returning(Brand.id, Brand.name)
+        for brand_id, name in db.execute(stmt).all():
+            existing[name.lower()] = brand_id
+
+    return existing
+
+
+def _write_chunk(house_id: UUID, results: List[dict]) -> Dict[str, int]:
+    """
+    Insert products + primary barcodes for a chunk of lookup results.
+
+    Runs in a worker thread with its own session, while lookups continue on
+    the event loop. Barcodes inserted concurrently by someone else (scan
+    enrichment) are skipped and their product rows removed.
+    """
+    db = SessionLocal()
+    try:
+        return _write_rows(db, house_id, results)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _write_rows(db: Session, house_id: UUID, results: List[dict]) -> Dict[str, int]:
+    brand_ids = _resolve_brands(db, [
+        r["brand"].strip() for r in results
+        if r.get("found") and r.get("brand") and r["brand"].strip()
+    ])
+
+    product_rows = []
+    for result in results:
+        barcode = result["barcode"]
+        if result.get("found"):
+            values = catalog_values_from_lookup(barcode, result)
+            brand = (result.get("brand") or "").strip()
+            values["brand_id"] = brand_ids.get(brand.lower()) if brand else None
+        else:
+            # Minimal entry so we don't keep searching
+            values = dict(barcode=barcode, name=None, source="not_found")
+        values["house_id"] = house_id
+        product_rows.append(values)
+
+    # Same keys for every row so a single multi-row INSERT is used
+    columns = set().union(*(row.keys() for row in product_rows))
+    product_rows = [{column: row.get(column) for column in columns} for row in product_rows]
+    inserted = db.execute(
+        insert(ProductCatalog).returning(ProductCatalog.id, ProductCatalog.barcode, ProductCatalog.source),
+        product_rows,
+    ).all()
+
+    barcode_stmt = insert(ProductBarcode).values([
+        {"product_id": product_id, "barcode": barcode, "is_primary": True, "source": source}
+        for product_id, barcode, source in inserted
+    ]).on_conflict_do_nothing(index_elements=["barcode"]).returning(ProductBarcode.barcode)
+    linked = {barcode for (barcode,) in db.execute(barcode_stmt).all()}
+
+    orphans = [product_id for product_id, barcode, _ in inserted if barcode not in linked]
+    if orphans:
+        db.query(ProductCatalog).filter(ProductCatalog.id.in_(orphans)).delete(synchronize_session=False)
+
+    # Core inserts skip mapper events: index the new names explicitly
+    index_catalog_products(db.connection(), [
+        {"house_id": house_id, "name": row.get("name"), "barcode": row["barcode"]}
+        for row in product_rows if row["barcode"] in linked
+    ])
+
+    db.commit()
+
+    created = sum(1 for _, barcode, source in inserted if barcode in linked and source != "not_found")
+    not_found = sum(1 for _, barcode, source in inserted if barcode in linked and source == "not_found")
+    return {"created": created, "not_found": not_found, "skipped": len(orphans)}
+
+
+async def enrich_barcodes_batch(
+    house_id: UUID,
+    barcodes: List[str],
+    concurrency: Optional[int] = None,
+) -> AsyncIterator[dict]:
+    """
+    Enrich many barcodes at once, yielding progress events.
+
+    Uses its own session: the generator usually outlives the request
+    session when streamed to the client.
+
+    Events:
+        {"event": "start", "total", "known", "to_fetch"}
+        {"event": "progress", "done", "to_fetch", "created", "not_found", "failed", "skipped"}
+        {"event": "done", ...totals, "elapsed_seconds"}
+    """
+    started = time.monotonic()
+    unique_barcodes = list(dict.fromkeys(b.strip() for b in barcodes if b and b.strip()))
+    totals = {"created": 0, "not_found": 0, "failed": 0, "skipped": 0}
+
+    db = SessionLocal()
+    tasks: List[asyncio.Task] = []
+    try:
+        known = _find_known_barcodes(db, unique_barcodes) if unique_barcodes else {}
+        to_fetch = [b for b in unique_barcodes if b not in known]
+        yield {"event": "start", "total": len(unique_barcodes), "known": len(known), "to_fetch": len(to_fetch)}
+
+        semaphore = asyncio.Semaphore(concurrency or settings.BARCODE_BATCH_CONCURRENCY)
+
+        async def fetch(barcode: str) -> dict:
+            async with semaphore:
+                result = await lookup_barcode_chain(db, barcode)
+                result["barcode"] = barcode
+                return result
+
+        tasks = [asyncio.create_task(fetch(b)) for b in to_fetch]
+        done = 0
+        pending: List[dict] = []
+        for next_result in asyncio.as_completed(tasks):
+            result = await next_result
+            done += 1
+
+            if result.get("error") and not result.get("found"):
+                # Transient failure: leave it out so a later run retries it
+                totals["failed"] += 1
+            else:
+                pending.append(result)
+
+            if len(pending) >= BATCH_WRITE_CHUNK or (done == len(to_fetch) and pending):
+                counts = await asyncio.to_thread(_write_chunk, house_id, pending)
+                for key, value in counts.items():
+                    totals[key] += value
+                pending = []
+                yield {"event": "progress", "done": done, "to_fetch": len(to_fetch), **totals}
+    finally:
+        # Client went away or a write failed: stop outstanding lookups
+        for task in tasks:
+            task.cancel()
+        db.close()
+
+    elapsed = round(time.monotonic() - started, 2)
+    logger.info(
+        f"[BatchEnrichment] {len(unique_barcodes)} barcodes: {len(known)} known, "
+        f"{totals['created']} created, {totals['not_found']} not found, {totals['failed']} failed in {elapsed}s"
+    )
+    yield {"event": "done", "total": len(unique_barcodes), "known": len(known), **totals, "elapsed_seconds": elapsed}
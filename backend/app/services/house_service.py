@@ -26,6 +26,7 @@ from app.models.house import House
 from app.models.user_house import UserHouse
 from app.models.house_invite import HouseInvite
 from app.models.user import User
+from app.services.area_service import AreaService
 from app.schemas.house import (
     HouseCreate,
     HouseUpdate,
@@ -56,7 +57,8 @@ class HouseService:
         Steps:
         1. Create house record
         2. Add creator as OWNER in user_house table
-        3. Return created house
+        3. Seed default areas (Dispensa, Frigorifero, Congelatore)
+        4. Return created house
 
         Args:
             db: Database session
@@ -93,6 +95,9 @@ class HouseService:
         db.add(membership)
         db.flush()
 
+        # Seed default areas
+        AreaService.seed_defaults(db, house.id)
+
         return house
 
     @staticmethod
@@ -0,0 +1,468 @@
+"""
+Background Job Engine
+
+Durable, concurrent job processing on top of the background_jobs table.
+
+- Jobs survive restarts and are shared by all uvicorn workers
+- Claiming uses SELECT ... FOR UPDATE SKIP LOCKED (no job runs twice)
+- One pool of asyncio workers per process, size JOB_WORKER_CONCURRENCY
+- Retries are scheduled by moving run_after forward: a failing job never
+  sleeps inside a worker or blocks the queue
+- A running job holds a lease, renewed by a heartbeat while its handler
+  runs. Jobs abandoned by a crashed process are picked up again
+  JOB_LEASE_SECONDS after their last heartbeat, or failed if they have no
+  attempts left
+
+Handlers are registered per job kind:
+
+    async def run_my_job(payload: dict) -> Optional[dict]:
+        ...
+
+    job_engine.register("my_kind", run_my_job)
+    job_engine.enqueue(db, "my_kind", {"foo": "bar"}, dedup_key="bar")
+
+A handler raises RetryableJobError for transient failures (network, timeouts);
+any other exception fails the job immediately. Long handlers can report
+progress with `await job_engine.report_progress({...})`, stored on the job row.
+A handler whose payload can grow while it runs can lock its row with
+`lock_current_job(db)` and finish it with `finish_current_job(db, job, result)`
+in the same transaction as its last writes.
+"""
+
+import asyncio
+import contextvars
+import logging
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, or_, and_, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.background_job import BackgroundJob, JobStatus
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[dict], Awaitable[Optional[dict]]]
+# Called with (session, payload, error) when a job is failed because its worker went away
+AbandonHook = Callable[[Session, dict, str], None]
+
+# Finished jobs older than this are deleted when the engine starts
+JOB_RETENTION_DAYS = 7
+
+# Id of the job being run by the current worker task, and that worker's name
+_current_job_id: contextvars.ContextVar[Optional[UUID]] = contextvars.ContextVar("current_job_id", default=None)
+_current_worker: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_worker", default=None)
+
+
+class RetryableJobError(Exception):
+    """Raised by a handler when the job should be retried later."""
+    pass
+
+
+class JobEngine:
+    """
+    Per-process worker pool for background jobs.
+
+    Started in the FastAPI startup event, stopped on shutdown.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, JobHandler] = {}
+        self._abandon_hooks: Dict[str, AbandonHook] = {}
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._active_jobs = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def register(self, kind: str, handler: JobHandler, on_abandoned: Optional[AbandonHook] = None) -> None:
+        """
+        Register the coroutine that processes jobs of `kind`.
+
+        on_abandoned runs when a job is failed because its lease expired on
+        the last attempt (the handler never got to clean up), in the
+        transaction that fails it.
+        """
+        self._handlers[kind] = handler
+        if on_abandoned:
+            self._abandon_hooks[kind] = on_abandoned
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self, concurrency: Optional[int] = None) -> None:
+        """Spawn the worker pool on the running event loop."""
+        if self._workers:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+
+        try:
+            await asyncio.to_thread(self._prune_finished)
+        except Exception as e:
+            logger.warning(f"[Jobs] Pruning finished jobs failed: {e}")
+
+        concurrency = concurrency or settings.JOB_WORKER_CONCURRENCY
+        self._workers = [
+            asyncio.create_task(self._worker_loop(n), name=f"job-worker-{n}")
+            for n in range(concurrency)
+        ]
+        logger.info(f"[Jobs] Started {concurrency} workers for kinds: {', '.join(self._handlers) or '-'}")
+
+    async def stop(self) -> None:
+        """Cancel workers. Running jobs are released by their lease timeout."""
+        workers, self._workers = self._workers, []
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._loop = None
+
+    # ------------------------------------------------------------------
+    # Enqueue
+    # ------------------------------------------------------------------
+
+    def enqueue(
+        self,
+        db: Session,
+        kind: str,
+        payload: dict,
+        dedup_key: Optional[str] = None,
+        max_attempts: int = 3,
+    ) -> bool:
+        """
+        Insert a pending job and commit.
+
+        If dedup_key is given and an active (pending/running) job with the
+        same kind and key exists, nothing is inserted.
+
+        Safe to call from sync endpoints running in the threadpool.
+
+        Returns:
+            True if a new job was queued, False if deduplicated
+        """
+        stmt = insert(BackgroundJob).values(
+            kind=kind,
+            dedup_key=dedup_key,
+            payload=payload,
+            status=JobStatus.PENDING,
+            attempts=0,
+            max_attempts=max_attempts,
+        ).on_conflict_do_nothing(
+            index_elements=["kind", "dedup_key"],
+            index_where=text("status IN ('pending', 'running') AND dedup_key IS NOT NULL"),
+        ).returning(BackgroundJob.id)
+
+        inserted = db.execute(stmt).first() is not None
+        db.commit()
+
+        if inserted:
+            self._notify()
+        return inserted
+
+    def get_active_job(self, db: Session, kind: str, dedup_key: str) -> Optional[BackgroundJob]:
+        """The pending/running job for (kind, dedup_key), if any."""
+        return db.query(BackgroundJob).filter(
+            BackgroundJob.kind == kind,
+            BackgroundJob.dedup_key == dedup_key,
+            BackgroundJob.status.in_([JobStatus.PENDING, JobStatus.RUNNING]),
+        ).first()
+
+    def get_latest_job(self, db: Session, kind: str, dedup_key: str) -> Optional[BackgroundJob]:
+        """The most recent job for (kind, dedup_key), in any state."""
+        return db.query(BackgroundJob).filter(
+            BackgroundJob.kind == kind,
+            BackgroundJob.dedup_key == dedup_key,
+        ).order_by(BackgroundJob.created_at.desc()).first()
+
+    def _notify(self) -> None:
+        """Wake idle workers in this process (thread-safe)."""
+        loop, event = self._loop, self._wakeup
+        if loop is None or event is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:
+            pass
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    async def _worker_loop(self, n: int) -> None:
+        worker_name = f"{self._worker_id}#{n}"
+        while True:
+            try:
+                claimed = await asyncio.to_thread(self._claim_next, worker_name)
+                if claimed is None:
+                    await self._wait_for_work()
+                    continue
+
+                job_id, kind, payload, attempts, max_attempts = claimed
+                await self._run_job(job_id, kind, payload, attempts, max_attempts, worker_name)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[Jobs] Worker {worker_name} error: {e}")
+                await asyncio.sleep(1)  # Prevent tight loop on persistent errors
+
+    async def _wait_for_work(self) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=settings.JOB_POLL_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _run_job(
+        self, job_id: UUID, kind: str, payload: dict, attempts: int, max_attempts: int, worker_name: str
+    ) -> None:
+        handler = self._handlers[kind]
+        self._active_jobs += 1
+        _current_job_id.set(job_id)
+        _current_worker.set(worker_name)
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, worker_name))
+        try:
+            result = await handler(payload)
+        except RetryableJobError as e:
+            if attempts < max_attempts:
+                delay = 2 ** attempts  # 2s, 4s, ... (2s and 4s with the default 3 attempts)
+                logger.info(f"[Jobs] {kind} {job_id} retry {attempts}/{max_attempts} in {delay}s: {e}")
+                await asyncio.to_thread(self._reschedule, job_id, worker_name, str(e), delay)
+            else:
+                logger.warning(f"[Jobs] {kind} {job_id} failed after {attempts} attempts: {e}")
+                await asyncio.to_thread(self._mark_failed, job_id, worker_name, str(e))
+        except Exception as e:
+            logger.error(f"[Jobs] {kind} {job_id} failed: {e}")
+            await asyncio.to_thread(self._mark_failed, job_id, worker_name, str(e))
+        else:
+            await asyncio.to_thread(self._mark_done, job_id, worker_name, result)
+        finally:
+            heartbeat.cancel()
+            self._active_jobs -= 1
+            _current_job_id.set(None)
+            _current_worker.set(None)
+
+    async def _heartbeat(self, job_id: UUID, worker_name: str) -> None:
+        """Renew the lease of a running job until cancelled."""
+        interval = max(1.0, settings.JOB_LEASE_SECONDS / 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self._renew_lease, job_id, worker_name)
+            except Exception as e:
+                logger.warning(f"[Jobs] Heartbeat for {job_id} failed: {e}")
+
+    async def report_progress(self, progress: dict) -> None:
+        """
+        Store progress for the job being run by the calling handler.
+
+        No-op outside a job, so handlers can also be called directly.
+        """
+        job_id = _current_job_id.get()
+        if job_id is None:
+            return
+        try:
+            await asyncio.to_thread(
+                self._update_job, job_id, *self._owned_by(_current_worker.get()),
+                progress=progress, heartbeat_at=datetime.now(timezone.utc)
+            )
+        except Exception as e:
+            logger.warning(f"[Jobs] Progress update for {job_id} failed: {e}")
+
+    def lock_current_job(self, db: Session) -> Optional[BackgroundJob]:
+        """
+        Lock the row of the job being run by the calling handler, in the caller's transaction.
+
+        Returns None outside a job, or when the job was re-claimed by another
+        worker after this one's lease expired. Writers that lock the row to
+        change its payload wait until the caller commits.
+        """
+        job_id = _current_job_id.get()
+        if job_id is None:
+            return None
+        return db.query(BackgroundJob).filter(
+            BackgroundJob.id == job_id, *self._owned_by(_current_worker.get())
+        ).with_for_update().first()
+
+    def finish_current_job(self, db: Session, job: Optional[BackgroundJob], result: Optional[dict]) -> None:
+        """
+        Mark a job locked with lock_current_job done, committed with the caller's transaction.
+
+        The engine then leaves the row as it is when the handler returns.
+        """
+        if job is None:
+            return
+        job.status = JobStatus.DONE
+        job.result = result
+        job.last_error = None
+        job.locked_by = None
+        job.finished_at = datetime.now(timezone.utc)
+
+    # ------------------------------------------------------------------
+    # DB operations (sync, run in a thread)
+    # ------------------------------------------------------------------
+
+    def _claim_next(self, worker_name: str) -> Optional[Tuple[UUID, str, dict, int, int]]:
+        """Claim the next runnable job for a registered kind."""
+        if not self._handlers:
+            return None
+
+        now = datetime.now(timezone.utc)
+        lease_expired = now - timedelta(seconds=settings.JOB_LEASE_SECONDS)
+
+        db = SessionLocal()
+        try:
+            while True:
+                job = db.query(BackgroundJob).filter(
+                    BackgroundJob.kind.in_(list(self._handlers)),
+                    or_(
+                        and_(BackgroundJob.status == JobStatus.PENDING, BackgroundJob.run_after <= now),
+                        and_(
+                            BackgroundJob.status == JobStatus.RUNNING,
+                            func.coalesce(BackgroundJob.heartbeat_at, BackgroundJob.started_at) < lease_expired,
+                        ),
+                    ),
+                ).order_by(BackgroundJob.run_after).limit(1).with_for_update(skip_locked=True).first()
+
+                if job is None:
+                    db.rollback()
+                    return None
+
+                if job.status == JobStatus.RUNNING and job.attempts >= job.max_attempts:
+                    # Abandoned on its last attempt: don't run it again
+                    logger.warning(f"[Jobs] {job.kind} {job.id} lease expired after {job.attempts} attempts")
+                    job.status = JobStatus.FAILED
+                    job.last_error = f"Lease expired (worker {job.locked_by}) after {job.attempts} attempts"
+                    job.locked_by = None
+                    job.finished_at = now
+                    self._run_abandon_hook(db, job)
+                    db.commit()
+                    continue
+
+                job.status = JobStatus.RUNNING
+                job.attempts += 1
+                job.locked_by = worker_name
+                job.started_at = now
+                job.heartbeat_at = now
+                db.commit()
+                return job.id, job.kind, dict(job.payload or {}), job.attempts, job.max_attempts
+        finally:
+            db.close()
+
+    def _run_abandon_hook(self, db: Session, job: BackgroundJob) -> None:
+        hook = self._abandon_hooks.get(job.kind)
+        if hook is None:
+            return
+        try:
+            with db.begin_nested():
+                hook(db, dict(job.payload or {}), job.last_error)
+        except Exception as e:
+            logger.error(f"[Jobs] Abandon hook for {job.kind} {job.id} failed: {e}")
+
+    @staticmethod
+    def _owned_by(worker_name: str) -> tuple:
+        """Conditions matching a job only while worker_name still runs it."""
+        return (BackgroundJob.status == JobStatus.RUNNING, BackgroundJob.locked_by == worker_name)
+
+    def _renew_lease(self, job_id: UUID, worker_name: str) -> None:
+        db = SessionLocal()
+        try:
+            db.query(BackgroundJob).filter(
+                BackgroundJob.id == job_id, *self._owned_by(worker_name)
+            ).update({BackgroundJob.heartbeat_at: datetime.now(timezone.utc)}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def _update_job(self, job_id: UUID, *conditions, **fields) -> None:
+        db = SessionLocal()
+        try:
+            db.query(BackgroundJob).filter(BackgroundJob.id == job_id, *conditions).update(
+                fields, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    # The updates below only apply while this worker still owns the job: not
+    # after its handler finished it, nor once it was re-claimed elsewhere
+
+    def _mark_done(self, job_id: UUID, worker_name: str, result: Optional[dict]) -> None:
+        self._update_job(
+            job_id,
+            *self._owned_by(worker_name),
+            status=JobStatus.DONE,
+            result=result,
+            last_error=None,
+            locked_by=None,
+            finished_at=datetime.now(timezone.utc),
+        )
+
+    def _mark_failed(self, job_id: UUID, worker_name: str, error: str) -> None:
+        self._update_job(
+            job_id,
+            *self._owned_by(worker_name),
+            status=JobStatus.FAILED,
+            last_error=error[:2000],
+            locked_by=None,
+            finished_at=datetime.now(timezone.utc),
+        )
+
+    def _reschedule(self, job_id: UUID, worker_name: str, error: str, delay_seconds: float) -> None:
+        self._update_job(
+            job_id,
+            *self._owned_by(worker_name),
+            status=JobStatus.PENDING,
+            last_error=error[:2000],
+            locked_by=None,
+            run_after=datetime.now(timezone.utc) + timedelta(seconds=delay_seconds),
+        )
+
+    def _prune_finished(self) -> None:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=JOB_RETENTION_DAYS)
+        db = SessionLocal()
+        try:
+            deleted = db.query(BackgroundJob).filter(
+                BackgroundJob.status.in_([JobStatus.DONE, JobStatus.FAILED]),
+                BackgroundJob.finished_at < cutoff,
+            ).delete(synchronize_session=False)
+            db.commit()
+            if deleted:
+                logger.info(f"[Jobs] Pruned {deleted} finished jobs")
+        finally:
+            db.close()
+
+    # ------------------------------------------------------------------
+    # Status
+    # ------------------------------------------------------------------
+
+    def get_status(self, db: Session, kind: Optional[str] = None) -> dict:
+        """Job counts by status (all processes) plus this process' workers."""
+        query = db.query(BackgroundJob.status, func.count(BackgroundJob.id))
+        if kind:
+            query = query.filter(BackgroundJob.kind == kind)
+        counts = {status.value: 0 for status in JobStatus}
+        for status, count in query.group_by(BackgroundJob.status).all():
+            counts[status.value if isinstance(status, JobStatus) else status] = count
+
+        return {
+            **counts,
+            "workers": len(self._workers),
+            "active_in_process": self._active_jobs,
+        }
+
+
+# Application-wide singleton
+job_engine = JobEngine()
@@ -0,0 +1,246 @@
+"""
+Known Barcode Service
+
+Maintains the known_barcodes index (item name -> barcode per house) and
+answers lookups for the items of a shopping list.
+
+The index is kept up to date by mapper events, in the same transaction as
+the change that triggers them:
+- a shopping list item gets a scanned barcode (verification)
+- a primary ProductBarcode is added, changed or deleted
+- a catalog product is renamed, cancelled, moved to another house or deleted
+
+Catalog entries are rebuilt per (house, name) from all the products with
+that name, so removing one product never drops another one's entry.
+
+Core bulk statements bypass mapper events: callers index those rows
+explicitly with index_catalog_products (see catalog_batch_service) or
+reindex_catalog_products (bulk house_id updates).
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+
+from sqlalchemy import event, func, inspect, or_, select, delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.models.known_barcode import KnownBarcode
+from app.models.product_barcode import ProductBarcode
+from app.models.product_catalog import ProductCatalog
+from app.models.shopping_list import ShoppingList, ShoppingListItem
+from app.services.store_order_service import item_order_keys
+
+logger = logging.getLogger(__name__)
+
+SOURCE_SCAN = "scan"
+SOURCE_CATALOG = "catalog"
+
+
+def _name_key(name: str) -> str:
+    return name.lower().strip()[:255]
+
+
+def upsert_known_barcodes(conn: Connection, rows: List[dict]) -> None:
+    """
+    Insert or overwrite index rows (dicts with house_id, item_key, source, barcode).
+
+    House rows and global rows (house_id=None) have separate unique indexes,
+    so they are written with separate statements.
+    """
+    # Last row wins for duplicate keys within the batch
+    by_key = {(r["house_id"], r["item_key"], r["source"]): r for r in rows}
+    house_rows = [r for r in by_key.values() if r["house_id"] is not None]
+    global_rows = [r for r in by_key.values() if r["house_id"] is None]
+
+    for batch, index_elements, where in (
+        (house_rows, ["house_id", "item_key", "source"], KnownBarcode.house_id.isnot(None)),
+        (global_rows, ["item_key", "source"], KnownBarcode.house_id.is_(None)),
+    ):
+        if not batch:
+            continue
+        stmt = insert(KnownBarcode).values(batch)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=index_elements,
+            index_where=where,
+            set_={"barcode": stmt.excluded.barcode, "updated_at": func.now()},
+        )
+        conn.execute(stmt)
+
+
+def index_catalog_products(conn: Connection, products: Iterable[dict]) -> None:
+    """Index catalog products given as dicts with house_id, name, barcode."""
+    rows = [
+        {"house_id": p["house_id"], "item_key": _name_key(p["name"]), "source": SOURCE_CATALOG, "barcode": p["barcode"]}
+        for p in products
+        if p.get("name") and p["name"].strip() and p.get("barcode")
+    ]
+    if rows:
+        upsert_known_barcodes(conn, rows)
+
+
+def get_known_barcodes_map(db: Session, house_id: UUID, item_keys: Iterable[str]) -> Dict[str, str]:
+    """
+    item key -> barcode for the given keys, in one indexed lookup.
+
+    A barcode scanned in the house wins over the house catalog, which wins
+    over global template products.
+    """
+    keys = list(set(item_keys))
+    if not keys:
+        return {}
+
+    rows = db.query(KnownBarcode.item_key, KnownBarcode.source, KnownBarcode.house_id, KnownBarcode.barcode).filter(
+        KnownBarcode.item_key.in_(keys),
+        or_(KnownBarcode.house_id == house_id, KnownBarcode.house_id.is_(None))
+    ).all()
+
+    def rank(row) -> int:
+        if row.source == SOURCE_SCAN:
+            return 0
+        return 1 if row.house_id is not None else 2
+
+    barcode_map: Dict[str, str] = {}
+    for row in sorted(rows, key=rank, reverse=True):
+        barcode_map[row.item_key] = row.barcode  # Best rank is written last
+    return barcode_map
+
+
+# ============================================================
+# Mapper events
+# ============================================================
+
+def _changed(target, *attrs: str) -> bool:
+    state = inspect(target)
+    return any(state.attrs[attr].history.has_changes() for attr in attrs)
+
+
+def _primary_barcode(conn: Connection, product: ProductCatalog) -> Optional[str]:
+    barcode = conn.execute(
+        select(ProductBarcode.barcode).where(
+            ProductBarcode.product_id == product.id,
+            ProductBarcode.is_primary == True
+        )
+    ).scalar()
+    return barcode or product.barcode  # Fall back to the legacy column
+
+
+def _refresh_catalog_entry(
+    conn: Connection,
+    house_id: Optional[UUID],
+    name: Optional[str],
+    prefer_product_id: Optional[UUID] = None,
+) -> None:
+    """
+    Rebuild the catalog entry of one (house, name) from the products in it.
+
+    Several products can share a name: the entry is dropped, then the first
+    live product with that name and a barcode is indexed again (the
+    preferred one, if given, is tried first).
+    """
+    if not name or not name.strip():
+        return
+    key = _name_key(name)
+    house_filter = (KnownBarcode.house_id == house_id) if house_id else KnownBarcode.house_id.is_(None)
+    conn.execute(delete(KnownBarcode).where(
+        KnownBarcode.source == SOURCE_CATALOG,
+        KnownBarcode.item_key == key,
+        house_filter,
+    ))
+
+    order = [ProductCatalog.created_at]
+    if prefer_product_id:
+        order.insert(0, (ProductCatalog.id == prefer_product_id).desc())
+    candidates = conn.execute(
+        select(ProductCatalog.id, ProductCatalog.barcode).where(
+            (ProductCatalog.house_id == house_id) if house_id else ProductCatalog.house_id.is_(None),
+            # Matches idx_product_catalog_house_name_key
+            func.substr(func.lower(func.trim(ProductCatalog.name)), 1, 255) == key,
+            ProductCatalog.cancelled == False,
+        ).order_by(*order)
+    ).all()
+    for candidate in candidates:
+        barcode = _primary_barcode(conn, candidate)
+        if barcode:
+            index_catalog_products(conn, [{"house_id": house_id, "name": name, "barcode": barcode}])
+            return
+
+
+def reindex_catalog_products(db: Session, product_ids: Iterable[UUID], old_house_id: Optional[UUID] = None) -> None:
+    """
+    Move the entries of products whose house_id was changed with a bulk
+    UPDATE (which bypasses mapper events) from old_house_id to their
+    current house. Does not commit.
+    """
+    product_ids = list(product_ids)
+    if not product_ids:
+        return
+    conn = db.connection()
+    products = conn.execute(
+        select(ProductCatalog.id, ProductCatalog.house_id, ProductCatalog.name).where(
+            ProductCatalog.id.in_(product_ids)
+        )
+    ).all()
+    for product in products:
+        _refresh_catalog_entry(conn, old_house_id, product.name)
+        _refresh_catalog_entry(conn, product.house_id, product.name, prefer_product_id=product.id)
+
+
+@event.listens_for(ShoppingListItem, "after_insert")
+@event.listens_for(ShoppingListItem, "after_update")
+def _index_scanned_item(mapper, connection: Connection, target: ShoppingListItem) -> None:
+    if not target.scanned_barcode or target.verified_at is None:
+        return
+    if not _changed(target, "scanned_barcode", "verified_at", "name", "grocy_product_id"):
+        return
+
+    house_id = connection.execute(
+        select(ShoppingList.house_id).where(ShoppingList.id == target.shopping_list_id)
+    ).scalar()
+    if house_id is None:
+        return
+
+    upsert_known_barcodes(connection, [
+        {"house_id": house_id, "item_key": key, "source": SOURCE_SCAN, "barcode": target.scanned_barcode}
+        for key in item_order_keys(target.name, target.grocy_product_id)
+    ])
+
+
+@event.listens_for(ProductBarcode, "after_insert")
+@event.listens_for(ProductBarcode, "after_update")
+@event.listens_for(ProductBarcode, "after_delete")
+def _index_primary_barcode(mapper, connection: Connection, target: ProductBarcode) -> None:
+    was_primary = True in inspect(target).attrs.is_primary.history.deleted
+    if not target.is_primary and not was_primary:
+        return
+
+    product = connection.execute(
+        select(ProductCatalog.house_id, ProductCatalog.name).where(ProductCatalog.id == target.product_id)
+    ).first()
+    if product is None:
+        return
+    _refresh_catalog_entry(connection, product.house_id, product.name, prefer_product_id=target.product_id)
+
+
+@event.listens_for(ProductCatalog, "after_update")
+def _reindex_product(mapper, connection: Connection, target: ProductCatalog) -> None:
+    if not _changed(target, "name", "cancelled", "barcode", "house_id"):
+        return
+
+    # Rebuild the entries under the old house/name, then the current one
+    state = inspect(target)
+    old_houses = state.attrs.house_id.history.deleted or [target.house_id]
+    old_names = state.attrs.name.history.deleted or [target.name]
+    for old_house_id in old_houses:
+        for old_name in old_names:
+            if (old_house_id, old_name) != (target.house_id, target.name):
+                _refresh_catalog_entry(connection, old_house_id, old_name)
+
+    _refresh_catalog_entry(connection, target.house_id, target.name, prefer_product_id=target.id)
+
+
+@event.listens_for(ProductCatalog, "after_delete")
+def _unindex_product(mapper, connection: Connection, target: ProductCatalog) -> None:
+    _refresh_catalog_entry(connection, target.house_id, target.name)
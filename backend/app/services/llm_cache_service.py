@@ -0,0 +1,309 @@
+"""
+LLM Cache Service
+
+Two-level cache of chat completion responses, used by the LLM clients:
+- In-process LRU (per worker) for retries and re-processing within minutes
+- llm_response_cache table shared by all workers and restarts
+
+Entries are keyed by connection, model, purpose, normalized messages and
+sampling parameters (see cache_key). A call is cached only when:
+- the cache is enabled and its purpose is in LLM_CACHE_PURPOSES
+- it is sampled at LLM_CACHE_MAX_TEMPERATURE or below (thinking models,
+  which sample at the provider's default, are never cached)
+
+Entries expire after LLM_CACHE_TTL_HOURS; beyond LLM_CACHE_MAX_ENTRIES the
+least recently used rows are pruned. Hits, misses and tokens saved are
+counted per purpose.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.llm_response_cache import LLMResponseCache
+
+logger = logging.getLogger(__name__)
+
+# Stores between two prunes of the table
+PRUNE_EVERY = 100
+
+# cache key -> (expires_at, response, tokens)
+_lru: "OrderedDict[str, Tuple[datetime, str, int]]" = OrderedDict()
+_lru_lock = threading.Lock()
+_stores_since_prune = 0
+
+# purpose -> counters
+_stats: dict[str, dict[str, int]] = {}
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _count(purpose: str, stat: str, amount: int = 1) -> None:
+    with _lru_lock:
+        counters = _stats.setdefault(purpose, {
+            "memory_hits": 0, "db_hits": 0, "misses": 0, "stores": 0, "skipped": 0, "tokens_saved": 0,
+        })
+        counters[stat] += amount
+
+
+def is_cacheable(purpose: str, temperature: Optional[float]) -> bool:
+    """Whether a call with this purpose and effective temperature may be cached."""
+    if not settings.LLM_CACHE_ENABLED:
+        return False
+    purposes = {p.strip() for p in settings.LLM_CACHE_PURPOSES.split(",") if p.strip()}
+    if purpose not in purposes:
+        return False
+    if temperature is None or temperature > settings.LLM_CACHE_MAX_TEMPERATURE:
+        _count(purpose, "skipped")
+        return False
+    return True
+
+
+def _normalize_content(content):
+    """Whitespace-insensitive message content (multimodal parts kept as-is)."""
+    if not isinstance(content, str):
+        return content
+    lines = [line.rstrip() for line in content.strip().splitlines()]
+    normalized = []
+    for line in lines:
+        if line or (normalized and normalized[-1]):  # Collapse runs of blank lines
+            normalized.append(line)
+    return "\n".join(normalized)
+
+
+def cache_key(
+    connection_id: str,
+    url: str,
+    model: str,
+    purpose: str,
+    messages: list[dict],
+    temperature: Optional[float],
+    max_tokens: int,
+) -> str:
+    """SHA-256 of everything that determines the response."""
+    material = {
+        "connection": connection_id,
+        "url": url,
+        "model": model,
+        "purpose": purpose,
+        "messages": [
+            {"role": message.get("role"), "content": _normalize_content(message.get("content"))}
+            for message in messages
+        ],
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+    encoded = json.dumps(material, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) when the server reports no usage."""
+    return max(1, len(text) // 4) if text else 0
+
+
+def _lru_put(key: str, entry: Tuple[datetime, str, int]) -> None:
+    with _lru_lock:
+        _lru[key] = entry
+        _lru.move_to_end(key)
+        while len(_lru) > settings.LLM_CACHE_LRU_SIZE:
+            _lru.popitem(last=False)
+
+
+def get_cached_response(key: str, purpose: str) -> Optional[str]:
+    """Cached response text, or None on a miss. Uses its own session."""
+    with _lru_lock:
+        entry = _lru.get(key)
+        if entry is not None and entry[0] <= _now():
+            del _lru[key]
+            entry = None
+        if entry is not None:
+            _lru.move_to_end(key)
+
+    if entry is not None:
+        _count(purpose, "memory_hits")
+        _count(purpose, "tokens_saved", entry[2])
+        _touch(key)
+        return entry[1]
+
+    db = SessionLocal()
+    try:
+        row = db.query(LLMResponseCache).filter(
+            LLMResponseCache.cache_key == key,
+            LLMResponseCache.expires_at > _now(),
+        ).first()
+        if row is None:
+            _count(purpose, "misses")
+            return None
+
+        tokens = row.prompt_tokens + row.completion_tokens
+        row.hits = LLMResponseCache.hits + 1
+        row.last_used_at = func.now()
+        entry = (row.expires_at, row.response, tokens)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"[LLMCache] Lookup failed for {key[:12]}: {e}")
+        return None
+    finally:
+        db.close()
+
+    _lru_put(key, entry)
+    _count(purpose, "db_hits")
+    _count(purpose, "tokens_saved", tokens)
+    return entry[1]
+
+
+def _touch(key: str) -> None:
+    """Count a memory hit on the shared row too (keeps LRU order and hit counts right)."""
+    db = SessionLocal()
+    try:
+        db.query(LLMResponseCache).filter(LLMResponseCache.cache_key == key).update(
+            {LLMResponseCache.hits: LLMResponseCache.hits + 1, LLMResponseCache.last_used_at: func.now()},
+            synchronize_session=False
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"[LLMCache] Failed to update {key[:12]}: {e}")
+    finally:
+        db.close()
+
+
+def store_response(
+    key: str,
+    connection_id: str,
+    model: str,
+    purpose: str,
+    response: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+) -> None:
+    """Cache a response. Uses its own session."""
+    global _stores_since_prune
+
+    expires_at = _now() + timedelta(hours=settings.LLM_CACHE_TTL_HOURS)
+    _lru_put(key, (expires_at, response, prompt_tokens + completion_tokens))
+    _count(purpose, "stores")
+
+    db = SessionLocal()
+    try:
+        stmt = insert(LLMResponseCache).values(
+            cache_key=key,
+            connection_id=connection_id[:100],
+            model=(model or "")[:255],
+            purpose=purpose,
+            response=response,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            last_used_at=func.now(),
+            expires_at=expires_at,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["cache_key"],
+            set_={
+                "response": stmt.excluded.response,
+                "prompt_tokens": stmt.excluded.prompt_tokens,
+                "completion_tokens": stmt.excluded.completion_tokens,
+                "last_used_at": func.now(),
+                "expires_at": stmt.excluded.expires_at,
+                "updated_at": func.now(),
+            },
+        )
+        db.execute(stmt)
+        db.commit()
+
+        with _lru_lock:
+            _stores_since_prune += 1
+            prune = _stores_since_prune >= PRUNE_EVERY
+            if prune:
+                _stores_since_prune = 0
+        if prune:
+            _prune(db)
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"[LLMCache] Failed to store {key[:12]}: {e}")
+    finally:
+        db.close()
+
+
+def _prune(db: Session) -> None:
+    """Drop expired rows, then the least recently used beyond LLM_CACHE_MAX_ENTRIES."""
+    expired = db.query(LLMResponseCache).filter(
+        LLMResponseCache.expires_at <= _now()
+    ).delete(synchronize_session=False)
+
+    keep = db.query(LLMResponseCache.id).order_by(
+        LLMResponseCache.last_used_at.desc()
+    ).limit(settings.LLM_CACHE_MAX_ENTRIES).subquery()
+    evicted = db.query(LLMResponseCache).filter(
+        LLMResponseCache.id.notin_(db.query(keep.c.id))
+    ).delete(synchronize_session=False)
+    db.commit()
+
+    if expired or evicted:
+        logger.info(f"[LLMCache] Pruned {expired} expired and {evicted} least recently used entries")
+
+
+def purge_llm_cache(db: Session, purpose: Optional[str] = None) -> int:
+    """Delete cache entries (all, or those of one purpose). Returns rows deleted."""
+    query = db.query(LLMResponseCache)
+    if purpose:
+        query = query.filter(LLMResponseCache.purpose == purpose)
+    deleted = query.delete(synchronize_session=False)
+    db.commit()
+
+    # The LRU doesn't know purposes: drop it entirely
+    with _lru_lock:
+        _lru.clear()
+
+    logger.info(f"[LLMCache] Purged {deleted} entries (purpose={purpose})")
+    return deleted
+
+
+def get_llm_cache_stats(db: Session) -> dict:
+    """Per-purpose hit rates for this worker plus entry counts and savings from the shared table."""
+    with _lru_lock:
+        counters = {purpose: dict(values) for purpose, values in _stats.items()}
+        memory_entries = len(_lru)
+
+    purposes = {}
+    for purpose, values in counters.items():
+        hits = values["memory_hits"] + values["db_hits"]
+        lookups = hits + values["misses"]
+        purposes[purpose] = {
+            **values,
+            "lookups": lookups,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+    rows = db.query(
+        LLMResponseCache.purpose,
+        func.count(LLMResponseCache.id),
+        func.coalesce(func.sum(LLMResponseCache.hits), 0),
+        func.coalesce(func.sum(
+            LLMResponseCache.hits * (LLMResponseCache.prompt_tokens + LLMResponseCache.completion_tokens)
+        ), 0),
+    ).group_by(LLMResponseCache.purpose).all()
+
+    return {
+        "enabled": settings.LLM_CACHE_ENABLED,
+        "memory_entries": memory_entries,
+        "purposes": purposes,
+        "db": {
+            purpose: {"entries": entries, "total_hits": int(hits), "tokens_saved": int(saved)}
+            for purpose, entries, hits, saved in rows
+        },
+    }
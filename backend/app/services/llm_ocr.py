@@ -16,7 +16,7 @@ from dataclasses import dataclass
 
 import httpx
 
-from app.integrations.llm import get_ocr_client, LLMClient, LLMConnection
+from app.integrations.llm import get_ocr_client, LLMClient, LLMConnection, LLMPurpose
 
 logger = logging.getLogger(__name__)
 
@@ -300,7 +300,8 @@ Rispondi SOLO con un oggetto JSON valido."""
             {"role": "user", "content": user_prompt}
         ],
         temperature=0.1,
-        max_tokens=1000
+        max_tokens=1000,
+        purpose=LLMPurpose.OCR
     )
 
     if not response:
@@ -387,7 +388,8 @@ Trova i match più probabili. Rispondi SOLO con un JSON array."""
             {"role": "user", "content": user_prompt}
         ],
         temperature=0.2,
-        max_tokens=2000
+        max_tokens=2000,
+        purpose=LLMPurpose.OCR
     )
 
     if not response:
@@ -472,7 +474,8 @@ Rispondi SOLO con il testo corretto, nient'altro."""
             {"role": "user", "content": raw_text}
         ],
         temperature=0.1,
-        max_tokens=len(raw_text) * 2
+        max_tokens=len(raw_text) * 2,
+        purpose=LLMPurpose.OCR
     )
 
     return response.strip() if response else raw_text
@@ -566,7 +569,8 @@ Rispondi SOLO con il JSON array dei prodotti."""
                 {"role": "user", "content": user_prompt}
             ],
             temperature=0.1,
-            max_tokens=2000
+            max_tokens=2000,
+            purpose=LLMPurpose.OCR
         )
 
         if not response:
@@ -19,6 +19,7 @@ from pydantic import BaseModel, Field
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from app.integrations.llm import LLMPurpose
 from app.models.dispensa import DispensaItem
 from app.models.recipe import Recipe
 from app.models.user import User
@@ -511,7 +512,9 @@ async def generate_suggestions(
                         consumed_today=consumed_today,
                         is_thinking_model=is_thinking,
                     )
-                    response_text = await llm_client.chat_completion(messages, max_tokens=2000)
+                    response_text = await llm_client.chat_completion(
+                        messages, max_tokens=2000, purpose=LLMPurpose.SUGGESTIONS
+                    )
 
                     if response_text:
                         parsed = _parse_llm_response(response_text)
@@ -0,0 +1,131 @@
+"""
+OCR Cache Service
+
+Backend side of the content-addressed OCR result cache.
+
+Entries are keyed by (SHA-256 of the image bytes, OCR service params hash).
+The params hash comes from the OCR service itself (/health and every
+/process response, re-read from /health every OCR_PARAMS_HASH_TTL_SECONDS),
+so changing the OCR pipeline there invalidates the backend entries
+automatically. The OCR service keeps its own disk cache
+with the same key.
+"""
+
+import hashlib
+import logging
+import threading
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.ocr_result_cache import OCRResultCache
+
+logger = logging.getLogger(__name__)
+
+# Fields of the OCR service response worth caching
+CACHED_FIELDS = ("raw_text", "lines", "store_name", "total_amount", "average_confidence")
+
+_stats_lock = threading.Lock()
+_stats = {
+    "hits": 0,
+    "misses": 0,
+    "stores": 0,
+    "service_hits": 0,  # Misses here answered by the OCR service's own cache
+}
+
+
+def _count(stat: str) -> None:
+    with _stats_lock:
+        _stats[stat] += 1
+
+
+def image_sha256(path: str) -> str:
+    """SHA-256 of a file, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_cached_ocr(image_hash: str, params_hash: str) -> Optional[dict]:
+    """Cached OCR service response, or None. Uses its own session."""
+    db = SessionLocal()
+    try:
+        row = db.query(OCRResultCache).filter(
+            OCRResultCache.image_sha256 == image_hash,
+            OCRResultCache.params_hash == params_hash,
+        ).first()
+        if row is None:
+            _count("misses")
+            return None
+
+        row.hits = OCRResultCache.hits + 1
+        row.last_hit_at = func.now()
+        response = row.response
+        db.commit()
+        _count("hits")
+        return response
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"[OCRCache] Lookup failed for {image_hash[:12]}: {e}")
+        return None
+    finally:
+        db.close()
+
+
+def store_ocr_result(image_hash: str, params_hash: str, data: dict) -> None:
+    """Cache an OCR service response. Uses its own session."""
+    if data.get("cached"):
+        _count("service_hits")
+
+    db = SessionLocal()
+    try:
+        stmt = insert(OCRResultCache).values(
+            image_sha256=image_hash,
+            params_hash=params_hash,
+            response={key: data.get(key) for key in CACHED_FIELDS},
+        )
+        stmt = stmt.on_conflict_do_nothing(constraint="uq_ocr_result_cache_image_params")
+        db.execute(stmt)
+        db.commit()
+        _count("stores")
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"[OCRCache] Failed to store {image_hash[:12]}: {e}")
+    finally:
+        db.close()
+
+
+def purge_ocr_cache(db: Session, params_hash: Optional[str] = None) -> int:
+    """Delete cache entries (all, or those for one params hash). Returns rows deleted."""
+    query = db.query(OCRResultCache)
+    if params_hash:
+        query = query.filter(OCRResultCache.params_hash == params_hash)
+    deleted = query.delete(synchronize_session=False)
+    db.commit()
+    logger.info(f"[OCRCache] Purged {deleted} entries (params_hash={params_hash})")
+    return deleted
+
+
+def get_ocr_cache_stats(db: Session) -> dict:
+    """Hit rates for this worker plus entry counts from the shared table."""
+    with _stats_lock:
+        counters = dict(_stats)
+
+    lookups = counters["hits"] + counters["misses"]
+    entries, total_hits = db.query(
+        func.count(OCRResultCache.id),
+        func.coalesce(func.sum(OCRResultCache.hits), 0),
+    ).one()
+
+    return {
+        **counters,
+        "lookups": lookups,
+        "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+        "db_entries": entries,
+        "db_total_hits": int(total_hits),
+    }
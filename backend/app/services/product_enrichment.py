@@ -10,17 +10,15 @@ Features:
 - Saves to local catalog for future lookups
 - Updates shopping list items with product info
 - Retry logic for network failures
-- Queue-based processing for multiple items
+- Durable job queue (background_jobs table), processed concurrently by the
+  job engine
+- Coalescing per barcode: one active job, shared by every item scanned
+  with that barcode
 """
 
-import asyncio
 import logging
-import threading
-import time
-from queue import Queue, Empty
-from typing import Optional, Callable
+from typing import Optional, Callable, Set
 from uuid import UUID
-from datetime import datetime, timezone
 
 from sqlalchemy.orm import Session
 
@@ -30,13 +28,25 @@ from app.models.product_category_tag import ProductCategoryTag
 from app.models.product_nutrition import ProductNutrition
 from app.models.food import Food
 from app.models.shopping_list import ShoppingListItem
+from app.models.background_job import BackgroundJob, JobStatus
 from sqlalchemy import or_
 from app.integrations.openfoodfacts import openfoodfacts_client
 from app.services.product_nutrition_service import product_nutrition_service
 from app.services.barcode_source_service import lookup_barcode_chain
+from app.services.job_engine import job_engine, RetryableJobError
+from app.db.session import SessionLocal
 
 logger = logging.getLogger(__name__)
 
+# Job kind for the background job engine
+ENRICHMENT_JOB_KIND = "product_enrichment"
+
+# Lookups avoided by coalescing duplicate requests (per process)
+_coalesce_stats = {
+    "lookups": 0,
+    "queued_merges": 0,
+}
+
 
 def get_user_provided_name_for_barcode(db: Session, barcode: str) -> Optional[str]:
     """
@@ -121,23 +131,6 @@ def parse_and_save_category_tags(db: Session, product: ProductCatalog, categorie
         logger.warning(f"[Enrichment] Failed to save category tags for {product.barcode}: {e}")
 
 
-# Global queue for background processing
-_enrichment_queue: Queue = Queue()
-_worker_started = False
-_worker_lock = threading.Lock()
-
-
-class EnrichmentTask:
-    """Task for the enrichment queue."""
-    def __init__(self, barcode: str, item_id: Optional[UUID] = None, list_id: Optional[UUID] = None):
-        self.barcode = barcode
-        self.item_id = item_id
-        self.list_id = list_id
-        self.created_at = datetime.now(timezone.utc)
-        self.retries = 0
-        self.max_retries = 3
-
-
 def create_or_find_food_from_nutrition(
     db: Session,
     product_name: str,
@@ -218,6 +211,42 @@ def create_or_find_food_from_nutrition(
         return None
 
 
+def catalog_values_from_lookup(barcode: str, result: dict) -> dict:
+    """
+    Map a barcode source response to ProductCatalog column values.
+    Shared by single and batch enrichment.
+    """
+    values = dict(
+        barcode=barcode,
+        name=result.get("product_name"),
+        brand=result.get("brand"),
+        quantity_text=result.get("quantity"),
+        categories=result.get("categories"),
+        nutriscore=result.get("nutriscore") if result.get("nutriscore") and len(result["nutriscore"]) == 1 else None,
+        ecoscore=result.get("ecoscore") if result.get("ecoscore") and len(result["ecoscore"]) == 1 else None,
+        nova_group=result.get("nova_group") if result.get("nova_group") and len(result["nova_group"]) == 1 else None,
+        image_url=result.get("image_url"),
+        image_small_url=result.get("image_small_url"),
+        source=result.get("source_code", "openfoodfacts"),
+        raw_data=result,
+    )
+
+    # Extract nutritional data if available
+    nutrients = result.get("nutrients", {})
+    if nutrients:
+        values.update(
+            energy_kcal=nutrients.get("energy-kcal_100g"),
+            proteins_g=nutrients.get("proteins_100g"),
+            carbs_g=nutrients.get("carbohydrates_100g"),
+            sugars_g=nutrients.get("sugars_100g"),
+            fats_g=nutrients.get("fat_100g"),
+            saturated_fats_g=nutrients.get("saturated-fat_100g"),
+            fiber_g=nutrients.get("fiber_100g"),
+            salt_g=nutrients.get("salt_100g"),
+        )
+    return values
+
+
 async def enrich_product_async(db: Session, barcode: str) -> Optional[ProductCatalog]:
     """
     Enrich product data from Open Food Facts and save to local catalog.
@@ -274,32 +303,7 @@ async def enrich_product_async(db: Session, barcode: str) -> Optional[ProductCat
         return None
 
     # Create catalog entry with all available data
-    product = ProductCatalog(
-        barcode=barcode,
-        name=result.get("product_name"),
-        brand=result.get("brand"),
-        quantity_text=result.get("quantity"),
-        categories=result.get("categories"),
-        nutriscore=result.get("nutriscore") if result.get("nutriscore") and len(result["nutriscore"]) == 1 else None,
-        ecoscore=result.get("ecoscore") if result.get("ecoscore") and len(result["ecoscore"]) == 1 else None,
-        nova_group=result.get("nova_group") if result.get("nova_group") and len(result["nova_group"]) == 1 else None,
-        image_url=result.get("image_url"),
-        image_small_url=result.get("image_small_url"),
-        source=result.get("source_code", "openfoodfacts"),
-        raw_data=result,
-    )
-
-    # Extract nutritional data if available
-    nutrients = result.get("nutrients", {})
-    if nutrients:
-        product.energy_kcal = nutrients.get("energy-kcal_100g")
-        product.proteins_g = nutrients.get("proteins_100g")
-        product.carbs_g = nutrients.get("carbohydrates_100g")
-        product.sugars_g = nutrients.get("sugars_100g")
-        product.fats_g = nutrients.get("fat_100g")
-        product.saturated_fats_g = nutrients.get("saturated-fat_100g")
-        product.fiber_g = nutrients.get("fiber_100g")
-        product.salt_g = nutrients.get("salt_100g")
+    product = ProductCatalog(**catalog_values_from_lookup(barcode, result))
 
     db.add(product)
     db.flush()
@@ -364,7 +368,7 @@ async def enrich_product_async(db: Session, barcode: str) -> Optional[ProductCat
 
 def update_shopping_item_with_product(db: Session, item_id: UUID, product: ProductCatalog):
     """
-    Update a shopping list item with enriched product data.
+    Update a shopping list item with enriched product data. The caller commits.
     """
     if not product or not product.name:
         return
@@ -377,7 +381,6 @@ def update_shopping_item_with_product(db: Session, item_id: UUID, product: Produ
     # Update item with product name (displayed as "verified with info")
     if not item.grocy_product_name:  # Don't overwrite if already set
         item.grocy_product_name = f"{product.name}" + (f" ({product.brand})" if product.brand else "")
-        db.commit()
         logger.info(f"[Enrichment] Updated item {item_id} with product name: {item.grocy_product_name}")
 
 
@@ -387,7 +390,7 @@ def update_all_items_with_barcode(db: Session, barcode: str, product: ProductCat
 
     This is called after product enrichment to retroactively update any items
     (including extra items) that were scanned with this barcode but didn't have
-    product info at the time.
+    product info at the time. The caller commits.
     """
     if not product or not product.name:
         return
@@ -409,105 +412,104 @@ def update_all_items_with_barcode(db: Session, barcode: str, product: ProductCat
         updated_count += 1
 
     if updated_count > 0:
-        db.commit()
         logger.info(f"[Enrichment] Updated {updated_count} items with barcode {barcode} -> {product_display_name}")
 
 
-def process_enrichment_task(db_session_factory: Callable, task: EnrichmentTask) -> bool:
-    """
-    Process a single enrichment task.
-    Returns True if successful, False if should retry.
-    """
-    db = db_session_factory()
-    try:
-        # Run async function in new event loop
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            product = loop.run_until_complete(enrich_product_async(db, task.barcode))
+def _collect_item_ids(payload: dict) -> Set[UUID]:
+    """Item ids to update for a barcode job."""
+    item_ids = set(payload.get("item_ids") or [])
+    if payload.get("item_id"):  # Jobs queued before item_ids existed
+        item_ids.add(payload["item_id"])
+    return {UUID(item_id) for item_id in item_ids}
 
-            # Update shopping list item if we have item_id
-            if task.item_id and product:
-                update_shopping_item_with_product(db, task.item_id, product)
 
-            # Also update ALL other items with same barcode (for extra items and retroactive updates)
-            if product and product.name:
-                update_all_items_with_barcode(db, task.barcode, product)
+async def run_enrichment_job(payload: dict) -> dict:
+    """
+    Job handler: enrich one barcode and update every item waiting on it.
 
-            return True
+    Network errors raise RetryableJobError so the engine schedules a retry.
+    """
+    barcode = payload["barcode"]
 
-        except Exception as e:
-            logger.error(f"[Enrichment] Error processing {task.barcode}: {e}")
-            if "timeout" in str(e).lower() or "connection" in str(e).lower():
-                return False  # Network error, should retry
-            return True  # Other error, don't retry
+    db = SessionLocal()
+    try:
+        _coalesce_stats["lookups"] += 1
+        product = await enrich_product_async(db, barcode)
+
+        # Re-read the payload under a row lock and finish the job in the same
+        # transaction: an item attached while the lookup ran is updated here,
+        # one attached after the commit finds no active job and queues a new one
+        job = job_engine.lock_current_job(db)
+        item_ids = _collect_item_ids((job.payload or {}) if job else payload)
+
+        # Update every shopping list item attached to this job
+        if product:
+            for item_id in item_ids:
+                update_shopping_item_with_product(db, item_id, product)
+
+        # Also update ALL other items with same barcode (for extra items and retroactive updates)
+        if product and product.name:
+            update_all_items_with_barcode(db, barcode, product)
+
+        result = {
+            "found": product is not None,
+            "product_id": str(product.id) if product else None,
+            "items": len(item_ids),
+        }
+        job_engine.finish_current_job(db, job, result)
+        db.commit()
+        return result
 
-        finally:
-            loop.close()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[Enrichment] Error processing {barcode}: {e}")
+        if "timeout" in str(e).lower() or "connection" in str(e).lower():
+            raise RetryableJobError(str(e)) from e  # Network error, should retry
+        raise
 
     finally:
         db.close()
 
 
-def enrichment_worker(db_session_factory: Callable):
-    """
-    Background worker that processes the enrichment queue.
-    Runs continuously in a separate thread.
-    """
-    logger.info("[Enrichment Worker] Started")
-
-    while True:
-        try:
-            # Get task from queue with timeout (allows checking for shutdown)
-            try:
-                task = _enrichment_queue.get(timeout=5)
-            except Empty:
-                continue
-
-            logger.info(f"[Enrichment Worker] Processing barcode: {task.barcode}")
-
-            success = process_enrichment_task(db_session_factory, task)
-
-            if not success and task.retries < task.max_retries:
-                # Retry with exponential backoff
-                task.retries += 1
-                wait_time = 2 ** task.retries  # 2, 4, 8 seconds
-                logger.info(f"[Enrichment Worker] Retry {task.retries}/{task.max_retries} for {task.barcode} in {wait_time}s")
-                time.sleep(wait_time)
-                _enrichment_queue.put(task)
-            else:
-                _enrichment_queue.task_done()
-
-        except Exception as e:
-            logger.error(f"[Enrichment Worker] Unexpected error: {e}")
-            time.sleep(1)  # Prevent tight loop on persistent errors
+job_engine.register(ENRICHMENT_JOB_KIND, run_enrichment_job)
 
 
-def start_enrichment_worker(db_session_factory: Callable):
-    """
-    Start the background enrichment worker if not already running.
+def _attach_to_active_job(db: Session, barcode: str, item_id: Optional[UUID]) -> bool:
     """
-    global _worker_started
+    Add item_id to the active (pending/running) job for barcode.
 
-    with _worker_lock:
-        if _worker_started:
-            return
-
-        thread = threading.Thread(
-            target=enrichment_worker,
-            args=(db_session_factory,),
-            daemon=True,
-            name="ProductEnrichmentWorker"
-        )
-        thread.start()
-        _worker_started = True
-        logger.info("[Enrichment] Background worker thread started")
+    Returns:
+        True if an active job was found
+    """
+    job = db.query(BackgroundJob).filter(
+        BackgroundJob.kind == ENRICHMENT_JOB_KIND,
+        BackgroundJob.dedup_key == barcode,
+        BackgroundJob.status.in_([JobStatus.PENDING, JobStatus.RUNNING]),
+    ).with_for_update().first()
+    if job is None:
+        db.rollback()
+        return False
+
+    if item_id:
+        payload = dict(job.payload or {})
+        item_ids = list(payload.get("item_ids") or [])
+        if str(item_id) not in item_ids:
+            item_ids.append(str(item_id))
+        payload["item_ids"] = item_ids
+        job.payload = payload  # Reassign: JSON columns don't track in-place changes
+    db.commit()
+    return True
 
 
 def enrich_product_background(db_session_factory: Callable, barcode: str, item_id: Optional[UUID] = None, list_id: Optional[UUID] = None):
     """
     Queue a product for background enrichment.
 
+    The job is stored in the database, so it survives restarts and is picked
+    up by any API worker. Only one active job per barcode is kept: further
+    scans of the same barcode attach their item to it and are updated from
+    the same lookup.
+
     Args:
         db_session_factory: SQLAlchemy session factory
         barcode: Product barcode to enrich
@@ -519,18 +521,49 @@ def enrich_product_background(db_session_factory: Callable, barcode: str, item_i
         logger.info(f"[Enrichment] Skipping empty barcode, not queuing for enrichment")
         return
 
-    # Ensure worker is running
-    start_enrichment_worker(db_session_factory)
+    payload = {
+        "barcode": barcode,
+        "item_ids": [str(item_id)] if item_id else [],
+        "list_id": str(list_id) if list_id else None,
+    }
 
-    # Add task to queue
-    task = EnrichmentTask(barcode=barcode, item_id=item_id, list_id=list_id)
-    _enrichment_queue.put(task)
-    logger.info(f"[Enrichment] Queued barcode {barcode} for enrichment (queue size: {_enrichment_queue.qsize()})")
+    db = db_session_factory()
+    try:
+        queued = job_engine.enqueue(db, ENRICHMENT_JOB_KIND, payload, dedup_key=barcode)
+        if queued:
+            logger.info(f"[Enrichment] Queued barcode {barcode} for enrichment")
+        elif _attach_to_active_job(db, barcode, item_id):
+            _coalesce_stats["queued_merges"] += 1
+            logger.info(f"[Enrichment] Barcode {barcode} already queued, attached item {item_id}")
+        else:
+            # Active job finished between the insert and the lookup: queue again
+            job_engine.enqueue(db, ENRICHMENT_JOB_KIND, payload, dedup_key=barcode)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[Enrichment] Failed to queue barcode {barcode}: {e}")
+    finally:
+        db.close()
+
+
+def get_queue_status(db: Session) -> dict:
+    """Get current enrichment queue status (all workers)."""
+    status = job_engine.get_status(db, kind=ENRICHMENT_JOB_KIND)
+    return {
+        "queue_size": status["pending"] + status["running"],
+        "worker_running": job_engine.running,
+        "pending": status["pending"],
+        "running": status["running"],
+        "done": status["done"],
+        "failed": status["failed"],
+        "workers": status["workers"],
+        **get_coalescing_stats(),
+    }
 
 
-def get_queue_status() -> dict:
-    """Get current enrichment queue status."""
+def get_coalescing_stats() -> dict:
+    """Lookups run vs. avoided by coalescing (this process)."""
     return {
-        "queue_size": _enrichment_queue.qsize(),
-        "worker_running": _worker_started,
+        "lookups_run": _coalesce_stats["lookups"],
+        "lookups_coalesced_queued": _coalesce_stats["queued_merges"],
+        "lookups_avoided": _coalesce_stats["queued_merges"],
     }
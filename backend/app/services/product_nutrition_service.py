@@ -15,6 +15,7 @@ from sqlalchemy.orm import Session
 from app.models.product_catalog import ProductCatalog
 from app.models.product_nutrition import ProductNutrition
 from app.integrations.openfoodfacts import openfoodfacts_client
+from app.services.barcode_cache_service import OFF_FULL_SOURCE_CODE, get_cached_lookup, store_lookup
 
 logger = logging.getLogger(__name__)
 
@@ -48,9 +49,12 @@ class ProductNutritionService:
             logger.info(f"[ProductNutrition] Already exists for product {product_id}")
             return existing
 
-        # Fetch full data from Open Food Facts
-        logger.info(f"[ProductNutrition] Fetching data for barcode {barcode}...")
-        api_data = await openfoodfacts_client.lookup_barcode_full(barcode)
+        # Fetch full data from Open Food Facts (cached per barcode)
+        api_data = get_cached_lookup(db, OFF_FULL_SOURCE_CODE, barcode)
+        if api_data is None:
+            logger.info(f"[ProductNutrition] Fetching data for barcode {barcode}...")
+            api_data = await openfoodfacts_client.lookup_barcode_full(barcode)
+            store_lookup(OFF_FULL_SOURCE_CODE, barcode, api_data)
 
         if not api_data.get("found"):
             logger.info(f"[ProductNutrition] No data found for barcode {barcode}")
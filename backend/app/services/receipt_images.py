@@ -0,0 +1,342 @@
+"""
+Receipt Image Storage
+
+Where receipt photos live on disk and how they are served:
+- storage is content-addressed ({sha256}.{ext}): uploads are hashed, size
+  limited and checked by magic bytes while they are written, and the same
+  photo uploaded again (on any receipt) is stored once
+- a name always refers to the same bytes, so it can be cached as immutable
+- thumb/preview renditions are generated when the file is first stored, and
+  again when an upload finds them missing
+- serving supports ETag / Last-Modified (304) and single byte ranges (206)
+
+Files are shared between ReceiptImage rows: delete them with
+delete_unreferenced_images after the rows are gone, and re-check uploads
+with ensure_stored once their rows are committed. Both hold an advisory
+lock on the file name, so a delete that saw no rows can't remove a file an
+upload has just referenced without the upload storing it again.
+"""
+
+import hashlib
+import logging
+import os
+import re
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import BinaryIO, Iterable, Optional, Tuple
+from uuid import uuid4
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+from PIL import Image, ImageOps
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.receipt import ReceiptImage
+
+logger = logging.getLogger(__name__)
+
+# Base path for storing receipt images
+RECEIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "receipts")
+RENDITIONS_DIR = os.path.join(RECEIPTS_DIR, "renditions")
+
+# Rendition name -> longest side in pixels
+RENDITIONS = {
+    "thumb": 320,
+    "preview": 1280,
+}
+RENDITION_QUALITY = 80
+
+# Content-hashed names never change content: {sha256}.{ext}, and
+# {receipt_id}_{sha256[:16]}.{ext} from before content-addressed storage
+HASHED_NAME = re.compile(r"(^[0-9a-f]{64}|_[0-9a-f]{16})\.[a-z0-9]+$")
+
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+CACHE_IMMUTABLE = "private, max-age=31536000, immutable"
+CACHE_REVALIDATE = "private, no-cache"
+
+MEDIA_TYPES = {
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "webp": "image/webp",
+}
+
+
+class InvalidReceiptImage(Exception):
+    """Uploaded bytes are not a JPEG, PNG or WEBP image."""
+
+
+class ReceiptImageTooLarge(Exception):
+    """Uploaded image is over RECEIPT_MAX_IMAGE_MB."""
+
+
+def ensure_receipts_dir():
+    """Ensure the receipts directory exists"""
+    os.makedirs(RENDITIONS_DIR, exist_ok=True)
+
+
+def detect_image_type(head: bytes) -> Optional[str]:
+    """File extension from the magic bytes, None if not a supported image."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def store_upload(source: BinaryIO) -> Tuple[str, bool]:
+    """
+    Stream an uploaded file into content-addressed storage (blocking).
+
+    The bytes are checked, hashed and size limited while they are copied to
+    a temp file, which is then renamed to {sha256}.{ext}. If that file is
+    already stored the copy is dropped.
+
+    Raises:
+        InvalidReceiptImage: not a JPEG/PNG/WEBP (checked on the first chunk)
+        ReceiptImageTooLarge: over RECEIPT_MAX_IMAGE_MB (stops reading there)
+
+    Returns:
+        (stored filename, True if the file is new)
+    """
+    max_bytes = settings.RECEIPT_MAX_IMAGE_MB * 1024 * 1024
+    digest = hashlib.sha256()
+    size = 0
+    temp_path = os.path.join(RECEIPTS_DIR, f".upload_{uuid4().hex}.part")
+    try:
+        first = source.read(UPLOAD_CHUNK_SIZE)
+        ext = detect_image_type(first)
+        if ext is None:
+            raise InvalidReceiptImage()
+
+        with open(temp_path, "wb") as buffer:
+            block = first
+            while block:
+                size += len(block)
+                if size > max_bytes:
+                    raise ReceiptImageTooLarge()
+                digest.update(block)
+                buffer.write(block)
+                block = source.read(UPLOAD_CHUNK_SIZE)
+
+        filename = f"{digest.hexdigest()}.{ext}"
+        target = os.path.join(RECEIPTS_DIR, filename)
+        if os.path.exists(target):
+            return filename, False
+        os.replace(temp_path, target)
+        return filename, True
+    finally:
+        # Rejected, failed or duplicate upload
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def rendition_path(filename: str, variant: str) -> str:
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    return os.path.join(RENDITIONS_DIR, f"{stem}.{variant}.jpg")
+
+
+def generate_renditions(filename: str) -> None:
+    """
+    Write the thumb/preview JPEGs for a stored image (blocking, run in a thread).
+
+    Failures are logged and ignored: the original is served instead.
+    """
+    source = os.path.join(RECEIPTS_DIR, filename)
+    try:
+        with Image.open(source) as image:
+            # Decode at reduced size when possible, then fix orientation once
+            largest = max(RENDITIONS.values())
+            image.draft("RGB", (largest, largest))
+            image = ImageOps.exif_transpose(image)
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+
+            # Largest first, each smaller rendition is derived from the previous one
+            for variant, size in sorted(RENDITIONS.items(), key=lambda item: -item[1]):
+                image.thumbnail((size, size), Image.Resampling.LANCZOS)
+                image.save(rendition_path(filename, variant), "JPEG", quality=RENDITION_QUALITY, optimize=True)
+    except Exception as e:
+        logger.warning(f"Failed to create renditions for {filename}: {e}")
+
+
+def delete_image_files(filename: str) -> None:
+    """Remove a stored image and its renditions."""
+    paths = [os.path.join(RECEIPTS_DIR, filename)]
+    paths += [rendition_path(filename, variant) for variant in RENDITIONS]
+    for path in paths:
+        if os.path.exists(path):
+            try:
+                os.remove(path)
+            except Exception as e:
+                logger.warning(f"Failed to delete receipt image file {path}: {e}")
+
+
+def _lock_file(db: Session, filename: str) -> None:
+    """Transaction-level advisory lock on a stored file name."""
+    key = int.from_bytes(hashlib.sha256(filename.encode("utf-8")).digest()[:8], "big", signed=True)
+    db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": key})
+
+
+def delete_unreferenced_images(db: Session, filenames: Iterable[str]) -> None:
+    """Remove the files no ReceiptImage row uses anymore (call after commit)."""
+    filenames = sorted(set(filenames))  # Fixed lock order
+    if not filenames:
+        return
+    try:
+        for filename in filenames:
+            _lock_file(db, filename)
+        in_use = {
+            path for (path,) in db.query(ReceiptImage.image_path).filter(
+                ReceiptImage.image_path.in_(filenames)
+            ).all()
+        }
+        for filename in set(filenames) - in_use:
+            delete_image_files(filename)
+    finally:
+        db.commit()  # Release the locks
+
+
+def ensure_stored(db: Session, filename: str, source: BinaryIO) -> None:
+    """
+    Make sure an uploaded file and its renditions exist, now that a committed row uses it (blocking).
+
+    A delete_unreferenced_images that ran between store_upload and the
+    commit may have removed the file: it is stored again from the upload.
+    Renditions missing from an earlier upload are generated.
+    """
+    try:
+        _lock_file(db, filename)
+        restored = False
+        if not os.path.exists(os.path.join(RECEIPTS_DIR, filename)):
+            source.seek(0)
+            store_upload(source)
+            restored = True
+            logger.info(f"Stored {filename} again: removed while its upload was saved")
+        if restored or not all(os.path.exists(rendition_path(filename, variant)) for variant in RENDITIONS):
+            generate_renditions(filename)
+    finally:
+        db.commit()  # Release the lock
+
+
+def resolve_image_file(filename: str, variant: Optional[str]) -> Optional[Tuple[str, str]]:
+    """
+    (path, media type) for a stored image or one of its renditions.
+
+    A missing rendition (older uploads, failed generation) falls back to
+    the original. Returns None if the image doesn't exist.
+    """
+    safe_filename = os.path.basename(filename)  # Prevent path traversal
+    if variant:
+        path = rendition_path(safe_filename, variant)
+        if os.path.exists(path):
+            return path, "image/jpeg"
+
+    path = os.path.join(RECEIPTS_DIR, safe_filename)
+    if not os.path.exists(path):
+        return None
+    ext = safe_filename.rsplit(".", 1)[-1].lower()
+    return path, MEDIA_TYPES.get(ext, "image/jpeg")
+
+
+def _not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # Weak comparison: W/ prefixes are ignored
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag.removeprefix("W/") in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return last_modified.replace(microsecond=0) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """First range of a "bytes=" header as (start, end inclusive), None if unusable."""
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", header.split(",")[0].strip())
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+    if match.group(1):
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else size - 1
+    else:
+        # Suffix range: last N bytes
+        start = max(size - int(match.group(2)), 0)
+        end = size - 1
+    end = min(end, size - 1)
+    if start > end:
+        return None
+    return start, end
+
+
+def image_response(request: Request, path: str, media_type: str, etag: str, cache_control: str) -> Response:
+    """Serve a file with validators, 304 handling and single-range support."""
+    stat = os.stat(path)
+    last_modified = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+    }
+
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # If-Range needs a strong match, otherwise the whole file is sent
+    if range_header and (not if_range or (if_range == etag and not etag.startswith("W/"))):
+        byte_range = _parse_range(range_header, stat.st_size)
+        if byte_range is None:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{stat.st_size}"})
+        start, end = byte_range
+        with open(path, "rb") as f:
+            f.seek(start)
+            body = f.read(end - start + 1)
+        return Response(
+            body,
+            status_code=206,
+            media_type=media_type,
+            headers={**headers, "Content-Range": f"bytes {start}-{end}/{stat.st_size}"},
+        )
+
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+def serve_image(request: Request, filename: str, variant: Optional[str] = None) -> Optional[Response]:
+    """
+    Response for a stored image (or rendition), None if it doesn't exist.
+
+    Content-hashed names get a strong ETag from the hash and immutable
+    caching (only when the requested variant itself is served); older
+    names ({receipt_id}_{position}) are revalidated on every use with a
+    size/mtime ETag.
+    """
+    resolved = resolve_image_file(filename, variant)
+    if resolved is None:
+        return None
+    path, media_type = resolved
+
+    safe_filename = os.path.basename(filename)
+    served = os.path.basename(path)
+    if HASHED_NAME.search(safe_filename):
+        digest = os.path.splitext(safe_filename)[0].rsplit("_", 1)[-1]
+        suffix = served.split(".")[-2] if served != safe_filename else "original"
+        # A missing rendition falls back to the original: don't pin that
+        # under the rendition URL, it may be generated later
+        cache_control = CACHE_IMMUTABLE if suffix == (variant or "original") else CACHE_REVALIDATE
+        return image_response(request, path, media_type, f'"{digest}-{suffix}"', cache_control)
+
+    stat = os.stat(path)
+    etag = f'W/"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    return image_response(request, path, media_type, etag, CACHE_REVALIDATE)
@@ -0,0 +1,155 @@
+"""
+Receipt Line Memory Service
+
+Remembers which product a receipt line is, per house and store, once the
+user confirms it (see ReceiptLineMemory). Stores print the same
+abbreviations every week: reconciliation looks the lines up first and only
+sends unknown lines to fuzzy matching and the LLM.
+"""
+
+import logging
+from typing import Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.receipt import ReceiptItem
+from app.models.receipt_line_memory import ReceiptLineMemory
+from app.models.shopping_list import ShoppingListItem
+from app.services.receipt_reconciliation import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+def line_key(receipt_item: ReceiptItem) -> str:
+    """Memory key of a receipt line: the name reconciliation matches on, normalized."""
+    return normalize_text(receipt_item.parsed_name or receipt_item.raw_text)[:255]
+
+
+def is_corrected(receipt_item: ReceiptItem) -> bool:
+    """Whether the user renamed the line to something other than its own text."""
+    corrected = receipt_item.user_corrected_name
+    return bool(corrected) and normalize_text(corrected) != line_key(receipt_item)
+
+
+def _store_filter(store_id: Optional[UUID]):
+    if store_id is None:
+        return ReceiptLineMemory.store_id.is_(None)
+    return ReceiptLineMemory.store_id == store_id
+
+
+def remember_line(
+    db: Session,
+    house_id: UUID,
+    store_id: Optional[UUID],
+    receipt_item: ReceiptItem,
+    shopping_item: Optional[ShoppingListItem] = None,
+) -> None:
+    """
+    Store (or overwrite) the product of a confirmed receipt line. Does not commit.
+
+    The product is the matched shopping list item, or else the name the
+    user corrected the line to. A line "corrected" to its own text teaches
+    nothing and is not stored.
+    """
+    key = line_key(receipt_item)
+    product_name = shopping_item.name if shopping_item else receipt_item.user_corrected_name
+    if not key or not product_name:
+        return
+    if not shopping_item and not is_corrected(receipt_item):
+        return
+
+    stmt = insert(ReceiptLineMemory).values(
+        house_id=house_id,
+        store_id=store_id,
+        line_key=key,
+        product_name=product_name[:255],
+        grocy_product_id=shopping_item.grocy_product_id if shopping_item else None,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["house_id", "store_id", "line_key"] if store_id else ["house_id", "line_key"],
+        index_where=ReceiptLineMemory.store_id.isnot(None) if store_id else ReceiptLineMemory.store_id.is_(None),
+        set_={
+            "product_name": stmt.excluded.product_name,
+            "grocy_product_id": stmt.excluded.grocy_product_id,
+            "updated_at": func.now(),
+        },
+    )
+    db.execute(stmt)
+    logger.info(f"[LineMemory] '{key}' -> '{product_name}' (store={store_id})")
+
+
+def forget_line(
+    db: Session,
+    house_id: UUID,
+    store_id: Optional[UUID],
+    receipt_item: ReceiptItem,
+) -> None:
+    """Drop the memory of a line the user un-matched. Does not commit."""
+    key = line_key(receipt_item)
+    if not key:
+        return
+    deleted = db.query(ReceiptLineMemory).filter(
+        ReceiptLineMemory.house_id == house_id,
+        _store_filter(store_id),
+        ReceiptLineMemory.line_key == key,
+    ).delete(synchronize_session=False)
+    if deleted:
+        logger.info(f"[LineMemory] Forgot '{key}' (store={store_id})")
+
+
+def lookup_lines(
+    db: Session,
+    house_id: UUID,
+    store_id: Optional[UUID],
+    receipt_items: Iterable[ReceiptItem],
+) -> dict[str, ReceiptLineMemory]:
+    """
+    Remembered products for receipt items, with one query.
+
+    Returns:
+        receipt item id (str) -> memory entry, for the known lines only
+    """
+    keys = {str(item.id): line_key(item) for item in receipt_items}
+    wanted = {key for key in keys.values() if key}
+    if not wanted:
+        return {}
+
+    entries = {
+        entry.line_key: entry
+        for entry in db.query(ReceiptLineMemory).filter(
+            ReceiptLineMemory.house_id == house_id,
+            _store_filter(store_id),
+            ReceiptLineMemory.line_key.in_(wanted),
+        ).all()
+    }
+    return {item_id: entries[key] for item_id, key in keys.items() if key in entries}
+
+
+def find_remembered_item(
+    entry: ReceiptLineMemory,
+    shopping_list_items: list[ShoppingListItem],
+) -> Optional[int]:
+    """Index of the shopping item that is the remembered product, if it's on the list."""
+    product_key = normalize_text(entry.product_name)
+    for index, item in enumerate(shopping_list_items):
+        if entry.grocy_product_id and item.grocy_product_id == entry.grocy_product_id:
+            return index
+        if normalize_text(item.name) == product_key:
+            return index
+        if item.grocy_product_name and normalize_text(item.grocy_product_name) == product_key:
+            return index
+    return None
+
+
+def record_hits(db: Session, entry_ids: Iterable[UUID]) -> None:
+    """Count the entries that resolved a line in this reconciliation. Does not commit."""
+    entry_ids = list(entry_ids)
+    if not entry_ids:
+        return
+    db.query(ReceiptLineMemory).filter(ReceiptLineMemory.id.in_(entry_ids)).update(
+        {ReceiptLineMemory.hits: ReceiptLineMemory.hits + 1, ReceiptLineMemory.last_hit_at: func.now()},
+        synchronize_session=False
+    )
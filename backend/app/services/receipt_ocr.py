@@ -4,20 +4,40 @@ Calls external OCR microservice to extract text from receipt images.
 
 The actual OCR processing is done by a separate container (ocr-service)
 to keep the main backend lightweight.
+
+Results are cached by image content (see ocr_cache_service): processing
+the same photo again returns the stored result without calling the service.
 """
 
 import os
+import asyncio
 import logging
-from typing import Optional
+import time
+from contextlib import ExitStack
+from typing import List, Optional
 from dataclasses import dataclass
 
 import httpx
 
+from app.integrations.http_client import http_clients
+from app.services.ocr_cache_service import image_sha256, get_cached_ocr, store_ocr_result
+
 logger = logging.getLogger(__name__)
 
 # OCR Service URL (from environment or default)
 OCR_SERVICE_URL = os.environ.get("OCR_SERVICE_URL", "http://ocr:8001")
 
+# Retries when the OCR service answers 429 (all workers busy, queue full)
+OCR_BUSY_RETRIES = 3
+OCR_BUSY_MAX_WAIT_SECONDS = 30.0
+
+# OCR service parameter hash (part of the cache key), learned from the service.
+# Asked to /health again after this long, so a redeployed service with new
+# parameters stops matching entries of the old pipeline
+OCR_PARAMS_HASH_TTL_SECONDS = 60.0
+_service_params_hash: Optional[str] = None
+_service_params_hash_at = 0.0
+
 
 @dataclass
 class ParsedReceiptLine:
@@ -44,7 +64,7 @@ class ReceiptOCRResult:
 async def check_ocr_service_health() -> bool:
     """Check if OCR service is available"""
     try:
-        async with httpx.AsyncClient() as client:
+        async with http_clients.client_for(OCR_SERVICE_URL) as client:
             response = await client.get(f"{OCR_SERVICE_URL}/health", timeout=5.0)
             return response.status_code == 200
     except Exception as e:
@@ -52,6 +72,18 @@ async def check_ocr_service_health() -> bool:
         return False
 
 
+async def get_ocr_service_cache_stats() -> Optional[dict]:
+    """Result cache stats reported by the OCR service, or None if unreachable."""
+    try:
+        async with http_clients.client_for(OCR_SERVICE_URL) as client:
+            response = await client.get(f"{OCR_SERVICE_URL}/health", timeout=5.0)
+            if response.status_code == 200:
+                return response.json().get("cache")
+    except Exception as e:
+        logger.warning(f"OCR service cache stats unavailable: {e}")
+    return None
+
+
 def check_ocr_service_health_sync() -> bool:
     """Check if OCR service is available (sync version)"""
     try:
@@ -63,6 +95,102 @@ def check_ocr_service_health_sync() -> bool:
         return False
 
 
+def _result_from_response(data: dict) -> ReceiptOCRResult:
+    """Convert an OCR service /process response to ReceiptOCRResult."""
+    lines = [
+        ParsedReceiptLine(
+            raw_text=line.get("raw_text", ""),
+            parsed_name=line.get("parsed_name"),
+            parsed_quantity=line.get("parsed_quantity"),
+            parsed_unit_price=line.get("parsed_unit_price"),
+            parsed_total_price=line.get("parsed_total_price"),
+            is_product=line.get("is_product", True),
+            confidence=line.get("confidence", 0.0)
+        )
+        for line in data.get("lines", [])
+    ]
+
+    return ReceiptOCRResult(
+        raw_text=data.get("raw_text", ""),
+        lines=lines,
+        store_name=data.get("store_name"),
+        total_amount=data.get("total_amount"),
+        average_confidence=data.get("average_confidence", 0.0)
+    )
+
+
+async def _get_service_params_hash(client: httpx.AsyncClient) -> Optional[str]:
+    """
+    OCR service parameter hash, from /health at most every OCR_PARAMS_HASH_TTL_SECONDS.
+
+    None if unavailable: the cache is then skipped rather than read with a
+    hash the service may no longer use.
+    """
+    global _service_params_hash, _service_params_hash_at
+    if _service_params_hash is None or time.monotonic() - _service_params_hash_at > OCR_PARAMS_HASH_TTL_SECONDS:
+        params_hash = None
+        try:
+            response = await client.get(f"{OCR_SERVICE_URL}/health", timeout=5.0)
+            if response.status_code == 200:
+                params_hash = response.json().get("params_hash")
+        except Exception as e:
+            logger.warning(f"Could not read OCR service params hash: {e}")
+        if params_hash != _service_params_hash and _service_params_hash is not None:
+            logger.info(f"OCR service params hash changed: {_service_params_hash} -> {params_hash}")
+        _service_params_hash = params_hash
+        _service_params_hash_at = time.monotonic()
+    return _service_params_hash
+
+
+async def _cache_response(image_hash: str, data: dict) -> None:
+    """Store a fresh OCR service response under its params hash."""
+    global _service_params_hash, _service_params_hash_at
+    params_hash = data.get("params_hash")
+    if not params_hash:
+        return  # Older OCR service without result caching
+    _service_params_hash = params_hash
+    _service_params_hash_at = time.monotonic()
+    await asyncio.to_thread(store_ocr_result, image_hash, params_hash, data)
+
+
+async def _post_images(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    field: str,
+    image_paths: List[str],
+    timeout: float,
+) -> httpx.Response:
+    """
+    POST images as multipart, retrying while the OCR service answers 429.
+
+    Raises if the service is still busy after OCR_BUSY_RETRIES attempts.
+    """
+    label = ", ".join(os.path.basename(path) for path in image_paths)
+    for attempt in range(OCR_BUSY_RETRIES + 1):
+        with ExitStack() as stack:
+            files = [
+                (field, (os.path.basename(path), stack.enter_context(open(path, "rb")), "image/jpeg"))
+                for path in image_paths
+            ]
+            response = await client.post(f"{OCR_SERVICE_URL}{endpoint}", files=files, timeout=timeout)
+
+        if response.status_code != 429 or attempt == OCR_BUSY_RETRIES:
+            break
+
+        # OCR service busy: wait as asked, without blocking other requests
+        try:
+            wait = float(response.headers.get("Retry-After", "5"))
+        except ValueError:
+            wait = 5.0
+        wait = min(wait, OCR_BUSY_MAX_WAIT_SECONDS)
+        logger.info(f"OCR service busy, retrying {label} in {wait:.0f}s")
+        await asyncio.sleep(wait)
+
+    if response.status_code == 429:
+        raise Exception("Servizio OCR occupato. Riprova tra qualche istante.")
+    return response
+
+
 async def process_receipt_async(image_path: str) -> ReceiptOCRResult:
     """
     Process a receipt image by calling the OCR microservice.
@@ -76,41 +204,29 @@ async def process_receipt_async(image_path: str) -> ReceiptOCRResult:
     if not os.path.exists(image_path):
         raise FileNotFoundError(f"Receipt image not found: {image_path}")
 
+    image_hash = await asyncio.to_thread(image_sha256, image_path)
+
     try:
-        # 120s timeout for large images with slow CPU OCR
-        async with httpx.AsyncClient(timeout=120.0) as client:
+        async with http_clients.client_for(OCR_SERVICE_URL) as client:
+            params_hash = await _get_service_params_hash(client)
+            if params_hash:
+                cached = await asyncio.to_thread(get_cached_ocr, image_hash, params_hash)
+                if cached is not None:
+                    logger.info(f"OCR cache hit for {os.path.basename(image_path)} ({image_hash[:12]})")
+                    return _result_from_response(cached)
+
             # Send image to OCR service
-            with open(image_path, "rb") as f:
-                files = {"file": (os.path.basename(image_path), f, "image/jpeg")}
-                response = await client.post(f"{OCR_SERVICE_URL}/process", files=files)
+            # 120s timeout for large images with slow CPU OCR
+            response = await _post_images(client, "/process", "file", [image_path], timeout=120.0)
 
             if response.status_code != 200:
                 error_detail = response.json().get("detail", "Unknown error")
                 raise Exception(f"OCR service error: {error_detail}")
 
             data = response.json()
+            await _cache_response(image_hash, data)
 
-            # Convert response to ReceiptOCRResult
-            lines = [
-                ParsedReceiptLine(
-                    raw_text=line.get("raw_text", ""),
-                    parsed_name=line.get("parsed_name"),
-                    parsed_quantity=line.get("parsed_quantity"),
-                    parsed_unit_price=line.get("parsed_unit_price"),
-                    parsed_total_price=line.get("parsed_total_price"),
-                    is_product=line.get("is_product", True),
-                    confidence=line.get("confidence", 0.0)
-                )
-                for line in data.get("lines", [])
-            ]
-
-            return ReceiptOCRResult(
-                raw_text=data.get("raw_text", ""),
-                lines=lines,
-                store_name=data.get("store_name"),
-                total_amount=data.get("total_amount"),
-                average_confidence=data.get("average_confidence", 0.0)
-            )
+            return _result_from_response(data)
 
     except httpx.ConnectError:
         logger.error("Cannot connect to OCR service. Is it running?")
@@ -150,27 +266,7 @@ def process_receipt(image_path: str) -> ReceiptOCRResult:
 
             data = response.json()
 
-            # Convert response to ReceiptOCRResult
-            lines = [
-                ParsedReceiptLine(
-                    raw_text=line.get("raw_text", ""),
-                    parsed_name=line.get("parsed_name"),
-                    parsed_quantity=line.get("parsed_quantity"),
-                    parsed_unit_price=line.get("parsed_unit_price"),
-                    parsed_total_price=line.get("parsed_total_price"),
-                    is_product=line.get("is_product", True),
-                    confidence=line.get("confidence", 0.0)
-                )
-                for line in data.get("lines", [])
-            ]
-
-            return ReceiptOCRResult(
-                raw_text=data.get("raw_text", ""),
-                lines=lines,
-                store_name=data.get("store_name"),
-                total_amount=data.get("total_amount"),
-                average_confidence=data.get("average_confidence", 0.0)
-            )
+            return _result_from_response(data)
 
     except httpx.ConnectError:
         logger.error("Cannot connect to OCR service. Is it running?")
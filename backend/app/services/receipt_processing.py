@@ -0,0 +1,419 @@
+"""
+Receipt Processing Service
+
+OCR + LLM pipeline for uploaded receipts, without blocking the event loop:
+- all images of a receipt are sent to the OCR service concurrently (one
+  request per image, so the service spreads them over its worker pool)
+- the OCR results are kept and reused for the fallback product parsing
+- DB reads/writes run in worker threads, each with its own session
+
+Processing runs as a background job (RECEIPT_JOB_KIND, one active job per
+receipt). The handler drives ReceiptStatus.PROCESSING -> PROCESSED/ERROR and
+reports progress per stage and per image on the job row; OCR text is saved
+per image as soon as it arrives, so partial results are visible early.
+
+Uploads queue an OCR prefetch job (RECEIPT_OCR_PREFETCH_JOB_KIND) that
+fills the OCR cache while the user is still adding photos; processing then
+finds the results there. If the prefetch is still running when processing
+starts, processing waits for it instead of sending the same images again.
+"""
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.integrations.llm import LLMPurpose
+from app.integrations.llm_pool import llm_clients
+from app.models.background_job import BackgroundJob, JobStatus
+from app.models.house import House
+from app.models.receipt import Receipt, ReceiptImage, ReceiptItem, ReceiptStatus, ReceiptItemMatchStatus
+from app.models.shopping_list import ShoppingList
+from app.services.error_logging import error_logger
+from app.services.llm_ocr import parse_receipt_with_llm
+from app.services.job_engine import job_engine
+from app.services.receipt_images import RECEIPTS_DIR
+from app.services.receipt_ocr import ReceiptOCRResult, process_receipt_async, get_product_lines
+
+logger = logging.getLogger(__name__)
+
+RECEIPT_JOB_KIND = "receipt_processing"
+RECEIPT_OCR_PREFETCH_JOB_KIND = "receipt_ocr_prefetch"
+
+# How long processing waits for a running OCR prefetch of the same receipt
+PREFETCH_POLL_SECONDS = 1.0
+PREFETCH_MAX_WAIT_SECONDS = 300.0
+
+# Outcomes of process_receipt_images
+OUTCOME_NOT_FOUND = "not_found"
+OUTCOME_ALREADY_PROCESSED = "already_processed"
+OUTCOME_NO_IMAGES = "no_images"
+OUTCOME_ALREADY_RUNNING = "already_running"
+OUTCOME_PROCESSED = "processed"
+
+# Error shown for a receipt whose processing run died midway
+ABANDONED_MESSAGE = "Elaborazione interrotta"
+
+# Progress stages, in order
+STAGE_OCR = "ocr"
+STAGE_LLM_PARSE = "llm_parse"
+STAGE_ITEMS = "items"
+
+ProgressCallback = Callable[[dict], Awaitable[None]]
+
+
+@dataclass
+class _ReceiptWork:
+    """What the pipeline needs from the DB, loaded up front."""
+    receipt_id: UUID
+    images: List[Tuple[UUID, str]] = field(default_factory=list)  # (image id, file path) by position
+    house_id: Optional[UUID] = None
+    house_settings: Optional[dict] = None
+
+
+def _start_processing(receipt_id: UUID) -> Tuple[str, Optional[_ReceiptWork]]:
+    """
+    Check the receipt and claim it for processing. Runs in a worker thread.
+
+    The claim is a conditional UPDATE from UPLOADED/ERROR to PROCESSING, so
+    two runs for the same receipt never both get past it.
+    """
+    db = SessionLocal()
+    try:
+        receipt = db.query(Receipt).filter(Receipt.id == receipt_id).first()
+        if not receipt:
+            return OUTCOME_NOT_FOUND, None
+        if receipt.status in [ReceiptStatus.PROCESSED, ReceiptStatus.RECONCILED]:
+            return OUTCOME_ALREADY_PROCESSED, None
+        if not receipt.images:
+            return OUTCOME_NO_IMAGES, None
+
+        claimed = db.query(Receipt).filter(
+            Receipt.id == receipt_id,
+            Receipt.status.in_([ReceiptStatus.UPLOADED, ReceiptStatus.ERROR]),
+        ).update({Receipt.status: ReceiptStatus.PROCESSING}, synchronize_session=False)
+        if not claimed:
+            db.rollback()
+            return OUTCOME_ALREADY_RUNNING, None
+
+        work = _ReceiptWork(
+            receipt_id=receipt.id,
+            images=[
+                (image.id, os.path.join(RECEIPTS_DIR, image.image_path))
+                for image in sorted(receipt.images, key=lambda x: x.position)
+            ],
+        )
+
+        house_id = db.query(ShoppingList.house_id).filter(
+            ShoppingList.id == receipt.shopping_list_id
+        ).scalar()
+        if house_id:
+            work.house_id = house_id
+            work.house_settings = db.query(House.settings).filter(House.id == house_id).scalar()
+
+        db.commit()
+        return OUTCOME_PROCESSED, work
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _save_image_ocr(image_id: UUID, ocr_result: ReceiptOCRResult) -> None:
+    """Store the OCR text of one image as soon as it is ready. Runs in a worker thread."""
+    db = SessionLocal()
+    try:
+        db.query(ReceiptImage).filter(ReceiptImage.id == image_id).update(
+            {ReceiptImage.raw_ocr_text: ocr_result.raw_text, ReceiptImage.ocr_confidence: ocr_result.average_confidence},
+            synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def _save_results(work: _ReceiptWork, ocr_results: List[ReceiptOCRResult], product_lines: list) -> None:
+    """Store receipt totals and the parsed items. Runs in a worker thread."""
+    db = SessionLocal()
+    try:
+        receipt = db.query(Receipt).filter(Receipt.id == work.receipt_id).first()
+        if not receipt:
+            return
+
+        store_name = None
+        total_amount = None
+        for ocr_result in ocr_results:
+            if not store_name and ocr_result.store_name:
+                store_name = ocr_result.store_name
+            if ocr_result.total_amount:
+                total_amount = ocr_result.total_amount
+
+        confidences = [r.average_confidence for r in ocr_results]
+        receipt.raw_ocr_text = "\n".join(r.raw_text for r in ocr_results)
+        receipt.ocr_confidence = sum(confidences) / len(confidences) if confidences else 0.0
+        receipt.store_name_detected = store_name
+        receipt.total_amount_detected = total_amount
+        receipt.processed_at = datetime.now(timezone.utc)
+        receipt.status = ReceiptStatus.PROCESSED
+
+        # Replace, never append to, the items of an earlier run
+        db.query(ReceiptItem).filter(ReceiptItem.receipt_id == receipt.id).delete(synchronize_session=False)
+        for idx, line in enumerate(product_lines):
+            db.add(ReceiptItem(
+                receipt_id=receipt.id,
+                position=idx,
+                raw_text=getattr(line, 'raw_text', ''),
+                parsed_name=getattr(line, 'parsed_name', None),
+                parsed_quantity=getattr(line, 'parsed_quantity', None),
+                parsed_unit_price=getattr(line, 'parsed_unit_price', None),
+                parsed_total_price=getattr(line, 'parsed_total_price', None),
+                match_status=ReceiptItemMatchStatus.UNMATCHED
+            ))
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _mark_error(receipt_id: UUID, message: str) -> None:
+    """Set the receipt to ERROR. Runs in a worker thread."""
+    db = SessionLocal()
+    try:
+        db.query(Receipt).filter(Receipt.id == receipt_id).update(
+            {Receipt.status: ReceiptStatus.ERROR, Receipt.error_message: message},
+            synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def _get_llm_client(house_id: Optional[UUID], house_settings: Optional[dict]):
+    if not house_id or not house_settings:
+        return None
+    llm_client = llm_clients.get_client(house_id, house_settings, LLMPurpose.OCR)
+    if llm_client:
+        logger.info(f"Using LLM for product parsing: {llm_client.connection.name}")
+    return llm_client
+
+
+async def _parse_products(ocr_results: List[ReceiptOCRResult], llm_client) -> list:
+    """Parse products with the LLM, falling back to the OCR service's own parsing."""
+    combined_raw_text = "\n".join(r.raw_text for r in ocr_results)
+
+    if llm_client and combined_raw_text.strip():
+        try:
+            logger.info("Sending OCR text to LLM for product parsing...")
+            llm_products = await parse_receipt_with_llm(combined_raw_text, llm_client)
+            if llm_products:
+                logger.info(f"LLM parsed {len(llm_products)} products")
+                return llm_products
+            logger.warning("LLM returned no products, using EasyOCR fallback")
+        except Exception as e:
+            logger.warning(f"LLM parsing failed: {e}, using EasyOCR fallback")
+
+    # Reuse the OCR results already in hand: no second OCR pass
+    logger.info("Using EasyOCR product parsing as fallback")
+    product_lines = []
+    for ocr_result in ocr_results:
+        product_lines.extend(get_product_lines(ocr_result))
+    return product_lines
+
+
+def _prefetch_running(receipt_id: UUID) -> bool:
+    """Whether an OCR prefetch job is running for the receipt. Runs in a worker thread."""
+    db = SessionLocal()
+    try:
+        job = job_engine.get_active_job(db, RECEIPT_OCR_PREFETCH_JOB_KIND, str(receipt_id))
+        return job is not None and job.status == JobStatus.RUNNING
+    finally:
+        db.close()
+
+
+async def _wait_for_prefetch(receipt_id: UUID) -> None:
+    """Let a running OCR prefetch finish so its results come from the cache."""
+    waited = 0.0
+    while waited < PREFETCH_MAX_WAIT_SECONDS and await asyncio.to_thread(_prefetch_running, receipt_id):
+        await asyncio.sleep(PREFETCH_POLL_SECONDS)
+        waited += PREFETCH_POLL_SECONDS
+    if waited:
+        logger.info(f"Waited {waited:.0f}s for OCR prefetch of receipt {receipt_id}")
+
+
+async def _run_ocr(work: _ReceiptWork, on_progress: ProgressCallback) -> List[ReceiptOCRResult]:
+    """OCR all images concurrently, saving and reporting each one as it completes."""
+    total = len(work.images)
+    await _wait_for_prefetch(work.receipt_id)
+    results: List[Optional[ReceiptOCRResult]] = [None] * total
+
+    async def ocr_image(index: int, image_id: UUID, path: str) -> int:
+        results[index] = await process_receipt_async(path)
+        await asyncio.to_thread(_save_image_ocr, image_id, results[index])
+        return index
+
+    # One request per image, all in flight at once (the OCR service applies backpressure)
+    tasks = [
+        asyncio.create_task(ocr_image(index, image_id, path))
+        for index, (image_id, path) in enumerate(work.images)
+    ]
+    try:
+        done_images = []
+        for next_done in asyncio.as_completed(tasks):
+            done_images.append(await next_done)
+            await on_progress({
+                "stage": STAGE_OCR,
+                "images_done": len(done_images),
+                "images_total": total,
+                "done_positions": sorted(done_images),
+            })
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    return results
+
+
+async def _no_progress(progress: dict) -> None:
+    pass
+
+
+async def process_receipt_images(receipt_id: UUID, on_progress: Optional[ProgressCallback] = None) -> str:
+    """
+    Run OCR + product parsing for a receipt and store the results.
+
+    on_progress receives a dict with "stage" (ocr, llm_parse, items) and
+    stage details after each step.
+
+    Returns one of the OUTCOME_* constants. On failure the receipt is set to
+    ERROR and the exception is re-raised.
+    """
+    on_progress = on_progress or _no_progress
+    outcome, work = await asyncio.to_thread(_start_processing, receipt_id)
+    if outcome != OUTCOME_PROCESSED:
+        return outcome
+
+    try:
+        llm_client = _get_llm_client(work.house_id, work.house_settings)
+        images_total = len(work.images)
+
+        await on_progress({"stage": STAGE_OCR, "images_done": 0, "images_total": images_total, "done_positions": []})
+        ocr_results = await _run_ocr(work, on_progress)
+
+        await on_progress({"stage": STAGE_LLM_PARSE, "images_done": images_total, "images_total": images_total, "llm": llm_client is not None})
+        product_lines = await _parse_products(ocr_results, llm_client)
+
+        await on_progress({"stage": STAGE_ITEMS, "images_done": images_total, "images_total": images_total, "items": len(product_lines)})
+        await asyncio.to_thread(_save_results, work, ocr_results, product_lines)
+
+        logger.info(f"Receipt processed: {receipt_id}, {len(product_lines)} items from {len(work.images)} images")
+    except Exception as e:
+        logger.error(f"OCR processing failed for receipt {receipt_id}: {e}")
+        await asyncio.to_thread(_mark_error, receipt_id, str(e))
+        raise
+
+    return OUTCOME_PROCESSED
+
+
+# ============================================================
+# Background job
+# ============================================================
+
+async def run_receipt_processing_job(payload: dict) -> dict:
+    """Job handler: process one receipt, reporting progress on the job."""
+    try:
+        outcome = await process_receipt_images(UUID(payload["receipt_id"]), on_progress=job_engine.report_progress)
+    except Exception as e:
+        error_logger.log_error(
+            e,
+            severity="error",
+            context={
+                "operation": "process_receipt_ocr",
+                "receipt_id": payload.get("receipt_id")
+            }
+        )
+        raise
+    return {"outcome": outcome}
+
+
+def _on_receipt_job_abandoned(db: Session, payload: dict, error: str) -> None:
+    """The worker processing the receipt died: release it from PROCESSING."""
+    released = db.query(Receipt).filter(
+        Receipt.id == UUID(payload["receipt_id"]),
+        Receipt.status == ReceiptStatus.PROCESSING,
+    ).update(
+        {Receipt.status: ReceiptStatus.ERROR, Receipt.error_message: ABANDONED_MESSAGE},
+        synchronize_session=False
+    )
+    if released:
+        logger.warning(f"Receipt {payload['receipt_id']} set to ERROR: {error}")
+
+
+job_engine.register(RECEIPT_JOB_KIND, run_receipt_processing_job, on_abandoned=_on_receipt_job_abandoned)
+
+
+def enqueue_receipt_processing(db: Session, receipt_id: UUID) -> Optional[BackgroundJob]:
+    """
+    Queue processing for a receipt (at most one active job per receipt).
+
+    Returns:
+        The active job for the receipt (new or already queued)
+    """
+    job_engine.enqueue(
+        db,
+        RECEIPT_JOB_KIND,
+        {"receipt_id": str(receipt_id)},
+        dedup_key=str(receipt_id),
+        max_attempts=1,  # Failures set the receipt to ERROR; the user retries
+    )
+    return get_active_receipt_job(db, receipt_id)
+
+
+def get_active_receipt_job(db: Session, receipt_id: UUID) -> Optional[BackgroundJob]:
+    """Pending/running processing job for a receipt, if any."""
+    return job_engine.get_active_job(db, RECEIPT_JOB_KIND, str(receipt_id))
+
+
+def get_receipt_job(db: Session, receipt_id: UUID) -> Optional[BackgroundJob]:
+    """Latest processing job for a receipt, in any state."""
+    return job_engine.get_latest_job(db, RECEIPT_JOB_KIND, str(receipt_id))
+
+
+async def run_ocr_prefetch_job(payload: dict) -> dict:
+    """Job handler: OCR freshly uploaded images so the results are cached."""
+    paths = [os.path.join(RECEIPTS_DIR, filename) for filename in payload["images"]]
+    paths = [path for path in paths if os.path.exists(path)]  # Deleted since upload
+    if paths:
+        await asyncio.gather(*(process_receipt_async(path) for path in paths))
+    return {"images": len(paths)}
+
+
+job_engine.register(RECEIPT_OCR_PREFETCH_JOB_KIND, run_ocr_prefetch_job)
+
+
+def enqueue_ocr_prefetch(db: Session, receipt_id: UUID, filenames: List[str]) -> None:
+    """
+    Queue OCR of just-uploaded images (best effort, one active job per receipt).
+
+    Images missed because a prefetch was already queued are OCRed by the
+    processing job as usual.
+    """
+    if not settings.RECEIPT_OCR_PREFETCH or not filenames:
+        return
+    job_engine.enqueue(
+        db,
+        RECEIPT_OCR_PREFETCH_JOB_KIND,
+        {"receipt_id": str(receipt_id), "images": filenames},
+        dedup_key=str(receipt_id),
+        max_attempts=1,
+    )
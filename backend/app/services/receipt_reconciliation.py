@@ -4,15 +4,26 @@ Match receipt items with shopping list items using fuzzy matching.
 
 Features:
 - Fuzzy string matching with RapidFuzz
-- Italian product synonym handling
+- Italian product synonym handling (SynonymEngine, per house/store
+  dictionaries from receipt_synonym_service)
 - Configurable matching thresholds
 - Match status classification (matched, suggested, extra)
+
+reconcile_receipt_items scores all pairs at once: every name is normalized
+and expanded with synonyms once, the variant x variant scores come from
+rapidfuzz.process.cdist (multi-threaded), and matches are assigned
+globally (Hungarian algorithm), so an early weak match can't take the
+shopping item a later receipt item matches better.
+See benchmarks/reconciliation_benchmark.py for the comparison with the
+previous per-item greedy matching.
 """
 
 import logging
 from typing import Optional
 from dataclasses import dataclass
+from functools import lru_cache
 
+import numpy as np
 from rapidfuzz import fuzz, process
 
 from app.models.shopping_list import ShoppingListItem
@@ -26,6 +37,9 @@ AUTO_MATCH_THRESHOLD = 75  # >= 75% = automatic match
 SUGGEST_THRESHOLD = 50     # 50-75% = suggest to user
 # < 50% = extra (not in list)
 
+# Scorers combined (best of) for each pair of name variants
+MATCH_SCORERS = (fuzz.ratio, fuzz.partial_ratio, fuzz.token_sort_ratio, fuzz.token_set_ratio)
+
 
 @dataclass
 class MatchResult:
@@ -78,9 +92,20 @@ ITALIAN_SYNONYMS = {
 }
 
 
+# Accent removal table for normalize_text
+_ACCENTS = str.maketrans({
+    'à': 'a', 'è': 'e', 'é': 'e', 'ì': 'i', 'ò': 'o', 'ù': 'u',
+    'À': 'a', 'È': 'e', 'É': 'e', 'Ì': 'i', 'Ò': 'o', 'Ù': 'u'
+})
+
+# Expansions memoized per SynonymEngine
+EXPANSION_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=8192)
 def normalize_text(text: str) -> str:
     """
-    Normalize text for comparison.
+    Normalize text for comparison (memoized).
     - Lowercase
     - Remove accents (simplified)
     - Remove extra whitespace
@@ -88,48 +113,137 @@ def normalize_text(text: str) -> str:
     if not text:
         return ""
 
-    text = text.lower().strip()
+    return ' '.join(text.lower().translate(_ACCENTS).split())
 
-    # Simple accent removal
-    accent_map = {
-        'à': 'a', 'è': 'e', 'é': 'e', 'ì': 'i', 'ò': 'o', 'ù': 'u',
-        'À': 'a', 'È': 'e', 'É': 'e', 'Ì': 'i', 'Ò': 'o', 'Ù': 'u'
-    }
-    for accent, plain in accent_map.items():
-        text = text.replace(accent, plain)
 
-    # Normalize whitespace
-    text = ' '.join(text.split())
+class SynonymEngine:
+    """
+    Synonym expansion compiled from a {base: [synonyms]} dictionary.
 
-    return text
+    All forms (bases and synonyms) go into one Aho-Corasick automaton, so
+    finding every form contained in a text is a single pass over it,
+    whatever the size of the dictionary. Expansions are memoized.
 
+    For each base contained in the text, the text is added with the base
+    replaced by each of its synonyms; for the first synonym (in dictionary
+    order) contained in the text, the text is added with it replaced by
+    the base.
+    """
 
-def expand_with_synonyms(text: str) -> list[str]:
+    def __init__(self, synonyms: dict[str, list[str]]):
+        self.synonyms: dict[str, list[str]] = {}
+        for base, variants in synonyms.items():
+            base = normalize_text(base)
+            if not base:
+                continue
+            known = self.synonyms.setdefault(base, [])
+            for variant in variants:
+                variant = normalize_text(variant)
+                if variant and variant != base and variant not in known:
+                    known.append(variant)
+
+        # form -> [(base index, synonym position)], position -1 for the base itself
+        self._bases = list(self.synonyms)
+        self._roles: dict[str, list[tuple[int, int]]] = {}
+        for index, base in enumerate(self._bases):
+            self._roles.setdefault(base, []).append((index, -1))
+            for position, variant in enumerate(self.synonyms[base]):
+                self._roles.setdefault(variant, []).append((index, position))
+
+        self._build_automaton(list(self._roles))
+        self._expand_cached = lru_cache(maxsize=EXPANSION_CACHE_SIZE)(self._expand)
+
+    def __len__(self) -> int:
+        return len(self._roles)
+
+    def _build_automaton(self, forms: list[str]) -> None:
+        # State 0 is the root; goto[state][char] -> state
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[list[str]] = [[]]
+
+        for form in forms:
+            state = 0
+            for char in form:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(form)
+
+        # Breadth-first: failure links, outputs inherited along them
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_forms(self, text: str) -> set[str]:
+        """Every dictionary form contained in text (overlapping matches included)."""
+        found = set()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+    def _expand(self, normalized: str) -> tuple[str, ...]:
+        results = {normalized}
+
+        # Per base: whether the base is present, and its first present synonym
+        base_present = set()
+        first_synonym: dict[int, int] = {}
+        for form in self.find_forms(normalized):
+            for index, position in self._roles[form]:
+                if position < 0:
+                    base_present.add(index)
+                elif position < first_synonym.get(index, len(self.synonyms[self._bases[index]])):
+                    first_synonym[index] = position
+
+        for index in base_present:
+            base = self._bases[index]
+            for variant in self.synonyms[base]:
+                results.add(normalized.replace(base, variant))
+        for index, position in first_synonym.items():
+            base = self._bases[index]
+            results.add(normalized.replace(self.synonyms[base][position], base))
+
+        return tuple(results)
+
+    def expand(self, text: str) -> list[str]:
+        """text (normalized) plus its synonym variants."""
+        return list(self._expand_cached(normalize_text(text)))
+
+
+# Built-in dictionary, used when no house/store dictionary is given
+DEFAULT_SYNONYMS = SynonymEngine(ITALIAN_SYNONYMS)
+
+
+def expand_with_synonyms(text: str, synonyms: Optional[SynonymEngine] = None) -> list[str]:
     """
     Expand a product name with its synonyms.
     Returns a list of possible names.
     """
-    normalized = normalize_text(text)
-    results = [normalized]
-
-    for base, synonyms in ITALIAN_SYNONYMS.items():
-        # If text contains the base word, add synonyms
-        if base in normalized:
-            for syn in synonyms:
-                results.append(normalized.replace(base, syn))
-
-        # If text contains a synonym, add the base word
-        for syn in synonyms:
-            if syn in normalized:
-                results.append(normalized.replace(syn, base))
-                break
-
-    return list(set(results))
+    return (synonyms or DEFAULT_SYNONYMS).expand(text)
 
 
 def calculate_match_score(
     receipt_text: str,
-    shopping_list_text: str
+    shopping_list_text: str,
+    synonyms: Optional[SynonymEngine] = None
 ) -> float:
     """
     Calculate matching score between receipt item and shopping list item.
@@ -143,8 +257,8 @@ def calculate_match_score(
         return 0.0
 
     # Get expanded versions with synonyms
-    receipt_variants = expand_with_synonyms(receipt_normalized)
-    shopping_variants = expand_with_synonyms(shopping_normalized)
+    receipt_variants = expand_with_synonyms(receipt_normalized, synonyms)
+    shopping_variants = expand_with_synonyms(shopping_normalized, synonyms)
 
     best_score = 0.0
 
@@ -164,7 +278,8 @@ def calculate_match_score(
 
 def find_best_match(
     receipt_item_name: str,
-    shopping_list_items: list[ShoppingListItem]
+    shopping_list_items: list[ShoppingListItem],
+    synonyms: Optional[SynonymEngine] = None
 ) -> tuple[Optional[ShoppingListItem], float]:
     """
     Find the best matching shopping list item for a receipt item.
@@ -178,11 +293,11 @@ def find_best_match(
     best_score = 0.0
 
     for item in shopping_list_items:
-        score = calculate_match_score(receipt_item_name, item.name)
+        score = calculate_match_score(receipt_item_name, item.name, synonyms)
 
         # Also try matching against grocy_product_name if available
         if item.grocy_product_name:
-            grocy_score = calculate_match_score(receipt_item_name, item.grocy_product_name)
+            grocy_score = calculate_match_score(receipt_item_name, item.grocy_product_name, synonyms)
             score = max(score, grocy_score)
 
         if score > best_score:
@@ -204,92 +319,251 @@ def classify_match(score: float) -> ReceiptItemMatchStatus:
         return ReceiptItemMatchStatus.EXTRA
 
 
+def _expand_names(names_per_item: list[list[str]], synonyms: SynonymEngine) -> tuple[list[str], np.ndarray]:
+    """
+    Normalized synonym variants of every item's names, flattened.
+
+    Returns:
+        (variants, owner item index per variant)
+    """
+    variants = []
+    owners = []
+    for index, names in enumerate(names_per_item):
+        item_variants = set()
+        for name in names:
+            if normalize_text(name):
+                item_variants.update(synonyms.expand(name))
+        variants.extend(item_variants)
+        owners.extend([index] * len(item_variants))
+    return variants, np.asarray(owners, dtype=np.intp)
+
+
+def score_matrix(
+    receipt_names: list[str],
+    shopping_names: list[list[str]],
+    synonyms: Optional[SynonymEngine] = None
+) -> np.ndarray:
+    """
+    calculate_match_score for every (receipt item, shopping item) pair.
+
+    shopping_names holds the names of each shopping item (name plus
+    grocy_product_name); a pair scores the best over all of them.
+    Empty names score 0.
+
+    Returns:
+        float matrix, one row per receipt item, one column per shopping item
+    """
+    scores = np.zeros((len(receipt_names), len(shopping_names)), dtype=np.float64)
+    synonyms = synonyms or DEFAULT_SYNONYMS
+    receipt_variants, receipt_owner = _expand_names([[name] for name in receipt_names], synonyms)
+    shopping_variants, shopping_owner = _expand_names(shopping_names, synonyms)
+    if not receipt_variants or not shopping_variants:
+        return scores
+
+    variant_scores = process.cdist(
+        receipt_variants, shopping_variants, scorer=MATCH_SCORERS[0], dtype=np.float64, workers=-1
+    )
+    for scorer in MATCH_SCORERS[1:]:
+        np.maximum(
+            variant_scores,
+            process.cdist(receipt_variants, shopping_variants, scorer=scorer, dtype=np.float64, workers=-1),
+            out=variant_scores,
+        )
+
+    # Best variant pair per item pair: reduce rows, then columns, by owner
+    by_receipt = np.full((len(receipt_names), len(shopping_variants)), -1.0)
+    np.maximum.at(by_receipt, receipt_owner, variant_scores)
+    np.maximum.at(scores.T, shopping_owner, by_receipt.T)
+    return scores
+
+
+def solve_assignment(weights: list[list[float]]) -> list[Optional[int]]:
+    """
+    Maximum-weight assignment (Hungarian algorithm, O(n^2 m)).
+
+    Args:
+        weights: rows x columns, non-negative
+
+    Returns:
+        Assigned column per row (None if the row has none: more rows than columns)
+    """
+    rows = len(weights)
+    columns = len(weights[0]) if rows else 0
+    if not rows or not columns:
+        return [None] * rows
+
+    # The algorithm needs rows <= columns: solve the transpose otherwise
+    if rows > columns:
+        by_column = solve_assignment([list(column) for column in zip(*weights)])
+        assignment: list[Optional[int]] = [None] * rows
+        for column, row in enumerate(by_column):
+            if row is not None:
+                assignment[row] = column
+        return assignment
+
+    # Minimize the negated weights; 1-based with index 0 as the virtual start
+    infinity = float("inf")
+    u = [0.0] * (rows + 1)
+    v = [0.0] * (columns + 1)
+    row_of = [0] * (columns + 1)  # Row assigned to each column
+    way = [0] * (columns + 1)
+
+    for row in range(1, rows + 1):
+        row_of[0] = row
+        column = 0
+        min_slack = [infinity] * (columns + 1)
+        used = [False] * (columns + 1)
+        while True:
+            used[column] = True
+            current_row = row_of[column]
+            delta = infinity
+            next_column = 0
+            for j in range(1, columns + 1):
+                if used[j]:
+                    continue
+                slack = -weights[current_row - 1][j - 1] - u[current_row] - v[j]
+                if slack < min_slack[j]:
+                    min_slack[j] = slack
+                    way[j] = column
+                if min_slack[j] < delta:
+                    delta = min_slack[j]
+                    next_column = j
+            for j in range(columns + 1):
+                if used[j]:
+                    u[row_of[j]] += delta
+                    v[j] -= delta
+                else:
+                    min_slack[j] -= delta
+            column = next_column
+            if row_of[column] == 0:
+                break
+        # Flip the augmenting path
+        while column:
+            previous = way[column]
+            row_of[column] = row_of[previous]
+            column = previous
+
+    assignment = [None] * rows
+    for j in range(1, columns + 1):
+        if row_of[j]:
+            assignment[row_of[j] - 1] = j - 1
+    return assignment
+
+
+def _find_llm_suggestion(suggestion: str, shopping_list_items: list[ShoppingListItem]) -> Optional[int]:
+    """Index of the shopping item the LLM named: exact normalized name, else containment."""
+    suggested_name = normalize_text(suggestion)
+    names = [normalize_text(item.name) for item in shopping_list_items]
+    if suggested_name in names:
+        return names.index(suggested_name)
+    for index, name in enumerate(names):
+        if suggested_name in name or name in suggested_name:
+            return index
+    return None
+
+
 def reconcile_receipt_items(
     receipt_items: list[ReceiptItem],
     shopping_list_items: list[ShoppingListItem],
-    llm_hints: Optional[dict] = None
+    llm_hints: Optional[dict] = None,
+    synonyms: Optional[SynonymEngine] = None,
+    known_matches: Optional[dict[str, int]] = None,
+    known_names: Optional[dict[str, str]] = None
 ) -> list[MatchResult]:
     """
     Reconcile receipt items against shopping list items.
 
+    Pairs at or above AUTO_MATCH_THRESHOLD are matched one-to-one so that
+    the total score is maximal. Other receipt items get the best shopping
+    item left over as a suggestion (SUGGEST_THRESHOLD) or become extras.
+
     Args:
         receipt_items: Items extracted from receipt OCR
         shopping_list_items: Items from the shopping list
         llm_hints: Optional dict from LLM with format:
             {receipt_name: {"match": suggested_match, "confidence": 0.0-1.0, "interpreted": full_name}}
+        synonyms: Synonym dictionary of the house/store (default: built-in)
+        known_matches: receipt item id -> index in shopping_list_items, for
+            lines resolved from memory (scored 100, no fuzzy matching)
+        known_names: receipt item id -> product name to fuzzy match instead
+            of the receipt text (remembered products not on the list)
 
     Returns list of MatchResult with match status for each receipt item.
     """
-    results = []
     llm_hints = llm_hints or {}
-
-    # Track which shopping list items have been matched
-    matched_shopping_items = set()
-
-    # Build a lookup for shopping items by name (normalized)
-    shopping_by_name = {
-        normalize_text(item.name): item
-        for item in shopping_list_items
+    known_matches = known_matches or {}
+    known_names = known_names or {}
+    item_names = [receipt_item.parsed_name or receipt_item.raw_text for receipt_item in receipt_items]
+
+    # Lines resolved from memory skip fuzzy matching
+    known_rows = {
+        row: known_matches[str(receipt_item.id)]
+        for row, receipt_item in enumerate(receipt_items)
+        if str(receipt_item.id) in known_matches
     }
-
-    # First pass: find all best matches
-    for receipt_item in receipt_items:
-        item_name = receipt_item.parsed_name or receipt_item.raw_text
-
-        # Filter out already matched items
-        available_items = [
-            item for item in shopping_list_items
-            if item.id not in matched_shopping_items
-        ]
-
-        # Check for LLM hint first
+    fuzzy_rows = [row for row in range(len(receipt_items)) if row not in known_rows]
+
+    fuzzy_scores = np.zeros((len(receipt_items), len(shopping_list_items)), dtype=np.float64)
+    if fuzzy_rows:
+        fuzzy_scores[fuzzy_rows] = score_matrix(
+            [known_names.get(str(receipt_items[row].id), item_names[row]) for row in fuzzy_rows],
+            [[item.name] + ([item.grocy_product_name] if item.grocy_product_name else []) for item in shopping_list_items],
+            synonyms,
+        )
+    for row, column in known_rows.items():
+        fuzzy_scores[row, column] = 100.0
+
+    # LLM hints raise the score of the pair they name
+    scores = fuzzy_scores.copy()
+    llm_pairs = set()
+    for row in fuzzy_rows:
+        item_name = item_names[row]
         llm_hint = llm_hints.get(item_name)
-        llm_boosted_match = None
-        llm_boosted_score = 0.0
-
-        if llm_hint and llm_hint.get("match"):
-            # LLM suggested a match - find the corresponding shopping item
-            suggested_name = normalize_text(llm_hint["match"])
-            llm_boosted_match = shopping_by_name.get(suggested_name)
-
-            # If not exact match, try fuzzy on the suggestion
-            if not llm_boosted_match:
-                for item in available_items:
-                    if normalize_text(item.name) == suggested_name:
-                        llm_boosted_match = item
-                        break
-                    # Try partial match
-                    if suggested_name in normalize_text(item.name) or normalize_text(item.name) in suggested_name:
-                        llm_boosted_match = item
-                        break
-
-            if llm_boosted_match and llm_boosted_match.id not in matched_shopping_items:
-                # Use LLM confidence, scaled to our thresholds
-                llm_boosted_score = llm_hint.get("confidence", 0.7) * 100
-                logger.debug(f"LLM hint: '{item_name}' -> '{llm_hint['match']}' (conf: {llm_boosted_score:.0f}%)")
-
-        # Also run traditional fuzzy matching
-        best_match, fuzzy_score = find_best_match(item_name, available_items)
-
-        # Choose the better result between LLM and fuzzy
-        if llm_boosted_match and llm_boosted_score > fuzzy_score:
-            final_match = llm_boosted_match
-            final_score = llm_boosted_score
-            logger.info(f"Using LLM match for '{item_name}' -> '{final_match.name}' (LLM: {llm_boosted_score:.0f}% > fuzzy: {fuzzy_score:.0f}%)")
-        else:
-            final_match = best_match
-            final_score = fuzzy_score
-
-        status = classify_match(final_score)
-
-        # If auto-matched, mark shopping item as used
-        if status == ReceiptItemMatchStatus.MATCHED and final_match:
-            matched_shopping_items.add(final_match.id)
+        if not llm_hint or not llm_hint.get("match"):
+            continue
+        column = _find_llm_suggestion(llm_hint["match"], shopping_list_items)
+        if column is None:
+            continue
+        # Use LLM confidence, scaled to our thresholds
+        llm_score = llm_hint.get("confidence", 0.7) * 100
+        logger.debug(f"LLM hint: '{item_name}' -> '{llm_hint['match']}' (conf: {llm_score:.0f}%)")
+        if llm_score > scores[row, column]:
+            scores[row, column] = llm_score
+            llm_pairs.add((row, column))
+
+    # Only automatic matches use up a shopping item
+    weights = np.where(scores >= AUTO_MATCH_THRESHOLD, scores, 0.0)
+    assignment = solve_assignment(weights.tolist())
+
+    matched_columns = {
+        column for row, column in enumerate(assignment)
+        if column is not None and weights[row, column] > 0
+    }
+    available = np.array([column not in matched_columns for column in range(len(shopping_list_items))], dtype=bool)
+
+    results = []
+    for row, receipt_item in enumerate(receipt_items):
+        column = assignment[row]
+        if column is None or weights[row, column] <= 0:
+            # Best shopping item not taken by an automatic match
+            column = None
+            if available.any():
+                candidates = np.where(available, scores[row], 0.0)
+                if candidates.max() > 0:
+                    column = int(candidates.argmax())
+        final_score = float(scores[row, column]) if column is not None else 0.0
+        final_match = shopping_list_items[column] if column is not None else None
+
+        if (row, column) in llm_pairs:
+            logger.info(
+                f"Using LLM match for '{item_names[row]}' -> '{final_match.name}' "
+                f"(LLM: {final_score:.0f}% > fuzzy: {fuzzy_scores[row, column]:.0f}%)"
+            )
 
         results.append(MatchResult(
             receipt_item_id=str(receipt_item.id),
             shopping_list_item_id=str(final_match.id) if final_match and final_score >= SUGGEST_THRESHOLD else None,
-            match_status=status,
+            match_status=classify_match(final_score),
             confidence=final_score,
             matched_name=final_match.name if final_match else None
         ))
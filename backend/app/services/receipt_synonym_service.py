@@ -0,0 +1,135 @@
+"""
+Receipt Synonym Service
+
+Per house / per store synonym dictionaries for receipt reconciliation,
+stored in receipt_synonyms (see the model for the layers).
+
+Compiled SynonymEngines are cached per (house, store). A cached engine is
+reused while its rows are unchanged: every lookup checks the row count and
+latest update of the scope with one aggregate query, so edits made by any
+API worker are picked up on the next reconciliation.
+"""
+
+import logging
+import threading
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from app.models.receipt_synonym import ReceiptSynonym
+from app.services.receipt_reconciliation import ITALIAN_SYNONYMS, SynonymEngine, normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Compiled engines kept in memory (one per house/store pair in use)
+ENGINE_CACHE_SIZE = 64
+
+_engines_lock = threading.Lock()
+_engines: dict[tuple, tuple[tuple, SynonymEngine]] = {}
+
+
+def _scope_filter(house_id: Optional[UUID], store_id: Optional[UUID]):
+    """Global rows, plus the house rows, plus the store rows of that house."""
+    conditions = [and_(ReceiptSynonym.house_id.is_(None), ReceiptSynonym.store_id.is_(None))]
+    if house_id:
+        conditions.append(and_(ReceiptSynonym.house_id == house_id, ReceiptSynonym.store_id.is_(None)))
+        if store_id:
+            conditions.append(and_(ReceiptSynonym.house_id == house_id, ReceiptSynonym.store_id == store_id))
+    return or_(*conditions)
+
+
+def get_synonym_engine(db: Session, house_id: Optional[UUID], store_id: Optional[UUID] = None) -> SynonymEngine:
+    """
+    Compiled synonym dictionary for a house (and store).
+
+    Global entries come first, then the house's, then the store's: they all
+    add to the same bases.
+    """
+    scope = _scope_filter(house_id, store_id)
+    signature = tuple(db.query(func.count(ReceiptSynonym.id), func.max(ReceiptSynonym.updated_at)).filter(scope).one())
+    key = (house_id, store_id)
+
+    with _engines_lock:
+        cached = _engines.get(key)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+    rows = db.query(ReceiptSynonym.base, ReceiptSynonym.synonym).filter(scope).order_by(
+        ReceiptSynonym.house_id.isnot(None),
+        ReceiptSynonym.store_id.isnot(None),
+        ReceiptSynonym.created_at,
+    ).all()
+    dictionary: dict[str, list[str]] = {}
+    for base, synonym in rows:
+        dictionary.setdefault(base, []).append(synonym)
+    engine = SynonymEngine(dictionary)
+
+    with _engines_lock:
+        if key not in _engines and len(_engines) >= ENGINE_CACHE_SIZE:
+            _engines.pop(next(iter(_engines)))
+        _engines[key] = (signature, engine)
+
+    logger.info(f"[Synonyms] Compiled {len(engine)} forms for house={house_id} store={store_id}")
+    return engine
+
+
+def list_synonyms(db: Session, house_id: UUID, store_id: Optional[UUID] = None) -> list[ReceiptSynonym]:
+    """Entries that apply to a house (and store), global ones included."""
+    return db.query(ReceiptSynonym).filter(_scope_filter(house_id, store_id)).order_by(
+        ReceiptSynonym.base, ReceiptSynonym.synonym
+    ).all()
+
+
+def add_synonym(
+    db: Session,
+    house_id: UUID,
+    store_id: Optional[UUID],
+    base: str,
+    synonym: str,
+) -> Optional[ReceiptSynonym]:
+    """
+    Add a house (or store) entry. Values are normalized.
+
+    Returns:
+        The new entry, or None if the same entry already exists in that scope
+        or one of the values is empty after normalization
+    """
+    base = normalize_text(base)
+    synonym = normalize_text(synonym)
+    if not base or not synonym or base == synonym:
+        return None
+
+    existing = db.query(ReceiptSynonym.id).filter(
+        ReceiptSynonym.house_id == house_id,
+        ReceiptSynonym.store_id.is_(None) if store_id is None else ReceiptSynonym.store_id == store_id,
+        ReceiptSynonym.base == base,
+        ReceiptSynonym.synonym == synonym,
+    ).first()
+    if existing:
+        return None
+
+    entry = ReceiptSynonym(house_id=house_id, store_id=store_id, base=base, synonym=synonym)
+    db.add(entry)
+    db.commit()
+    db.refresh(entry)
+    return entry
+
+
+def seed_builtin_synonyms(db: Session) -> int:
+    """Store ITALIAN_SYNONYMS as the global dictionary if there is none yet."""
+    has_global = db.query(ReceiptSynonym.id).filter(
+        ReceiptSynonym.house_id.is_(None), ReceiptSynonym.store_id.is_(None)
+    ).first()
+    if has_global:
+        return 0
+
+    rows = [
+        ReceiptSynonym(base=base, synonym=synonym)
+        for base, synonyms in ITALIAN_SYNONYMS.items()
+        for synonym in synonyms
+    ]
+    db.add_all(rows)
+    db.commit()
+    return len(rows)
@@ -0,0 +1,135 @@
+"""
+Store Order Service
+
+Learns the picking order of a store from completed shopping trips.
+
+Each completed list gives a check sequence (items ordered by checked_at).
+Positions are normalized to 0..1 so short and long trips weigh the same,
+then merged into store_item_order as a running average per item. After
+STORE_ORDER_MAX_WEIGHT trips the average becomes a moving average, so a
+rearranged store is picked up within a few visits.
+
+Store ordering is shared across ALL houses that shop at the same store.
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.shopping_list import ShoppingList, ShoppingListItem
+from app.models.store_item_order import StoreItemOrder
+from app.models.store_order_merged_list import StoreOrderMergedList
+
+logger = logging.getLogger(__name__)
+
+# Trips after which older history stops gaining weight
+STORE_ORDER_MAX_WEIGHT = 20
+
+
+def item_order_keys(name: str, grocy_product_id: Optional[int] = None) -> List[str]:
+    """Keys an item is ranked under: grocy product first, then name."""
+    keys = []
+    if grocy_product_id:
+        keys.append(f"grocy:{grocy_product_id}")
+    keys.append(name.lower().strip()[:255])
+    return keys
+
+
+def trip_positions(items: Iterable[ShoppingListItem]) -> Dict[str, float]:
+    """
+    Normalized check position (0..1) per item key for one trip.
+
+    items must be the checked items ordered by checked_at.
+    """
+    items = list(items)
+    last = max(len(items) - 1, 1)
+    positions: Dict[str, float] = {}
+    for idx, item in enumerate(items):
+        position = idx / last if len(items) > 1 else 0.5
+        for key in item_order_keys(item.name, item.grocy_product_id):
+            positions.setdefault(key, position)
+    return positions
+
+
+def record_completed_list(db: Session, shopping_list: ShoppingList) -> int:
+    """
+    Merge the check order of a completed list into its store's ranking.
+
+    Does not commit: the caller commits together with the status change.
+    A list already merged into the store (recorded in
+    store_order_merged_lists) is not counted again, even after other lists.
+
+    Returns:
+        Number of item keys updated
+    """
+    if not shopping_list.store_id:
+        return 0
+
+    items = db.query(ShoppingListItem).filter(
+        ShoppingListItem.shopping_list_id == shopping_list.id,
+        ShoppingListItem.checked == True,
+        ShoppingListItem.checked_at.isnot(None)
+    ).order_by(ShoppingListItem.checked_at).all()
+
+    positions = trip_positions(items)
+    if not positions:
+        return 0
+
+    # Claim the (store, list) pair first: concurrent completions merge once
+    claimed = db.execute(
+        insert(StoreOrderMergedList).values(
+            store_id=shopping_list.store_id, list_id=shopping_list.id
+        ).on_conflict_do_nothing(
+            constraint="uq_store_order_merged_lists_store_list"
+        ).returning(StoreOrderMergedList.id)
+    ).first()
+    if claimed is None:
+        logger.info(f"[StoreOrder] List {shopping_list.id} already merged into store {shopping_list.store_id}")
+        return 0
+
+    stmt = insert(StoreItemOrder).values([
+        {
+            "store_id": shopping_list.store_id,
+            "item_key": key,
+            "avg_position": position,
+            "trips": 1,
+            "last_list_id": shopping_list.id,
+        }
+        for key, position in positions.items()
+    ])
+    existing = StoreItemOrder.__table__.c
+    weight = func.least(existing.trips + 1, STORE_ORDER_MAX_WEIGHT)
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_store_item_order_store_key",
+        set_={
+            "avg_position": existing.avg_position + (stmt.excluded.avg_position - existing.avg_position) / weight,
+            "trips": existing.trips + 1,
+            "last_list_id": stmt.excluded.last_list_id,
+            "updated_at": func.now(),
+        },
+    )
+    db.execute(stmt)
+
+    logger.info(f"[StoreOrder] Merged {len(positions)} keys from list {shopping_list.id} into store {shopping_list.store_id}")
+    return len(positions)
+
+
+def get_store_order_map(db: Session, store_id: Optional[UUID], item_keys: Iterable[str]) -> Dict[str, float]:
+    """
+    item key -> average position for the given keys, in one indexed lookup.
+    """
+    if not store_id:
+        return {}
+    keys = list(set(item_keys))
+    if not keys:
+        return {}
+
+    rows: List[Tuple[str, float]] = db.query(StoreItemOrder.item_key, StoreItemOrder.avg_position).filter(
+        StoreItemOrder.store_id == store_id,
+        StoreItemOrder.item_key.in_(keys)
+    ).all()
+    return dict(rows)
@@ -0,0 +1,138 @@
+"""
+Receipt reconciliation benchmark.
+
+Compares reconcile_receipt_items (score matrix with rapidfuzz cdist +
+global assignment) with the previous implementation (per receipt item,
+score every remaining shopping item with calculate_match_score, greedy).
+
+Usage (from backend/):
+    python -m benchmarks.reconciliation_benchmark [--repeat 3] [--seed 42]
+
+Prints, per list size: time of both implementations, automatic matches
+and their total score, and checks that the score matrix agrees with
+calculate_match_score.
+"""
+
+import argparse
+import random
+import time
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.models.receipt import ReceiptItemMatchStatus
+from app.services.receipt_reconciliation import (
+    ITALIAN_SYNONYMS,
+    calculate_match_score,
+    classify_match,
+    find_best_match,
+    reconcile_receipt_items,
+    score_matrix,
+)
+
+SIZES = [(10, 8), (30, 25), (60, 50), (120, 100)]
+
+QUALIFIERS = ["", "bio", "500g", "1kg", "conf 6", "coop", "esselunga", "x2", "light", "fresco"]
+
+
+def _receipt_text(name: str, rng: random.Random) -> str:
+    """Receipt-style spelling: abbreviated, upper case, with extra tokens."""
+    words = name.split()
+    if rng.random() < 0.5:
+        words = [word[:rng.randint(3, max(3, len(word)))] for word in words]
+    text = " ".join(words + [rng.choice(QUALIFIERS)]).strip()
+    return text.upper()
+
+
+def build_case(receipt_count: int, shopping_count: int, rng: random.Random):
+    """Shopping list + receipt where most lines come from the list and the rest are extras."""
+    vocabulary = sorted({name for base, synonyms in ITALIAN_SYNONYMS.items() for name in [base, *synonyms]})
+    shopping_names = [
+        f"{rng.choice(vocabulary)} {rng.choice(QUALIFIERS)}".strip()
+        for _ in range(shopping_count)
+    ]
+    shopping_items = [
+        SimpleNamespace(id=uuid4(), name=name, grocy_product_name=name.title() if rng.random() < 0.3 else None)
+        for name in shopping_names
+    ]
+
+    receipt_items = []
+    for _ in range(receipt_count):
+        source = rng.choice(shopping_names) if rng.random() < 0.8 else rng.choice(vocabulary)
+        receipt_items.append(SimpleNamespace(id=uuid4(), parsed_name=_receipt_text(source, rng), raw_text=""))
+
+    return receipt_items, shopping_items
+
+
+def reconcile_greedy(receipt_items, shopping_list_items):
+    """The previous reconciliation loop (without LLM hints)."""
+    matched = set()
+    results = []
+    for receipt_item in receipt_items:
+        item_name = receipt_item.parsed_name or receipt_item.raw_text
+        available = [item for item in shopping_list_items if item.id not in matched]
+        best_match, score = find_best_match(item_name, available)
+        status = classify_match(score)
+        if status == ReceiptItemMatchStatus.MATCHED and best_match:
+            matched.add(best_match.id)
+        results.append((status, score))
+    return results
+
+
+def _summary(statuses_scores):
+    matched = [score for status, score in statuses_scores if status == ReceiptItemMatchStatus.MATCHED]
+    return len(matched), sum(matched)
+
+
+def _timed(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def check_scores(receipt_items, shopping_items) -> float:
+    """Largest difference between score_matrix and calculate_match_score."""
+    names = [item.parsed_name for item in receipt_items]
+    matrix = score_matrix(names, [[item.name] + ([item.grocy_product_name] if item.grocy_product_name else []) for item in shopping_items])
+    worst = 0.0
+    for row, name in enumerate(names):
+        for column, item in enumerate(shopping_items):
+            expected = calculate_match_score(name, item.name)
+            if item.grocy_product_name:
+                expected = max(expected, calculate_match_score(name, item.grocy_product_name))
+            worst = max(worst, abs(matrix[row, column] - expected))
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case, best time is reported")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'receipt x list':>15} {'greedy ms':>10} {'matrix ms':>10} {'speedup':>8} "
+          f"{'greedy matches':>15} {'matrix matches':>15} {'max diff':>9}")
+
+    for receipt_count, shopping_count in SIZES:
+        receipt_items, shopping_items = build_case(receipt_count, shopping_count, rng)
+
+        greedy_time, greedy = _timed(lambda: reconcile_greedy(receipt_items, shopping_items), args.repeat)
+        matrix_time, matrix = _timed(lambda: reconcile_receipt_items(receipt_items, shopping_items), args.repeat)
+
+        greedy_count, greedy_total = _summary(greedy)
+        matrix_count, matrix_total = _summary([(r.match_status, r.confidence) for r in matrix])
+        difference = check_scores(receipt_items, shopping_items)
+
+        print(
+            f"{receipt_count:>6} x {shopping_count:<6} {greedy_time * 1000:>10.1f} {matrix_time * 1000:>10.1f} "
+            f"{greedy_time / matrix_time:>7.1f}x "
+            f"{greedy_count:>4} ({greedy_total:>7.0f}) {matrix_count:>6} ({matrix_total:>7.0f}) {difference:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,19 @@ import { useParams, Link } from 'react-router-dom'
 import { TouchCrop, type CropArea } from '@/components/TouchCrop'
 import receiptsService from '@/services/receipts'
 import shoppingListsService from '@/services/shoppingLists'
-import type { Receipt, ReceiptItem, ReconciliationResponse, ShoppingList } from '@/types'
+import type { Receipt, ReceiptItem, ReceiptProcessingStatus, ReconciliationResponse, ShoppingList } from '@/types'
 import type { ReceiptItemMatchStatus } from '@/types'
 
 type ProcessingStep = 'idle' | 'editing' | 'saving' | 'processing' | 'review' | 'reconciling' | 'done' | 'error'
 
+function processingLabel(status: ReceiptProcessingStatus | null): string {
+  const progress = status?.progress
+  if (!status || status.job_status === 'pending' || !progress) return 'In coda per l\'elaborazione...'
+  if (progress.stage === 'ocr') return `Elaborazione OCR... (${progress.images_done}/${progress.images_total} immagini)`
+  if (progress.stage === 'llm_parse') return 'Riconoscimento prodotti...'
+  return 'Salvataggio articoli...'
+}
+
 interface EditableItem {
   id: string
   text: string
@@ -26,6 +34,7 @@ export function ReceiptUpload() {
   const [reconciliation, setReconciliation] = useState<ReconciliationResponse | null>(null)
   const [step, setStep] = useState<ProcessingStep>('idle')
   const [error, setError] = useState<string | null>(null)
+  const [processingStatus, setProcessingStatus] = useState<ReceiptProcessingStatus | null>(null)
   const [selectedExtras, setSelectedExtras] = useState<Set<string>>(new Set())
 
   // Editing state - which image is being edited
@@ -92,6 +101,7 @@ export function ReceiptUpload() {
     const img = sortedImages[index]
     if (!img) return
 
+    // Full resolution only when the image is opened for editing
     setEditingImage({
       url: receiptsService.getImageUrl(img.image_path),
     })
@@ -224,7 +234,8 @@ export function ReceiptUpload() {
 
     try {
       setStep('processing')
-      const processed = await receiptsService.process(receipt.id)
+      setProcessingStatus(null)
+      const processed = await receiptsService.process(receipt.id, setProcessingStatus)
       setReceipt(processed)
 
       // Convert to editable items
@@ -465,7 +476,8 @@ export function ReceiptUpload() {
                 {sortedImages.map((img, idx) => (
                   <div key={img.id} className="relative">
                     <img
-                      src={receiptsService.getImageUrl(img.image_path)}
+                      src={receiptsService.getImageUrl(img.image_path, 'thumb')}
+                      loading="lazy"
                       alt={`Foto ${idx + 1}`}
                       className="w-full aspect-square object-cover rounded-lg cursor-pointer active:opacity-80"
                       onClick={() => receipt?.status === 'uploaded' && handleReEditImage(idx)}
@@ -548,7 +560,7 @@ export function ReceiptUpload() {
       {step === 'processing' && (
         <div className="card p-6 text-center">
           <div className="inline-block animate-spin rounded-full h-10 w-10 border-4 border-primary-500 border-t-transparent mb-4" />
-          <p className="text-gray-600">Elaborazione OCR...</p>
+          <p className="text-gray-600">{processingLabel(processingStatus)}</p>
         </div>
       )}
 
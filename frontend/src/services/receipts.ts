@@ -4,8 +4,12 @@ import type {
   ReceiptSummary,
   ReceiptItem,
   ReconciliationResponse,
+  ReceiptProcessingStatus,
 } from '@/types'
 
+// Polling interval while a receipt is being processed
+const PROCESSING_POLL_MS = 1500
+
 interface ReceiptsResponse {
   receipts: ReceiptSummary[]
   total: number
@@ -48,13 +52,45 @@ export const receiptsService = {
   },
 
   /**
-   * Process a receipt with OCR
+   * Queue OCR processing for a receipt (returns immediately)
    */
-  async process(receiptId: string): Promise<Receipt> {
+  async startProcessing(receiptId: string): Promise<ReceiptProcessingStatus> {
     const response = await api.post(`/receipts/${receiptId}/process`)
     return response.data
   },
 
+  /**
+   * Get the processing state of a receipt
+   */
+  async getProcessingStatus(receiptId: string): Promise<ReceiptProcessingStatus> {
+    const response = await api.get(`/receipts/${receiptId}/processing`)
+    return response.data
+  },
+
+  /**
+   * Process a receipt with OCR and wait for the result.
+   * Polls the processing job, reporting progress along the way.
+   */
+  async process(
+    receiptId: string,
+    onProgress?: (status: ReceiptProcessingStatus) => void
+  ): Promise<Receipt> {
+    let status = await this.startProcessing(receiptId)
+    onProgress?.(status)
+
+    while (!status.finished) {
+      await new Promise((resolve) => setTimeout(resolve, PROCESSING_POLL_MS))
+      status = await this.getProcessingStatus(receiptId)
+      onProgress?.(status)
+    }
+
+    // Anything else (error, or a run that ended without processing the receipt) is a failure
+    if (status.receipt_status !== 'processed' && status.receipt_status !== 'reconciled') {
+      throw new Error(status.error || 'Receipt processing failed')
+    }
+    return this.getById(receiptId)
+  },
+
   /**
    * Reconcile receipt items with shopping list
    */
@@ -124,10 +160,12 @@ export const receiptsService = {
   },
 
   /**
-   * Get image URL for a receipt
+   * URL of a stored image. "thumb" (320px) and "preview" (1280px) are
+   * downscaled renditions; omit the variant for full resolution.
    */
-  getImageUrl(imagePath: string): string {
-    return `/api/v1/receipts/images/file/${imagePath}`
+  getImageUrl(imagePath: string, variant?: 'thumb' | 'preview'): string {
+    const url = `/api/v1/receipts/images/file/${imagePath}`
+    return variant ? `${url}?variant=${variant}` : url
   },
 }
 
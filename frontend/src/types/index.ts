@@ -502,6 +502,25 @@ export interface Receipt {
   updated_at: string
 }
 
+export interface ReceiptProcessingProgress {
+  stage: 'ocr' | 'llm_parse' | 'items'
+  images_done: number
+  images_total: number
+  done_positions?: number[]
+  llm?: boolean
+  items?: number
+}
+
+export interface ReceiptProcessingStatus {
+  receipt_id: string
+  receipt_status: ReceiptStatus
+  job_id?: string
+  job_status?: 'pending' | 'running' | 'done' | 'failed'
+  progress?: ReceiptProcessingProgress
+  error?: string
+  finished: boolean
+}
+
 export interface CategoryCreate {
   name: string
   description?: string
@@ -1,37 +1,114 @@
 """
 OCR Microservice
 Extracts text from receipt images using EasyOCR.
+
+OCR inference runs in a pool of worker processes, each holding its own
+preloaded EasyOCR reader, so the event loop (and /health) stays responsive
+and several receipts are processed in parallel. When all workers are busy
+and the queue is full, /process answers 429 with Retry-After.
+
+Environment:
+    OCR_WORKERS              worker processes (~1GB RAM each), default 2
+    OCR_QUEUE_DEPTH          requests allowed to wait for a worker, default 8
+    OCR_RETRY_AFTER_SECONDS  Retry-After sent with 429, default 15
+    OCR_CACHE_DIR            result cache directory, default /app/cache/ocr
+    OCR_CACHE_ENABLED        set to 0 to disable the result cache
+    OCR_CACHE_MAX_MB         result cache size limit, oldest entries evicted first, default 512
+    OCR_TILING_ENABLED       set to 0 to always downscale instead of tiling
+    OCR_TILE_HEIGHT          strip height in pixels for tall images, default 1024
+    OCR_TILE_OVERLAP         overlap between strips in pixels, default 160
+    OCR_TILE_MAX_WIDTH       strips wider than this are downscaled, default 1600
+    OCR_TILE_BATCH_SIZE      recognizer batch size per strip, default 4
+    OCR_LOG_RETENTION_DAYS   scan/error log entries older than this are dropped, default 90
+    OCR_LOG_MAX_SCANS        scan log entries kept at most, default 10000
+    OCR_LOG_MAX_ERRORS       error log entries kept at most, default 5000
 """
 
 import io
 import os
 import re
-import gc
 import json
+import math
+import time
+import shutil
+import hashlib
+import asyncio
 import logging
+import sqlite3
+import threading
 import traceback
-from datetime import datetime
-from typing import Optional
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from typing import List, Optional
 from dataclasses import dataclass, asdict
 
+import statistics
+
 import numpy as np
 import easyocr
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.responses import JSONResponse
-from PIL import Image, ImageEnhance, ImageFilter, ImageOps
+from PIL import Image, ImageOps
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Log directory for OCR scans
 OCR_LOG_DIR = "/app/logs"
+OCR_LOG_DB = os.path.join(OCR_LOG_DIR, "ocr_log.db")
+# Legacy JSONL logs, imported into OCR_LOG_DB once
 OCR_LOG_FILE = os.path.join(OCR_LOG_DIR, "ocr_scans.jsonl")
 ERROR_LOG_FILE = os.path.join(OCR_LOG_DIR, "ocr_errors.jsonl")
 
-# Initialize EasyOCR reader (Italian + English)
-logger.info("Loading EasyOCR models...")
-reader = easyocr.Reader(['it', 'en'], gpu=False)
-logger.info("EasyOCR models loaded successfully")
+# Scan/error log retention
+OCR_LOG_RETENTION_DAYS = int(os.environ.get("OCR_LOG_RETENTION_DAYS", "90"))
+OCR_LOG_MAX_SCANS = int(os.environ.get("OCR_LOG_MAX_SCANS", "10000"))
+OCR_LOG_MAX_ERRORS = int(os.environ.get("OCR_LOG_MAX_ERRORS", "5000"))
+
+# Worker pool configuration
+OCR_WORKERS = int(os.environ.get("OCR_WORKERS", "2"))
+OCR_QUEUE_DEPTH = int(os.environ.get("OCR_QUEUE_DEPTH", "8"))
+OCR_RETRY_AFTER_SECONDS = int(os.environ.get("OCR_RETRY_AFTER_SECONDS", "15"))
+
+# OCR result cache: one JSON file per (image SHA-256, OCR parameters)
+OCR_CACHE_DIR = os.environ.get("OCR_CACHE_DIR", "/app/cache/ocr")
+OCR_CACHE_ENABLED = os.environ.get("OCR_CACHE_ENABLED", "1") != "0"
+OCR_CACHE_MAX_MB = int(os.environ.get("OCR_CACHE_MAX_MB", "512"))
+# Eviction stops once the cache is back under this fraction of the limit
+OCR_CACHE_PRUNE_TARGET = 0.8
+
+# Tiling: tall receipts are read in overlapping full-resolution strips
+# instead of being shrunk to max_dim (which merges lines)
+OCR_TILING = {
+    "enabled": os.environ.get("OCR_TILING_ENABLED", "1") != "0",
+    "tile_height": int(os.environ.get("OCR_TILE_HEIGHT", "1024")),
+    "overlap": int(os.environ.get("OCR_TILE_OVERLAP", "160")),
+    "max_width": int(os.environ.get("OCR_TILE_MAX_WIDTH", "1600")),
+    "min_aspect": 1.8,  # height / width above which an image is tiled
+    "batch_size": int(os.environ.get("OCR_TILE_BATCH_SIZE", "4")),
+}
+
+# Everything that changes the OCR output for a given image.
+# Bump "pipeline" when line grouping or parsing changes.
+OCR_PARAMS = {
+    "pipeline": 2,
+    "languages": ["it", "en"],
+    "min_dim": 600,
+    "max_dim": 1200,
+    "readtext": {"min_size": 10, "text_threshold": 0.7, "low_text": 0.4},
+    "line_threshold": 20,
+    "tiling": OCR_TILING,
+}
+OCR_PARAMS_HASH = hashlib.sha256(json.dumps(OCR_PARAMS, sort_keys=True).encode()).hexdigest()[:16]
+
+EXIF_ORIENTATION_TAG = 0x0112
+
+# EasyOCR reader (Italian + English), one per worker process.
+# Set by init_ocr_worker; stays None in the API process.
+reader = None
 
 
 def ensure_log_dir():
@@ -39,13 +116,295 @@ def ensure_log_dir():
     os.makedirs(OCR_LOG_DIR, exist_ok=True)
 
 
+class ScanLogStore:
+    """
+    OCR scan and error log in SQLite (WAL mode).
+
+    - Tail queries walk the primary key backwards: cost depends on the
+      page size, not on the log size
+    - scan_stats holds running totals, kept up to date by triggers on
+      insert and delete, so stats never scan the log
+    - Retention (age and row count) is applied every PRUNE_EVERY writes
+
+    The connection is opened lazily, so worker processes importing this
+    module never touch the file.
+    """
+
+    PRUNE_EVERY = 100
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS scans (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            filename TEXT,
+            store_detected TEXT,
+            total_detected REAL,
+            average_confidence REAL NOT NULL DEFAULT 0,
+            raw_lines_count INTEGER NOT NULL DEFAULT 0,
+            parsed_lines_count INTEGER NOT NULL DEFAULT 0,
+            image_width INTEGER,
+            image_height INTEGER,
+            details TEXT NOT NULL  -- JSON: raw_text, raw_lines, parsed_lines
+        );
+        CREATE INDEX IF NOT EXISTS idx_scans_timestamp ON scans(timestamp);
+        CREATE INDEX IF NOT EXISTS idx_scans_store ON scans(store_detected);
+        CREATE INDEX IF NOT EXISTS idx_scans_confidence ON scans(average_confidence);
+
+        CREATE TABLE IF NOT EXISTS errors (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            filename TEXT,
+            error TEXT,
+            error_type TEXT,
+            stage TEXT,
+            image_width INTEGER,
+            image_height INTEGER,
+            traceback TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_errors_timestamp ON errors(timestamp);
+
+        CREATE TABLE IF NOT EXISTS scan_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total INTEGER NOT NULL,
+            sum_parsed_lines INTEGER NOT NULL,
+            sum_confidence REAL NOT NULL,
+            errors_total INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO scan_stats VALUES (1, 0, 0, 0, 0);
+
+        CREATE TRIGGER IF NOT EXISTS trg_scans_insert AFTER INSERT ON scans BEGIN
+            UPDATE scan_stats SET total = total + 1,
+                sum_parsed_lines = sum_parsed_lines + NEW.parsed_lines_count,
+                sum_confidence = sum_confidence + NEW.average_confidence
+            WHERE id = 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_scans_delete AFTER DELETE ON scans BEGIN
+            UPDATE scan_stats SET total = total - 1,
+                sum_parsed_lines = sum_parsed_lines - OLD.parsed_lines_count,
+                sum_confidence = sum_confidence - OLD.average_confidence
+            WHERE id = 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_errors_insert AFTER INSERT ON errors BEGIN
+            UPDATE scan_stats SET errors_total = errors_total + 1 WHERE id = 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_errors_delete AFTER DELETE ON errors BEGIN
+            UPDATE scan_stats SET errors_total = errors_total - 1 WHERE id = 1;
+        END;
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            ensure_log_dir()
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.SCHEMA)
+            self._conn = conn
+            self._import_legacy()
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def _insert_scan(self, conn: sqlite3.Connection, entry: dict):
+        size = entry.get("image_size") or {}
+        conn.execute(
+            "INSERT INTO scans (timestamp, filename, store_detected, total_detected, average_confidence,"
+            " raw_lines_count, parsed_lines_count, image_width, image_height, details)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                entry["timestamp"], entry.get("filename"), entry.get("store_detected"),
+                entry.get("total_detected"), entry.get("average_confidence") or 0.0,
+                entry.get("raw_lines_count") or 0, entry.get("parsed_lines_count") or 0,
+                size.get("width"), size.get("height"),
+                json.dumps({
+                    "raw_text": entry.get("raw_text"),
+                    "raw_lines": entry.get("raw_lines", []),
+                    "parsed_lines": entry.get("parsed_lines", []),
+                }, ensure_ascii=False),
+            ),
+        )
+
+    def _insert_error(self, conn: sqlite3.Connection, entry: dict):
+        size = entry.get("image_size") or {}
+        conn.execute(
+            "INSERT INTO errors (timestamp, filename, error, error_type, stage, image_width, image_height, traceback)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                entry["timestamp"], entry.get("filename"), entry.get("error"), entry.get("error_type"),
+                entry.get("stage"), size.get("width"), size.get("height"), entry.get("traceback"),
+            ),
+        )
+
+    def add_scan(self, entry: dict):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                self._insert_scan(conn, entry)
+            self._after_write(conn)
+
+    def add_error(self, entry: dict):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                self._insert_error(conn, entry)
+            self._after_write(conn)
+
+    def _after_write(self, conn: sqlite3.Connection):
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 1:
+            self._prune(conn)
+
+    def _prune(self, conn: sqlite3.Connection):
+        cutoff = (datetime.utcnow() - timedelta(days=OCR_LOG_RETENTION_DAYS)).isoformat()
+        with conn:
+            for table, max_rows in (("scans", OCR_LOG_MAX_SCANS), ("errors", OCR_LOG_MAX_ERRORS)):
+                conn.execute(f"DELETE FROM {table} WHERE timestamp < ?", (cutoff,))
+                conn.execute(
+                    f"DELETE FROM {table} WHERE id <= (SELECT MAX(id) FROM {table}) - ?",
+                    (max_rows,),
+                )
+
+    def _import_legacy(self):
+        """Move the old JSONL logs into the store (once, then rename them)."""
+        for path, insert in ((OCR_LOG_FILE, self._insert_scan), (ERROR_LOG_FILE, self._insert_error)):
+            if not os.path.exists(path):
+                continue
+            imported = 0
+            with self._conn:
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        if entry.get("timestamp"):
+                            insert(self._conn, entry)
+                            imported += 1
+            os.replace(path, f"{path}.imported")
+            logger.info(f"Imported {imported} entries from {os.path.basename(path)}")
+        self._prune(self._conn)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def recent_scans(self, limit: int, since: Optional[str] = None, until: Optional[str] = None,
+                     store: Optional[str] = None, min_confidence: Optional[float] = None,
+                     max_confidence: Optional[float] = None) -> list:
+        """Last `limit` scans matching the filters, oldest first."""
+        where, params = [], []
+        if since:
+            where.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            where.append("timestamp < ?")
+            params.append(until)
+        if store:
+            where.append("store_detected = ?")
+            params.append(store.upper())
+        if min_confidence is not None:
+            where.append("average_confidence >= ?")
+            params.append(min_confidence)
+        if max_confidence is not None:
+            where.append("average_confidence <= ?")
+            params.append(max_confidence)
+
+        sql = "SELECT * FROM scans"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id DESC LIMIT ?"
+
+        with self._lock:
+            rows = self._connect().execute(sql, (*params, limit)).fetchall()
+
+        scans = []
+        for row in reversed(rows):
+            details = json.loads(row["details"])
+            scans.append({
+                "timestamp": row["timestamp"],
+                "filename": row["filename"],
+                "image_size": {"width": row["image_width"], "height": row["image_height"]},
+                "raw_text": details.get("raw_text"),
+                "raw_lines_count": row["raw_lines_count"],
+                "raw_lines": details.get("raw_lines", []),
+                "parsed_lines_count": row["parsed_lines_count"],
+                "parsed_lines": details.get("parsed_lines", []),
+                "store_detected": row["store_detected"],
+                "total_detected": row["total_detected"],
+                "average_confidence": row["average_confidence"],
+            })
+        return scans
+
+    def recent_errors(self, limit: int, since: Optional[str] = None, stage: Optional[str] = None) -> list:
+        """Last `limit` errors matching the filters, oldest first."""
+        where, params = [], []
+        if since:
+            where.append("timestamp >= ?")
+            params.append(since)
+        if stage:
+            where.append("stage = ?")
+            params.append(stage)
+
+        sql = "SELECT * FROM errors"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id DESC LIMIT ?"
+
+        with self._lock:
+            rows = self._connect().execute(sql, (*params, limit)).fetchall()
+
+        return [
+            {
+                "timestamp": row["timestamp"],
+                "filename": row["filename"],
+                "error": row["error"],
+                "error_type": row["error_type"],
+                "stage": row["stage"],
+                "image_size": (
+                    {"width": row["image_width"], "height": row["image_height"]}
+                    if row["image_width"] is not None else None
+                ),
+                "traceback": row["traceback"],
+            }
+            for row in reversed(rows)
+        ]
+
+    def stats(self) -> dict:
+        with self._lock:
+            row = self._connect().execute("SELECT * FROM scan_stats WHERE id = 1").fetchone()
+        total = row["total"]
+        return {
+            "total": total,
+            "errors_total": row["errors_total"],
+            "average_parsed_lines": round(row["sum_parsed_lines"] / total, 1) if total else 0,
+            "average_confidence": round(row["sum_confidence"] / total, 3) if total else 0,
+        }
+
+
+scan_log = ScanLogStore(OCR_LOG_DB)
+
+
 def log_ocr_scan(filename: str, raw_text: str, raw_lines: list, parsed_lines: list,
                  store_name: Optional[str], total_amount: Optional[float],
                  avg_confidence: float, image_size: tuple):
-    """Log OCR scan results to JSONL file for future analysis"""
+    """Log OCR scan results for future analysis"""
     try:
-        ensure_log_dir()
-        log_entry = {
+        scan_log.add_scan({
             "timestamp": datetime.utcnow().isoformat(),
             "filename": filename,
             "image_size": {"width": image_size[0], "height": image_size[1]},
@@ -57,9 +416,7 @@ def log_ocr_scan(filename: str, raw_text: str, raw_lines: list, parsed_lines: li
             "store_detected": store_name,
             "total_detected": total_amount,
             "average_confidence": avg_confidence
-        }
-        with open(OCR_LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
+        })
         logger.info(f"Logged OCR scan: {filename}")
     except Exception as e:
         logger.warning(f"Failed to log OCR scan: {e}")
@@ -69,8 +426,7 @@ def log_ocr_error(filename: str, error: str, error_type: str,
                   image_size: Optional[tuple] = None, stage: str = "unknown"):
     """Log OCR errors for debugging"""
     try:
-        ensure_log_dir()
-        log_entry = {
+        scan_log.add_error({
             "timestamp": datetime.utcnow().isoformat(),
             "filename": filename,
             "error": error,
@@ -78,9 +434,7 @@ def log_ocr_error(filename: str, error: str, error_type: str,
             "stage": stage,
             "image_size": {"width": image_size[0], "height": image_size[1]} if image_size else None,
             "traceback": traceback.format_exc()
-        }
-        with open(ERROR_LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
+        })
         logger.error(f"OCR Error logged: {error_type} - {error}")
     except Exception as e:
         logger.warning(f"Failed to log OCR error: {e}")
@@ -132,46 +486,62 @@ class ParsedLine:
     confidence: float = 0.0
 
 
-def preprocess_image(image: Image.Image) -> Image.Image:
-    """Preprocess image for better OCR - optimized for memory"""
-    # Handle EXIF orientation (common issue with phone photos)
-    try:
-        from PIL import ExifTags
-        for orientation in ExifTags.TAGS.keys():
-            if ExifTags.TAGS[orientation] == 'Orientation':
-                break
-        exif = image._getexif()
-        if exif is not None:
-            orientation_value = exif.get(orientation)
-            if orientation_value == 3:
-                image = image.rotate(180, expand=True)
-            elif orientation_value == 6:
-                image = image.rotate(270, expand=True)
-            elif orientation_value == 8:
-                image = image.rotate(90, expand=True)
-    except (AttributeError, KeyError, IndexError):
-        pass
-
-    # Convert to RGB for processing
-    if image.mode != 'RGB':
-        image = image.convert('RGB')
-
-    # Resize more aggressively to save memory
-    # Receipts don't need high resolution for text extraction
-    min_dim = 600
-    max_dim = 1200  # Reduced from 2000 to save memory
+def oriented_size(image: Image.Image) -> tuple:
+    """Image size after the EXIF orientation is applied (without decoding pixels)."""
     width, height = image.size
+    if image.getexif().get(EXIF_ORIENTATION_TAG, 1) in (5, 6, 7, 8):  # Rotated by 90/270
+        return height, width
+    return width, height
+
+
+def target_size(size: tuple, tiled: bool) -> tuple:
+    """Size the image is brought to before OCR."""
+    width, height = size
+    if tiled:
+        # Strips are read at native resolution, only very wide photos are reduced
+        scale = min(1.0, OCR_TILING["max_width"] / width)
+    elif min(width, height) < OCR_PARAMS["min_dim"]:
+        scale = OCR_PARAMS["min_dim"] / min(width, height)
+    else:
+        # Receipts don't need high resolution for text extraction
+        scale = min(1.0, OCR_PARAMS["max_dim"] / max(width, height))
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def load_image(contents: bytes, tiled: Optional[bool] = None) -> tuple:
+    """
+    Decode an upload straight to the RGB array EasyOCR reads.
+
+    - JPEGs are decoded in draft mode at the smallest 1/2, 1/4, 1/8 scale
+      that is still at least the target size, so a 12MP photo is never
+      fully decoded just to be shrunk
+    - EXIF orientation is applied in place, in the same pass
+    - the result is a NumPy array handed to the reader as-is (no re-encode)
+
+    Returns:
+        (RGB uint8 array, original size, tiled)
+    """
+    image = Image.open(io.BytesIO(contents))
+    original_size = image.size
+    size = oriented_size(image)
+    if tiled is None:
+        tiled = should_tile(size)
+    target = target_size(size, tiled)
+
+    if image.format == "JPEG" and target[0] < size[0]:
+        # draft() works on the stored (unrotated) size, scale is the same
+        scale = target[0] / size[0]
+        image.draft("RGB", (math.ceil(original_size[0] * scale), math.ceil(original_size[1] * scale)))
 
-    if min(width, height) < min_dim:
-        scale = min_dim / min(width, height)
-        new_size = (int(width * scale), int(height * scale))
-        image = image.resize(new_size, Image.Resampling.LANCZOS)
-    elif max(width, height) > max_dim:
-        scale = max_dim / max(width, height)
-        new_size = (int(width * scale), int(height * scale))
-        image = image.resize(new_size, Image.Resampling.LANCZOS)
+    ImageOps.exif_transpose(image, in_place=True)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    if image.size != target:
+        image = image.resize(target, Image.Resampling.LANCZOS)
 
-    return image
+    pixels = np.asarray(image)
+    image.close()  # The array owns the only copy of the pixels from here on
+    return pixels, original_size, tiled
 
 
 def should_skip_line(text: str) -> bool:
@@ -312,10 +682,536 @@ def extract_total(lines: list[str]) -> Optional[float]:
     return None
 
 
+# ============================================================
+# Worker process side
+# ============================================================
+
+def init_ocr_worker():
+    """Process pool initializer: load the EasyOCR models once per worker."""
+    global reader
+    logger.info(f"[worker {os.getpid()}] Loading EasyOCR models...")
+    reader = easyocr.Reader(OCR_PARAMS["languages"], gpu=False)
+    logger.info(f"[worker {os.getpid()}] EasyOCR models loaded successfully")
+
+
+def worker_ready() -> int:
+    """No-op task used to start workers (and load models) at startup."""
+    return os.getpid()
+
+
+def should_tile(size: tuple) -> bool:
+    """Tall images (long receipts) are tiled instead of downscaled."""
+    width, height = size
+    return (
+        OCR_TILING["enabled"]
+        and height > OCR_PARAMS["max_dim"]
+        and height / max(width, 1) >= OCR_TILING["min_aspect"]
+    )
+
+
+def tile_bounds(height: int, tile_height: int, overlap: int) -> list:
+    """
+    Split [0, height) into overlapping strips.
+
+    Returns (top, bottom, keep_top, keep_bottom) per strip: a region found in
+    a strip is kept only if its vertical center falls in [keep_top, keep_bottom),
+    so text in an overlap is owned by exactly one strip (the middle of the
+    overlap is the cut).
+    """
+    overlap = min(overlap, tile_height // 2)
+    step = tile_height - overlap
+    tops = list(range(0, max(height - overlap, 1), step))
+
+    bounds = []
+    for i, top in enumerate(tops):
+        bottom = min(top + tile_height, height)
+        keep_top = 0 if i == 0 else top + overlap // 2
+        keep_bottom = height if i == len(tops) - 1 else bottom - overlap // 2
+        bounds.append((top, bottom, keep_top, keep_bottom))
+    return bounds
+
+
+def _box_iou(a: list, b: list) -> float:
+    ax0, ay0 = min(p[0] for p in a), min(p[1] for p in a)
+    ax1, ay1 = max(p[0] for p in a), max(p[1] for p in a)
+    bx0, by0 = min(p[0] for p in b), min(p[1] for p in b)
+    bx1, by1 = max(p[0] for p in b), max(p[1] for p in b)
+    inter = max(0.0, min(ax1, bx1) - max(ax0, bx0)) * max(0.0, min(ay1, by1) - max(ay0, by0))
+    union = (ax1 - ax0) * (ay1 - ay0) + (bx1 - bx0) * (by1 - by0) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def dedupe_overlap_regions(regions: list, iou_threshold: float = 0.5) -> list:
+    """Drop regions that overlap a more confident region (text read twice across a cut)."""
+    kept = []
+    for region in sorted(regions, key=lambda r: r[2], reverse=True):
+        if all(_box_iou(region[0], other[0]) < iou_threshold for other in kept):
+            kept.append(region)
+    return kept
+
+
+def ocr_tiled(pixels: np.ndarray) -> tuple:
+    """
+    Read a tall image strip by strip at (near) native resolution.
+
+    Strips are row slices of the decoded array (views, no copies), so the
+    only full-size buffer is the decoded image itself.
+
+    Returns:
+        (regions in full-image coordinates, line grouping threshold in pixels)
+    """
+    height = pixels.shape[0]
+
+    regions = []
+    for top, bottom, keep_top, keep_bottom in tile_bounds(height, OCR_TILING["tile_height"], OCR_TILING["overlap"]):
+        results = reader.readtext(
+            pixels[top:bottom],
+            detail=1,
+            paragraph=False,
+            batch_size=OCR_TILING["batch_size"],
+            **OCR_PARAMS["readtext"],
+        )
+        for bbox, text, conf in results:
+            box = [[float(x), float(y) + top] for x, y in bbox]
+            center_y = sum(y for _, y in box) / len(box)
+            if keep_top <= center_y < keep_bottom:
+                regions.append((box, text, float(conf)))
+
+    regions = dedupe_overlap_regions(regions)
+
+    # Full resolution: group lines relative to the text height, not a fixed 20px
+    heights = [max(y for _, y in box) - min(y for _, y in box) for box, _, _ in regions]
+    line_threshold = max(8.0, statistics.median(heights) * 0.5) if heights else OCR_PARAMS["line_threshold"]
+
+    return regions, line_threshold
+
+
+def run_ocr(contents: bytes) -> dict:
+    """
+    Decode, preprocess and run EasyOCR on one image (in a worker process).
+
+    Returns the image sizes, the raw EasyOCR regions as plain Python types
+    and the time spent in the worker.
+    """
+    started = time.monotonic()
+    result = ocr_pixels(*load_image(contents))
+    result["ocr_seconds"] = time.monotonic() - started
+    return result
+
+
+def ocr_pixels(pixels: np.ndarray, original_size: tuple, tiled: bool) -> dict:
+    """Run EasyOCR on a decoded image (see load_image)."""
+    processed_size = (pixels.shape[1], pixels.shape[0])
+
+    if tiled:
+        regions, line_threshold = ocr_tiled(pixels)
+    else:
+        # Returns list of (bbox, text, confidence)
+        results = reader.readtext(
+            pixels,
+            detail=1,
+            paragraph=False,
+            batch_size=1,  # Lower batch size to reduce memory
+            **OCR_PARAMS["readtext"],
+        )
+        regions = [
+            ([[float(x), float(y)] for x, y in bbox], text, float(conf))
+            for bbox, text, conf in results
+        ]
+        line_threshold = OCR_PARAMS["line_threshold"]
+
+    return {
+        "original_size": original_size,
+        "processed_size": processed_size,
+        "regions": regions,
+        "line_threshold": line_threshold,
+        "tiled": tiled,
+    }
+
+
+# ============================================================
+# API process side
+# ============================================================
+
+class PoolFullError(Exception):
+    """Raised when every worker is busy and the queue is full."""
+    pass
+
+
+class OCRPool:
+    """
+    Bounded pool of OCR worker processes.
+
+    At most workers + queue_depth images are accepted at once; the rest are
+    rejected immediately so callers can retry later instead of piling up.
+    """
+
+    def __init__(self, workers: int, queue_depth: int):
+        self.workers = max(1, workers)
+        self.queue_depth = max(0, queue_depth)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+        self._running = 0
+        self._latencies = deque(maxlen=100)  # (total seconds, queue wait seconds)
+        self._counters = {"completed": 0, "failed": 0, "rejected": 0, "restarts": 0}
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_depth
+
+    def start(self):
+        # spawn: PyTorch is not fork-safe
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_ocr_worker,
+        )
+        for _ in range(self.workers):
+            self._executor.submit(worker_ready)
+        logger.info(f"OCR pool started: {self.workers} workers, queue depth {self.queue_depth}")
+
+    def stop(self):
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _restart(self):
+        logger.error("OCR worker pool broken, restarting")
+        self._counters["restarts"] += 1
+        self.stop()
+        self.start()
+
+    async def run(self, contents: bytes) -> dict:
+        """Run OCR in a worker. Raises PoolFullError when at capacity."""
+        return await self._submit(run_ocr, contents)
+
+    async def _submit(self, fn, arg) -> dict:
+        if self._in_flight >= self.capacity:
+            self._counters["rejected"] += 1
+            raise PoolFullError()
+
+        self._in_flight += 1
+        submitted = time.monotonic()
+        executor = self._executor
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(executor, fn, arg)
+        except BrokenProcessPool:
+            self._counters["failed"] += 1
+            if self._executor is executor:  # Restart once, not once per failed request
+                self._restart()
+            raise
+        except Exception:
+            self._counters["failed"] += 1
+            raise
+        finally:
+            self._in_flight -= 1
+
+        total = time.monotonic() - submitted
+        self._latencies.append((total, max(total - result["ocr_seconds"], 0.0)))
+        self._counters["completed"] += 1
+        return result
+
+    def stats(self) -> dict:
+        totals = sorted(t for t, _ in self._latencies)
+        waits = [w for _, w in self._latencies]
+
+        def percentile(values, pct):
+            if not values:
+                return None
+            return round(values[min(len(values) - 1, int(len(values) * pct))], 2)
+
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "in_flight": self._in_flight,
+            "queued": max(self._in_flight - self.workers, 0),
+            **self._counters,
+            "latency_p50_seconds": percentile(totals, 0.5),
+            "latency_p95_seconds": percentile(totals, 0.95),
+            "avg_queue_wait_seconds": round(sum(waits) / len(waits), 2) if waits else None,
+        }
+
+
+class OCRResultCache:
+    """
+    Content-addressed cache of OCR results on disk.
+
+    Keyed by the SHA-256 of the uploaded bytes plus OCR_PARAMS_HASH, so a
+    re-uploaded photo skips EasyOCR, and a parameter change never serves
+    stale results. Files are written atomically (tmp + rename).
+
+    Bounded by max_bytes: hits refresh an entry's mtime, and when a store
+    goes over the limit the oldest entries are evicted. Directories of
+    other params hashes can never be hit again and are removed at startup.
+    """
+
+    def __init__(self, directory: str, enabled: bool = True, max_bytes: int = 0):
+        self.directory = directory
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self._entries = 0
+        self._bytes = 0
+        self._counters = {"hits": 0, "misses": 0, "stores": 0, "errors": 0, "evicted": 0}
+
+    @property
+    def _params_dir(self) -> str:
+        return os.path.join(self.directory, OCR_PARAMS_HASH)
+
+    def _path(self, image_sha256: str) -> str:
+        return os.path.join(self._params_dir, image_sha256[:2], f"{image_sha256}.json")
+
+    def _files(self) -> List[tuple]:
+        """(mtime, size, path) of every entry of the current params hash."""
+        files = []
+        for root, _, names in os.walk(self._params_dir):
+            for name in names:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def start(self):
+        """Remove entries of obsolete params hashes and measure the current ones."""
+        if not self.enabled:
+            return
+        try:
+            os.makedirs(self._params_dir, exist_ok=True)
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if name != OCR_PARAMS_HASH and os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                    logger.info(f"Removed OCR cache of obsolete params hash {name}")
+            files = self._files()
+        except OSError as e:
+            logger.warning(f"Failed to prepare OCR cache: {e}")
+            return
+        self._entries = len(files)
+        self._bytes = sum(size for _, size, _ in files)
+        logger.info(f"OCR cache: {self._entries} entries, {self._bytes / 1024 / 1024:.1f} MB")
+        self._prune()
+
+    def _prune(self):
+        """Evict the least recently used entries once the cache is over max_bytes."""
+        if not self.max_bytes or self._bytes <= self.max_bytes:
+            return
+        files = sorted(self._files())
+        self._entries = len(files)
+        self._bytes = sum(size for _, size, _ in files)
+        target = self.max_bytes * OCR_CACHE_PRUNE_TARGET
+        evicted = 0
+        for _, size, path in files:
+            if self._bytes <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._entries -= 1
+            self._bytes -= size
+            evicted += 1
+        self._counters["evicted"] += evicted
+        if evicted:
+            logger.info(f"Evicted {evicted} OCR cache entries ({self._bytes / 1024 / 1024:.1f} MB left)")
+
+    def purge(self) -> int:
+        """Delete every entry. Returns entries deleted."""
+        deleted = self._entries
+        shutil.rmtree(self._params_dir, ignore_errors=True)
+        self._entries = 0
+        self._bytes = 0
+        logger.info(f"Purged OCR cache ({deleted} entries)")
+        return deleted
+
+    def get(self, image_sha256: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        path = self._path(image_sha256)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)  # Recently used: evicted last
+        except FileNotFoundError:
+            self._counters["misses"] += 1
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Unreadable OCR cache entry {image_sha256}: {e}")
+            self._counters["errors"] += 1
+            self._counters["misses"] += 1
+            return None
+        self._counters["hits"] += 1
+        return entry
+
+    def put(self, image_sha256: str, entry: dict):
+        if not self.enabled:
+            return
+        path = self._path(image_sha256)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            replaced = os.path.getsize(path) if os.path.exists(path) else None
+            os.replace(tmp_path, path)
+            self._counters["stores"] += 1
+        except OSError as e:
+            logger.warning(f"Failed to store OCR cache entry {image_sha256}: {e}")
+            self._counters["errors"] += 1
+            return
+        if replaced is None:
+            self._entries += 1
+        else:
+            self._bytes -= replaced
+        self._bytes += os.path.getsize(path)
+        self._prune()
+
+    def stats(self) -> dict:
+        lookups = self._counters["hits"] + self._counters["misses"]
+        return {
+            "enabled": self.enabled,
+            "params_hash": OCR_PARAMS_HASH,
+            "entries": self._entries,
+            "size_mb": round(self._bytes / 1024 / 1024, 1),
+            "max_mb": round(self.max_bytes / 1024 / 1024, 1),
+            **self._counters,
+            "hit_rate": round(self._counters["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+
+ocr_pool = OCRPool(OCR_WORKERS, OCR_QUEUE_DEPTH)
+ocr_cache = OCRResultCache(OCR_CACHE_DIR, OCR_CACHE_ENABLED, OCR_CACHE_MAX_MB * 1024 * 1024)
+
+
+@app.on_event("startup")
+def start_ocr_pool():
+    ocr_pool.start()
+    ocr_cache.start()
+
+
+@app.on_event("shutdown")
+def stop_ocr_pool():
+    ocr_pool.stop()
+    scan_log.close()
+
+
+def group_lines(regions: list, line_threshold: float) -> tuple:
+    """
+    Group EasyOCR regions into text lines (top to bottom, left to right).
+
+    Returns:
+        (raw_lines, confidences)
+    """
+    # Sort results by vertical position (top to bottom)
+    results_sorted = sorted(regions, key=lambda x: x[0][0][1])
+
+    # Group into lines based on vertical position
+    raw_lines = []
+    confidences = []
+    current_line = []
+    current_y = None
+
+    for bbox, text, conf in results_sorted:
+        y = bbox[0][1]  # top-left y coordinate
+        confidences.append(conf)
+
+        if current_y is None or abs(y - current_y) < line_threshold:
+            current_line.append((bbox[0][0], text))  # (x, text)
+            current_y = y if current_y is None else (current_y + y) / 2
+        else:
+            # Sort by x position and join
+            current_line.sort(key=lambda x: x[0])
+            line_text = ' '.join([t for _, t in current_line])
+            if line_text.strip():
+                raw_lines.append(line_text)
+            current_line = [(bbox[0][0], text)]
+            current_y = y
+
+    # Don't forget the last line
+    if current_line:
+        current_line.sort(key=lambda x: x[0])
+        line_text = ' '.join([t for _, t in current_line])
+        if line_text.strip():
+            raw_lines.append(line_text)
+
+    return raw_lines, confidences
+
+
+def build_ocr_response(filename: str, image_sha256: str, ocr: dict) -> dict:
+    """
+    Turn worker output into the /process response, then log and cache it.
+    """
+    original_size = tuple(ocr["original_size"])
+    results = ocr["regions"]
+    logger.info(f"Processed image: {original_size} -> {tuple(ocr['processed_size'])}{' (tiled)' if ocr['tiled'] else ''}")
+    logger.info(f"EasyOCR found {len(results)} text regions")
+
+    if not results:
+        logger.warning("No text detected in image")
+        response = {
+            "raw_text": "",
+            "lines": [],
+            "store_name": None,
+            "total_amount": None,
+            "average_confidence": 0.0
+        }
+        ocr_cache.put(image_sha256, {"raw_lines": [], "confidences": [], "response": response})
+        return response
+
+    raw_lines, confidences = group_lines(results, ocr["line_threshold"])
+
+    # Build response
+    raw_text = '\n'.join(raw_lines)
+    store_name = detect_store(raw_lines)
+    total_amount = extract_total(raw_lines)
+
+    # Parse lines
+    avg_conf = sum(confidences) / len(confidences) if confidences else 0.8
+    parsed_lines = []
+    for text in raw_lines:
+        parsed = parse_line(text, avg_conf)
+        if parsed.is_product and parsed.parsed_name:
+            parsed_lines.append(asdict(parsed))
+
+    logger.info(f"Processed receipt: {len(parsed_lines)} products, store={store_name}, confidence={avg_conf:.2f}")
+
+    # Log scan for future analysis
+    log_ocr_scan(
+        filename=filename,
+        raw_text=raw_text,
+        raw_lines=raw_lines,
+        parsed_lines=parsed_lines,
+        store_name=store_name,
+        total_amount=total_amount,
+        avg_confidence=avg_conf,
+        image_size=original_size
+    )
+
+    response = {
+        "raw_text": raw_text,
+        "lines": parsed_lines,
+        "store_name": store_name,
+        "total_amount": total_amount,
+        "average_confidence": avg_conf
+    }
+    ocr_cache.put(image_sha256, {"raw_lines": raw_lines, "confidences": confidences, "response": response})
+    return response
+
+
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "ok", "service": "ocr", "engine": "easyocr"}
+    """Health check endpoint (answers while OCR is running)"""
+    return {
+        "status": "ok",
+        "service": "ocr",
+        "engine": "easyocr",
+        "params_hash": OCR_PARAMS_HASH,
+        "pool": ocr_pool.stats(),
+        "cache": ocr_cache.stats(),
+    }
 
 
 @app.post("/process")
@@ -329,6 +1225,8 @@ async def process_receipt(file: UploadFile = File(...)):
         - store_name: Detected store (if any)
         - total_amount: Detected total (if any)
         - average_confidence: OCR confidence score
+        - image_sha256 / params_hash: cache key of this result
+        - cached: True when served from the result cache
     """
     filename = file.filename or "unknown"
     original_size = None
@@ -339,171 +1237,78 @@ async def process_receipt(file: UploadFile = File(...)):
         raise HTTPException(400, "Unsupported image format. Use JPG, PNG, or WEBP.")
 
     try:
-        # Read and preprocess image
         logger.info(f"Reading image: {filename}")
         contents = await file.read()
         logger.info(f"Image size: {len(contents)} bytes")
 
-        image = Image.open(io.BytesIO(contents))
-        original_size = image.size
-        logger.info(f"Image dimensions: {original_size}")
-
-        processed = preprocess_image(image)
-        logger.info(f"Processing image: {original_size} -> {processed.size}")
-
-        # Save preprocessed image to bytes for EasyOCR
-        img_buffer = io.BytesIO()
-        processed.save(img_buffer, format='JPEG', quality=95)
-        img_bytes = img_buffer.getvalue()
-
-        logger.info(f"Running EasyOCR on {len(img_bytes)} bytes...")
-
-        # Force garbage collection before OCR to free memory
-        gc.collect()
+        image_sha256 = hashlib.sha256(contents).hexdigest()
+        cache_key = {"image_sha256": image_sha256, "params_hash": OCR_PARAMS_HASH}
+        cached = ocr_cache.get(image_sha256)
+        if cached is not None:
+            logger.info(f"OCR cache hit for {filename} ({image_sha256[:12]})")
+            return JSONResponse({**cached["response"], **cache_key, "cached": True})
 
-        # Run EasyOCR with raw bytes
-        # Returns list of (bbox, text, confidence)
+        # Preprocessing + EasyOCR run in a worker process
         try:
-            results = reader.readtext(
-                img_bytes,
-                detail=1,
-                paragraph=False,
-                min_size=10,
-                text_threshold=0.7,
-                low_text=0.4,
-                batch_size=1,  # Lower batch size to reduce memory
+            ocr = await ocr_pool.run(contents)
+        except PoolFullError:
+            logger.warning(f"OCR queue full, rejecting {filename}")
+            return JSONResponse(
+                {"detail": "OCR service busy, retry later"},
+                status_code=429,
+                headers={"Retry-After": str(OCR_RETRY_AFTER_SECONDS)},
             )
-            logger.info(f"EasyOCR found {len(results)} text regions")
         except Exception as ocr_error:
             logger.error(f"EasyOCR failed: {ocr_error}")
             log_ocr_error(filename, str(ocr_error), type(ocr_error).__name__, original_size, stage="easyocr")
-            gc.collect()
             raise
 
-        if not results:
-            logger.warning("No text detected in image")
-            return JSONResponse({
-                "raw_text": "",
-                "lines": [],
-                "store_name": None,
-                "total_amount": None,
-                "average_confidence": 0.0
-            })
-
-        # Sort results by vertical position (top to bottom)
-        results_sorted = sorted(results, key=lambda x: x[0][0][1])
-
-        # Group into lines based on vertical position
-        raw_lines = []
-        confidences = []
-        current_line = []
-        current_y = None
-        line_threshold = 20  # pixels
-
-        for bbox, text, conf in results_sorted:
-            y = bbox[0][1]  # top-left y coordinate
-            confidences.append(conf)
-
-            if current_y is None or abs(y - current_y) < line_threshold:
-                current_line.append((bbox[0][0], text))  # (x, text)
-                current_y = y if current_y is None else (current_y + y) / 2
-            else:
-                # Sort by x position and join
-                current_line.sort(key=lambda x: x[0])
-                line_text = ' '.join([t for _, t in current_line])
-                if line_text.strip():
-                    raw_lines.append(line_text)
-                current_line = [(bbox[0][0], text)]
-                current_y = y
-
-        # Don't forget the last line
-        if current_line:
-            current_line.sort(key=lambda x: x[0])
-            line_text = ' '.join([t for _, t in current_line])
-            if line_text.strip():
-                raw_lines.append(line_text)
-
-        # Build response
-        raw_text = '\n'.join(raw_lines)
-        store_name = detect_store(raw_lines)
-        total_amount = extract_total(raw_lines)
-
-        # Parse lines
-        avg_conf = sum(confidences) / len(confidences) if confidences else 0.8
-        parsed_lines = []
-        for text in raw_lines:
-            parsed = parse_line(text, avg_conf)
-            if parsed.is_product and parsed.parsed_name:
-                parsed_lines.append(asdict(parsed))
-
-        logger.info(f"Processed receipt: {len(parsed_lines)} products, store={store_name}, confidence={avg_conf:.2f}")
-
-        # Log scan for future analysis
-        log_ocr_scan(
-            filename=file.filename or "unknown",
-            raw_text=raw_text,
-            raw_lines=raw_lines,
-            parsed_lines=parsed_lines,
-            store_name=store_name,
-            total_amount=total_amount,
-            avg_confidence=avg_conf,
-            image_size=original_size
-        )
-
-        # Free memory after processing
-        del image, processed, img_bytes, results
-        gc.collect()
-
-        return JSONResponse({
-            "raw_text": raw_text,
-            "lines": parsed_lines,
-            "store_name": store_name,
-            "total_amount": total_amount,
-            "average_confidence": avg_conf
-        })
+        original_size = tuple(ocr["original_size"])
+        logger.info(f"OCR of {filename} took {ocr['ocr_seconds']:.1f}s")
+        response = build_ocr_response(filename, image_sha256, ocr)
+        return JSONResponse({**response, **cache_key, "cached": False})
 
     except Exception as e:
         logger.error(f"OCR processing failed: {e}")
         log_ocr_error(filename, str(e), type(e).__name__, original_size, stage="processing")
-        # Force garbage collection on error
-        gc.collect()
         raise HTTPException(500, f"OCR processing failed: {str(e)}")
 
 
+@app.delete("/cache")
+async def purge_cache():
+    """Delete every cached OCR result."""
+    return {"deleted": ocr_cache.purge()}
+
+
 @app.get("/logs")
-async def get_logs(limit: int = 50):
+async def get_logs(
+    limit: int = 50,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    store: Optional[str] = None,
+    min_confidence: Optional[float] = None,
+    max_confidence: Optional[float] = None,
+):
     """
     Get recent OCR scan logs for analysis.
 
-    Returns the last N scans with all their data.
+    Returns the last N scans with all their data, optionally filtered by
+    date range (ISO timestamps), detected store or confidence.
+    Stats cover the whole retained log.
     """
     try:
-        if not os.path.exists(OCR_LOG_FILE):
-            return {"scans": [], "total": 0}
-
-        scans = []
-        with open(OCR_LOG_FILE, "r", encoding="utf-8") as f:
-            for line in f:
-                if line.strip():
-                    try:
-                        scans.append(json.loads(line))
-                    except json.JSONDecodeError:
-                        continue
-
-        # Return last N scans
-        recent_scans = scans[-limit:] if limit > 0 else scans
-
-        # Calculate stats
-        total_scans = len(scans)
-        avg_lines = sum(s.get("parsed_lines_count", 0) for s in scans) / total_scans if total_scans > 0 else 0
-        avg_confidence = sum(s.get("average_confidence", 0) for s in scans) / total_scans if total_scans > 0 else 0
-
+        stats = scan_log.stats()
+        scans = scan_log.recent_scans(
+            max(limit, 0) or OCR_LOG_MAX_SCANS,
+            since=since, until=until, store=store,
+            min_confidence=min_confidence, max_confidence=max_confidence,
+        )
         return {
-            "scans": recent_scans,
-            "total": total_scans,
+            "scans": scans,
+            "total": stats["total"],
             "stats": {
-                "average_parsed_lines": round(avg_lines, 1),
-                "average_confidence": round(avg_confidence, 3)
+                "average_parsed_lines": stats["average_parsed_lines"],
+                "average_confidence": stats["average_confidence"]
             }
         }
     except Exception as e:
@@ -512,31 +1317,17 @@ async def get_logs(limit: int = 50):
 
 
 @app.get("/errors")
-async def get_errors(limit: int = 50):
+async def get_errors(limit: int = 50, since: Optional[str] = None, stage: Optional[str] = None):
     """
     Get recent OCR error logs for debugging.
 
-    Returns the last N errors with full details.
+    Returns the last N errors with full details, optionally filtered by
+    date (ISO timestamp) or stage.
     """
     try:
-        if not os.path.exists(ERROR_LOG_FILE):
-            return {"errors": [], "total": 0}
-
-        errors = []
-        with open(ERROR_LOG_FILE, "r", encoding="utf-8") as f:
-            for line in f:
-                if line.strip():
-                    try:
-                        errors.append(json.loads(line))
-                    except json.JSONDecodeError:
-                        continue
-
-        # Return last N errors
-        recent_errors = errors[-limit:] if limit > 0 else errors
-
         return {
-            "errors": recent_errors,
-            "total": len(errors)
+            "errors": scan_log.recent_errors(max(limit, 0) or OCR_LOG_MAX_ERRORS, since=since, stage=stage),
+            "total": scan_log.stats()["errors_total"]
         }
     except Exception as e:
         logger.error(f"Failed to read error logs: {e}")
@@ -551,8 +1342,10 @@ async def root():
         "version": "2.0.0",
         "engine": "EasyOCR",
         "endpoints": {
-            "/health": "Health check",
+            "/health": "Health check + worker pool and cache stats",
             "/process": "POST - Process receipt image",
-            "/logs": "GET - View OCR scan logs"
+            "/cache": "DELETE - Purge the OCR result cache",
+            "/logs": "GET - View OCR scan logs",
+            "/errors": "GET - View OCR error logs"
         }
     }